@@ -57,7 +57,7 @@ class RowComponent(LiveComponent[RowState]):
         else:
             call_context.state.bean_form = bean_form
 
-    @command
+    @command(readonly=True)
     def delete(self, call_context: CallContext[RowState]):
         call_context.state.bean.delete()
         return ParentDirty()
@@ -33,6 +33,11 @@ class TableComponent(LiveComponent[TableState]):
             )
         else:
             beans = CoffeeBean.objects.all()
+        # Fetch the states of all rows in one round trip instead of one per row.
+        state_addr = extra_context_request.state_addr
+        extra_context_request.state_manager.prefetch_component_states(
+            state_addr | ("coffee/row", str(bean.id)) for bean in beans
+        )
         return {"beans": beans}
 
     def init_state(self, context: InitStateContext) -> TableState:
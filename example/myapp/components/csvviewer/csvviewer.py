@@ -4,22 +4,28 @@ from django.core.files.uploadedfile import UploadedFile
 from django_components import component
 from pydantic import BaseModel
 
-from livecomponents import CallContext, InitStateContext, LiveComponent, command
+from livecomponents import (
+    Blob,
+    CallContext,
+    ExtraContextRequest,
+    InitStateContext,
+    LiveComponent,
+    command,
+)
 
 
 class CsvViewerState(BaseModel):
-    # Note: For the sake of simplicity, we are storing the file contents in the state.
-    # However, this is not recommended for large files. Instead, we recommend storing
-    # the file contents in an external store and keeping in the state only the minimal
-    # information necessary to restore the file.
+    # The file contents are stored as a blob, apart from the state. The example
+    # project keeps blobs in files (see the "blob_store" setting), which are
+    # memory-mapped when the component is rendered, so that the contents aren't
+    # copied through pickle and Redis on every command.
     file_name: str | None = None
-    header: list[str] | None = None
-    records: list[list[str]] | None = None
+    delimiter: str = ","
+    content: Blob[bytes] | None = None
     error: str | None = None
 
     def set_error(self, error_message: str):
-        self.header = None
-        self.records = None
+        self.content = None
         self.error = error_message
 
 
@@ -30,25 +36,36 @@ class CsvViewer(LiveComponent[CsvViewerState]):
     def init_state(self, context: InitStateContext) -> CsvViewerState:
         return CsvViewerState(**context.component_kwargs)
 
+    def get_extra_context_data(
+        self, extra_context_request: ExtraContextRequest[CsvViewerState]
+    ) -> dict:
+        """Parse the CSV file for rendering."""
+        state = extra_context_request.state
+        if state.content is None:
+            return {}
+        csv_content = str(state.content.value, "utf-8")
+        reader = csv.reader(csv_content.splitlines(), delimiter=state.delimiter)
+        records = list(reader)
+        return {"header": records[0], "records": records[1:]}
+
     @command
     def upload_file(self, call_context: CallContext[CsvViewerState], delimiter: str):
-        """Parse CSV file and update state in place."""
+        """Check the CSV file and store it in the state."""
         state = call_context.state
         csv_file: UploadedFile = call_context.request.FILES["csv_file"]
 
+        content = csv_file.read()
         try:
-            csv_content = csv_file.read().decode("utf-8")
+            content.decode("utf-8")
         except UnicodeDecodeError:
             state.set_error("File is not a valid UTF-8 file")
             return
         call_context.state.file_name = csv_file.name
 
-        reader = csv.reader(csv_content.splitlines(), delimiter=delimiter)
-        records = list(reader)
-        if not records:
+        if not content.strip():
             state.set_error("File is empty")
             return
 
-        state.header = records[0]
-        state.records = records[1:]
+        state.delimiter = delimiter
+        state.content = Blob(content)
         state.error = None
@@ -0,0 +1,163 @@
+import re
+import sys
+import timeit
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django_components.component_registry import registry
+from pydantic import BaseModel, field_validator
+
+from livecomponents.manager.serializers import (
+    IStateSerializer,
+    JsonStateSerializer,
+    PickleStateSerializer,
+)
+from myapp.domain import Item
+from myapp.models import CoffeeBean
+
+SERIALIZERS: dict[str, IStateSerializer] = {
+    "pickle": PickleStateSerializer(),
+    "json": JsonStateSerializer(),
+}
+
+
+# Synthetic wide and deep states, with and without custom field validators
+
+
+class CsvRecordsState(BaseModel):
+    """Parsed CSV file, like the csvviewer component kept it before using blobs."""
+
+    file_name: str
+    header: list[str]
+    records: list[list[str]]
+
+
+class DataPoint(BaseModel):
+    label: str
+    value: float
+
+
+class WideState(BaseModel):
+    points: list[DataPoint]
+
+
+class ValidatedDataPoint(DataPoint):
+    @field_validator("label")
+    @classmethod
+    def validate_label(cls, label: str) -> str:
+        if not re.fullmatch(r"[\w ]+", label):
+            raise ValueError("Invalid label")
+        return label
+
+
+class ValidatedWideState(BaseModel):
+    points: list[ValidatedDataPoint]
+
+
+class TreeNode(BaseModel):
+    name: str
+    children: list["TreeNode"] = []
+
+
+class ValidatedTreeNode(BaseModel):
+    name: str
+    children: list["ValidatedTreeNode"] = []
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, name: str) -> str:
+        if not re.fullmatch(r"[\w ]+", name):
+            raise ValueError("Invalid name")
+        return name
+
+
+def build_tree(node_cls: type[TreeNode | ValidatedTreeNode], depth: int, name="Root"):
+    children = [
+        build_tree(node_cls, depth - 1, f"{name} {i}") for i in range(2 if depth else 0)
+    ]
+    return node_cls(name=name, children=children)
+
+
+class Command(BaseCommand):
+    help = "Compare state serializers on the states of example components"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=1000,
+            help="Number of times to serialize and deserialize every state",
+        )
+
+    def handle(self, *args, number: int, **options):
+        # Beans, created for the benchmark, are rolled back.
+        with transaction.atomic():
+            for name, state in get_states().items():
+                self.benchmark(name, state, number)
+            transaction.set_rollback(True)
+
+    def benchmark(self, name: str, state, number: int):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        for serializer_name, serializer in SERIALIZERS.items():
+            raw_state = serializer.serialize(state)
+            serialize_time = timeit.timeit(
+                lambda: serializer.serialize(state), number=number
+            )
+            deserialize_time = timeit.timeit(
+                lambda: serializer.deserialize(raw_state), number=number
+            )
+            self.stdout.write(
+                f"  {serializer_name:<8}"
+                f"{len(raw_state):>8} bytes"
+                f"{serialize_time / number * 1e6:>10.1f} us to serialize"
+                f"{deserialize_time / number * 1e6:>10.1f} us to deserialize"
+            )
+
+
+def get_states() -> dict:
+    # Component modules are imported by django-components under their own names.
+    clickcounter = get_component_module("clickcounter")
+    row = get_component_module("coffee/row")
+    table = get_component_module("coffee/table")
+    interactivelist = get_component_module("interactivelist")
+
+    bean = CoffeeBean.objects.first() or CoffeeBean.objects.create(
+        name="Kenyan AA",
+        origin="Kenya",
+        roast_level="Medium-Light",
+        flavor_notes="Berry, Wine",
+        stock_quantity=22,
+    )
+    return {
+        "clickcounter": clickcounter.ClickCounterState(value=42),
+        "coffee/table": table.TableState(search="Kenya"),
+        "coffee/row": row.RowState(bean=bean),
+        "coffee/row (editing)": row.RowState(
+            bean=bean, edit_mode=True, bean_form=row.BeanForm(instance=bean)
+        ),
+        "interactivelist": interactivelist.InteractivelistState(
+            items=[Item(id=str(i), text=f"Item {i}") for i in range(100)]
+        ),
+        "csv records (1000 rows)": CsvRecordsState(
+            file_name="beans.csv",
+            header=["name", "origin", "roast_level", "flavor_notes"],
+            records=[
+                [f"Bean {i}", "Kenya", "Medium-Light", "Berry, Wine"]
+                for i in range(1000)
+            ],
+        ),
+        "wide (1000 models)": WideState(
+            points=[DataPoint(label=f"Point {i}", value=i) for i in range(1000)]
+        ),
+        "wide, validated": ValidatedWideState(
+            points=[
+                ValidatedDataPoint(label=f"Point {i}", value=i) for i in range(1000)
+            ]
+        ),
+        "deep (1023 models)": build_tree(TreeNode, 9),
+        "deep, validated": build_tree(ValidatedTreeNode, 9),
+    }
+
+
+def get_component_module(component_name: str):
+    return sys.modules[registry.get(component_name).__module__]
@@ -42,6 +42,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
+    "livecomponents.middleware.UnitOfWorkMiddleware",
 ]
 
 ROOT_URLCONF = "project.urls"
@@ -155,6 +156,12 @@ LIVECOMPONENTS = {
             "redis_url": env("REDIS_URL"),
         },
     },
+    # Blobs, like files, uploaded to the csvviewer component, are kept in the
+    # system temporary directory.
+    "blob_store": {
+        "cls": "livecomponents.manager.blob_stores.FileSystemBlobStore",
+        "config": {},
+    },
     "state_manager": {
         "cls": "livecomponents.manager.manager.StateManager",
         "config": {},
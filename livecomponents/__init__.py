@@ -4,6 +4,7 @@ from livecomponents.component import (
     StatelessLiveComponent,
     command,
 )
+from livecomponents.manager.blobs import Blob
 from livecomponents.manager.manager import (
     CallContext,
     InitStateContext,
@@ -13,6 +14,7 @@ from livecomponents.utils import LiveComponentsModel
 
 __all__ = [
     "command",
+    "Blob",
     "CallContext",
     "InitStateContext",
     "UpdateStateContext",
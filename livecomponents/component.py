@@ -7,21 +7,33 @@ from django.http import HttpRequest
 from django_components import component
 from django_components.component import SimplifiedInterfaceMediaDefiningClass
 
-from livecomponents.const import DEFAULT_OWN_ID
+from livecomponents.const import DEFAULT_OWN_ID, READONLY_COMMAND_MARKER
 from livecomponents.manager import StateManager, get_state_manager
 from livecomponents.manager.manager import InitStateContext, UpdateStateContext
 from livecomponents.types import State, StateAddress
-from livecomponents.utils import LiveComponentsModel, find_component_id
+from livecomponents.utils import LiveComponentsModel, call_sync, find_component_id
 
 DEFAULT_PARENT_ID = ""
 
 COMMAND_MARKER = "__livecomponents_command__"
 
 
-def command(func):
-    """A decorator to mark the method as a command."""
-    setattr(func, COMMAND_MARKER, True)
-    return func
+def command(func=None, *, readonly: bool = False):
+    """A decorator to mark the method as a command.
+
+    Use `@command(readonly=True)` for commands that don't modify the component
+    state. Their state is not serialized and saved after the command.
+    """
+
+    def decorator(func):
+        setattr(func, COMMAND_MARKER, True)
+        if readonly:
+            setattr(func, READONLY_COMMAND_MARKER, True)
+        return func
+
+    if func is None:
+        return decorator
+    return decorator(func)
 
 
 class LiveComponentMeta(abc.ABCMeta, SimplifiedInterfaceMediaDefiningClass):
@@ -47,6 +59,12 @@ class LiveComponent(component.Component, Generic[State], metaclass=LiveComponent
         """Get the state of this component."""
         return state_manager.get_component_state(state_addr)
 
+    async def aget_state(
+        self, state_manager: StateManager, state_addr: StateAddress
+    ) -> State | None:
+        """Async version of get_state()."""
+        return await state_manager.aget_component_state(state_addr)
+
     def get_or_create_state(
         self,
         state_manager: StateManager,
@@ -100,7 +118,7 @@ class LiveComponent(component.Component, Generic[State], metaclass=LiveComponent
             state_addr=state_addr,
             component_kwargs=component_kwargs,
         )
-        extra_context = self.get_extra_context_data(extra_context_request)
+        extra_context = call_sync(self.get_extra_context_data, extra_context_request)
         context = {
             **component_kwargs,
             **state.model_dump(),
@@ -136,6 +154,9 @@ class LiveComponent(component.Component, Generic[State], metaclass=LiveComponent
             will be `{"foo": "bar"}`. Remember that when the component is
             re-rendered as a result of the command execution, no component
             kwargs are passed.
+
+        The method can also be defined with `async def`, like init_state(),
+        update_state() and commands.
         """
         return {}
 
@@ -192,6 +213,11 @@ class StatelessLiveComponent(LiveComponent[StatelessModel]):
     ) -> StatelessModel | None:
         return StatelessModel()
 
+    async def aget_state(
+        self, state_manager: StateManager, state_addr: StateAddress
+    ) -> StatelessModel | None:
+        return StatelessModel()
+
     def get_or_create_state(
         self,
         state_manager: StateManager,
@@ -9,3 +9,11 @@
 HIER_SEP = "|"
 TYPE_SEP = ":"
 DEFAULT_OWN_ID = "0"
+
+# Commands can carry a per-component sequence number in this header. Commands,
+# superseded by a newer one, are answered with a 204 response and this header.
+COMMAND_SEQ_HEADER = "X-Livecomponents-Seq"
+SUPERSEDED_HEADER = "X-Livecomponents-Superseded"
+
+# Set by @command(readonly=True) on commands that don't modify the component state.
+READONLY_COMMAND_MARKER = "__livecomponents_readonly_command__"
@@ -1,5 +1,7 @@
+import inspect
 from functools import wraps
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import PermissionDenied
 
 from livecomponents.manager.manager import CallContext, InitStateContext
@@ -28,6 +30,16 @@ def livecomponents_login_required(method):
 
 
 def _init_state_login_required(method):
+    if inspect.iscoroutinefunction(method):
+
+        @wraps(method)
+        async def async_wrapped(cls, context: InitStateContext, **component_kwargs):
+            if not await _is_authenticated(context.request):
+                raise PermissionDenied()
+            return await method(cls, context, **component_kwargs)
+
+        return async_wrapped
+
     @wraps(method)
     def wrapped(cls, context: InitStateContext, **component_kwargs):
         if not context.request.user.is_authenticated:
@@ -38,6 +50,16 @@ def _init_state_login_required(method):
 
 
 def _call_method_login_required(method):
+    if inspect.iscoroutinefunction(method):
+
+        @wraps(method)
+        async def async_wrapped(cls, call_context: CallContext, **kwargs):
+            if not await _is_authenticated(call_context.request):
+                raise PermissionDenied()
+            return await method(cls, call_context, **kwargs)
+
+        return async_wrapped
+
     @wraps(method)
     def wrapped(cls, call_context: CallContext, **kwargs):
         if not call_context.request.user.is_authenticated:
@@ -45,3 +67,11 @@ def _call_method_login_required(method):
         return method(cls, call_context, **kwargs)
 
     return wrapped
+
+
+async def _is_authenticated(request) -> bool:
+    # request.user is lazy, and loading it hits the database.
+    if hasattr(request, "auser"):
+        user = await request.auser()
+        return user.is_authenticated
+    return await sync_to_async(lambda: request.user.is_authenticated)()
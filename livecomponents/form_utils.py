@@ -1,10 +1,63 @@
-from typing import TypeVar
+import functools
+from typing import Any, TypeVar, cast
 
 from django.forms import BaseForm
 
 TBaseForm = TypeVar("TBaseForm", bound=BaseForm)
 
 
+class LazyCleanedDataMixin:
+    """Form mixin that validates the form when cleaned_data is first accessed.
+
+    Django forms are validated when errors or is_valid() are first accessed, but
+    cleaned_data is missing until then. With this mixin, accessing it validates
+    the form too, so that forms, restored from the state, don't need to be
+    validated in advance.
+    """
+
+    @property
+    def cleaned_data(self: BaseForm) -> dict[str, Any]:
+        if "cleaned_data" not in self.__dict__ and self._errors is None:
+            # Unbound forms have no cleaned data, even after this.
+            self.full_clean()
+        try:
+            return self.__dict__["cleaned_data"]
+        except KeyError:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute 'cleaned_data'"
+            )
+
+    @cleaned_data.setter
+    def cleaned_data(self: BaseForm, value: dict[str, Any]):
+        self.__dict__["cleaned_data"] = value
+
+    @cleaned_data.deleter
+    def cleaned_data(self: BaseForm):
+        del self.__dict__["cleaned_data"]
+
+
+@functools.cache
+def get_lazy_form_class(form_class: type[TBaseForm]) -> type[TBaseForm]:
+    """Return the subclass of the form class with LazyCleanedDataMixin."""
+    if issubclass(form_class, LazyCleanedDataMixin):
+        return cast(type[TBaseForm], form_class)
+    return type(
+        form_class.__name__,
+        (LazyCleanedDataMixin, form_class),
+        {"__module__": form_class.__module__, "form_class": form_class},
+    )
+
+
+def get_form_class(form: BaseForm) -> type[BaseForm]:
+    """Return the class of the form, as defined by the app.
+
+    For forms, created with get_lazy_form_class(), return their original class.
+    """
+    if isinstance(form, LazyCleanedDataMixin):
+        return form.form_class  # type: ignore[attr-defined]
+    return form.__class__
+
+
 def populate_form_with_data(form: TBaseForm, data: dict) -> TBaseForm:
     """Create a form copy, populated with the given data.
 
@@ -14,7 +67,8 @@ def populate_form_with_data(form: TBaseForm, data: dict) -> TBaseForm:
     False, and form errors are outdated).
 
     Works well with regular form without extra __init__ arguments and with model
-    forms.
+    forms. The form is validated when errors, cleaned_data or is_valid() are first
+    accessed.
 
     Example:
 
@@ -43,4 +97,6 @@ def populate_form_with_data(form: TBaseForm, data: dict) -> TBaseForm:
     }
     if hasattr(form, "instance"):
         constructor_kwargs["instance"] = form.instance
-    return form.__class__(**constructor_kwargs)
+    form_class = get_form_class(form)
+    # mypy doesn't see classes of untyped bases as hashable.
+    return get_lazy_form_class(form_class)(**constructor_kwargs)  # type: ignore
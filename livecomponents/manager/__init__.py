@@ -7,8 +7,20 @@ from livecomponents.settings import get_config
 @cache
 def get_state_manager() -> StateManager:
     config = get_config()
+    kwargs = {}
+    if config.async_state_store is not None:
+        kwargs["async_store"] = config.async_state_store.get_instance()
+    if config.state_codec is not None:
+        kwargs["codec"] = config.state_codec.get_instance()
+    if config.blob_store is not None:
+        kwargs["blob_store"] = config.blob_store.get_instance()
+    if config.lazy_states:
+        kwargs["lazy_states"] = True
+    if config.partial_states:
+        kwargs["partial_states"] = True
     state_manager = config.state_manager.get_instance(
         serializer=config.state_serializer.get_instance(),
         store=config.state_store.get_instance(),
+        **kwargs,
     )
     return state_manager
@@ -0,0 +1,489 @@
+import abc
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from typing import Any, TypeVar
+from weakref import WeakKeyDictionary
+
+from asgiref.sync import sync_to_async
+from redis.asyncio import Redis
+
+from livecomponents.manager.stores import (
+    BaseRedisStateStore,
+    DeserializeMany,
+    IStateStore,
+    get_state_version,
+)
+from livecomponents.types import StateAddress
+
+T = TypeVar("T")
+
+
+class IAsyncStateStore(abc.ABC):
+    """Async counterpart of IStateStore.
+
+    Methods have the same names and semantics as the ones of IStateStore.
+    """
+
+    @abc.abstractmethod
+    async def session_exists(self, session_id: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def component_initialized(self, state_addr: StateAddress) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def save_state(self, state_addr: StateAddress, raw_state: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def restore_state(self, state_addr: StateAddress) -> bytes | None:
+        ...
+
+    @abc.abstractmethod
+    async def save_context(self, state_addr: StateAddress, raw_context: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def restore_context(self, state_addr: StateAddress) -> bytes | None:
+        ...
+
+    @abc.abstractmethod
+    async def save_template(self, template_hash: str, html_bytes: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def restore_template(self, template_hash: str) -> bytes | None:
+        ...
+
+    @abc.abstractmethod
+    async def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
+    ) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def restore_component_template_hash(
+        self, state_addr: StateAddress
+    ) -> str | None:
+        ...
+
+    @abc.abstractmethod
+    async def clear_session(self, session_id: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def clear_all_sessions(self) -> None:
+        ...
+
+    # Bulk operations. The default implementations fall back to single-address
+    # methods. Restore methods omit missing addresses from the result.
+
+    async def save_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        for state_addr, raw_state in raw_states.items():
+            await self.save_state(state_addr, raw_state)
+
+    async def restore_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return await _arestore_each(self.restore_state, state_addrs)
+
+    async def save_contexts(self, raw_contexts: Mapping[StateAddress, bytes]) -> None:
+        for state_addr, raw_context in raw_contexts.items():
+            await self.save_context(state_addr, raw_context)
+
+    async def restore_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return await _arestore_each(self.restore_context, state_addrs)
+
+    async def save_component_template_hashes(
+        self, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        for state_addr, template_hash in template_hashes.items():
+            await self.save_component_template_hash(state_addr, template_hash)
+
+    async def restore_component_template_hashes(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        return await _arestore_each(self.restore_component_template_hash, state_addrs)
+
+    async def save_batch(
+        self,
+        raw_states: Mapping[StateAddress, bytes],
+        raw_contexts: Mapping[StateAddress, bytes],
+        template_hashes: Mapping[StateAddress, str],
+    ) -> None:
+        await self.save_states(raw_states)
+        await self.save_contexts(raw_contexts)
+        await self.save_component_template_hashes(template_hashes)
+
+    async def restore_versioned_states(
+        self,
+        state_addrs: Iterable[StateAddress],
+        deserialize_many: DeserializeMany,
+    ) -> dict[StateAddress, tuple[Any, bytes]]:
+        """Restore deserialized states with their versions.
+
+        Deserializers may query the database and load blobs, so deserialize_many()
+        is executed in a thread.
+        """
+        raw_states = await self.restore_states(state_addrs)
+        states = await sync_to_async(deserialize_many)(raw_states)
+        return {
+            state_addr: (states[state_addr], get_state_version(raw_state))
+            for state_addr, raw_state in raw_states.items()
+        }
+
+    async def remember_versioned_states(
+        self, versioned_states: Mapping[StateAddress, tuple[Any, bytes]]
+    ) -> None:
+        """Called after the states have been saved, or found unchanged."""
+        pass
+
+    async def remember_raw_states(
+        self, raw_states: Mapping[StateAddress, bytes]
+    ) -> None:
+        pass
+
+    async def touch_states(self, state_addrs: Iterable[StateAddress]) -> None:
+        pass
+
+    async def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        raise NotImplementedError(f"{type(self).__name__} doesn't support blobs")
+
+    async def restore_blob(self, blob_hash: str) -> bytes | None:
+        raise NotImplementedError(f"{type(self).__name__} doesn't support blobs")
+
+    async def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        return True
+
+    async def restore_command_seq(self, state_addr: StateAddress) -> int | None:
+        return None
+
+
+class SyncToAsyncStateStore(IAsyncStateStore):
+    """Async adapter for a synchronous state store.
+
+    Every call is executed in a thread with sync_to_async(). It's used by
+    StateManager when no async store is configured.
+    """
+
+    def __init__(self, store: IStateStore):
+        self.store = store
+
+    async def session_exists(self, session_id: str) -> bool:
+        return await sync_to_async(self.store.session_exists)(session_id)
+
+    async def component_initialized(self, state_addr: StateAddress) -> bool:
+        return await sync_to_async(self.store.component_initialized)(state_addr)
+
+    async def save_state(self, state_addr: StateAddress, raw_state: bytes) -> None:
+        await sync_to_async(self.store.save_state)(state_addr, raw_state)
+
+    async def restore_state(self, state_addr: StateAddress) -> bytes | None:
+        return await sync_to_async(self.store.restore_state)(state_addr)
+
+    async def save_context(self, state_addr: StateAddress, raw_context: bytes) -> None:
+        await sync_to_async(self.store.save_context)(state_addr, raw_context)
+
+    async def restore_context(self, state_addr: StateAddress) -> bytes | None:
+        return await sync_to_async(self.store.restore_context)(state_addr)
+
+    async def save_template(self, template_hash: str, html_bytes: bytes) -> None:
+        await sync_to_async(self.store.save_template)(template_hash, html_bytes)
+
+    async def restore_template(self, template_hash: str) -> bytes | None:
+        return await sync_to_async(self.store.restore_template)(template_hash)
+
+    async def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
+    ) -> None:
+        await sync_to_async(self.store.save_component_template_hash)(
+            state_addr, template_hash
+        )
+
+    async def restore_component_template_hash(
+        self, state_addr: StateAddress
+    ) -> str | None:
+        return await sync_to_async(self.store.restore_component_template_hash)(
+            state_addr
+        )
+
+    async def clear_session(self, session_id: str) -> None:
+        await sync_to_async(self.store.clear_session)(session_id)
+
+    async def clear_all_sessions(self) -> None:
+        await sync_to_async(self.store.clear_all_sessions)()
+
+    async def save_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        await sync_to_async(self.store.save_states)(raw_states)
+
+    async def restore_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return await sync_to_async(self.store.restore_states)(list(state_addrs))
+
+    async def save_contexts(self, raw_contexts: Mapping[StateAddress, bytes]) -> None:
+        await sync_to_async(self.store.save_contexts)(raw_contexts)
+
+    async def restore_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return await sync_to_async(self.store.restore_contexts)(list(state_addrs))
+
+    async def save_component_template_hashes(
+        self, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        await sync_to_async(self.store.save_component_template_hashes)(template_hashes)
+
+    async def restore_component_template_hashes(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        return await sync_to_async(self.store.restore_component_template_hashes)(
+            list(state_addrs)
+        )
+
+    async def save_batch(
+        self,
+        raw_states: Mapping[StateAddress, bytes],
+        raw_contexts: Mapping[StateAddress, bytes],
+        template_hashes: Mapping[StateAddress, str],
+    ) -> None:
+        await sync_to_async(self.store.save_batch)(
+            raw_states, raw_contexts, template_hashes
+        )
+
+    async def touch_states(self, state_addrs: Iterable[StateAddress]) -> None:
+        await sync_to_async(self.store.touch_states)(list(state_addrs))
+
+    async def restore_versioned_states(
+        self,
+        state_addrs: Iterable[StateAddress],
+        deserialize_many: DeserializeMany,
+    ) -> dict[StateAddress, tuple[Any, bytes]]:
+        return await sync_to_async(self.store.restore_versioned_states)(
+            list(state_addrs), deserialize_many
+        )
+
+    async def remember_versioned_states(
+        self, versioned_states: Mapping[StateAddress, tuple[Any, bytes]]
+    ) -> None:
+        await sync_to_async(self.store.remember_versioned_states)(versioned_states)
+
+    async def remember_raw_states(
+        self, raw_states: Mapping[StateAddress, bytes]
+    ) -> None:
+        await sync_to_async(self.store.remember_raw_states)(raw_states)
+
+    async def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        await sync_to_async(self.store.save_blobs)(raw_values)
+
+    async def restore_blob(self, blob_hash: str) -> bytes | None:
+        return await sync_to_async(self.store.restore_blob)(blob_hash)
+
+    async def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        return await sync_to_async(self.store.register_command_seq)(state_addr, seq)
+
+    async def restore_command_seq(self, state_addr: StateAddress) -> int | None:
+        return await sync_to_async(self.store.restore_command_seq)(state_addr)
+
+
+class AsyncRedisStateStore(BaseRedisStateStore, IAsyncStateStore):
+    """Redis-based async state store, built on redis.asyncio.
+
+    It uses the same keys as RedisStateStore, so both can be used side by side
+    with the same arguments. See BaseRedisStateStore for their description.
+
+    Connections are pooled and shared by all coroutines of the event loop.
+    A pool can't be shared by several event loops, so every loop gets its own.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._clients: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Redis
+        ] = WeakKeyDictionary()
+
+    @property
+    def client(self) -> Redis:
+        """Return the client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = Redis.from_url(self.redis_url)  # type: ignore
+            self._clients[loop] = client
+        return client
+
+    async def session_exists(self, session_id: str) -> bool:
+        key_name = self._get_key_name(self.key_prefix, session_id)
+        return bool(await self.client.exists(key_name))
+
+    async def component_initialized(self, state_addr: StateAddress) -> bool:
+        key_name = self._get_key_name(self.key_prefix, state_addr.session_id)
+        return bool(await self.client.hexists(key_name, state_addr.component_id))
+
+    async def save_state(self, state_addr: StateAddress, raw_state: bytes) -> None:
+        await self.save_states({state_addr: raw_state})
+
+    async def restore_state(self, state_addr: StateAddress) -> bytes | None:
+        return await self._restore_by_prefix(state_addr, self.key_prefix)
+
+    async def save_context(self, state_addr: StateAddress, raw_context: bytes) -> None:
+        await self._save_by_prefix(state_addr, self.context_prefix, raw_context)
+
+    async def restore_context(self, state_addr: StateAddress) -> bytes | None:
+        return await self._restore_by_prefix(state_addr, self.context_prefix)
+
+    async def save_template(self, template_hash: str, html_bytes: bytes) -> None:
+        cache_key = self._get_key_name(self.template_cache_prefix, template_hash)
+        await self.client.set(cache_key, html_bytes, ex=self.template_ttl)
+
+    async def restore_template(self, template_hash: str) -> bytes | None:
+        cache_key = self._get_key_name(self.template_cache_prefix, template_hash)
+        if self.template_ttl is None:
+            return await self.client.get(cache_key)
+        return await self.client.getex(cache_key, ex=self.template_ttl)
+
+    async def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        if not raw_values:
+            return
+        async with self.client.pipeline() as pipe:
+            self._queue_save_blobs(pipe, raw_values)
+            await pipe.execute()
+
+    async def restore_blob(self, blob_hash: str) -> bytes | None:
+        key_name = self._get_key_name(self.blob_prefix, blob_hash)
+        return await self.client.getex(key_name, ex=self.blob_ttl)
+
+    async def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
+    ) -> None:
+        await self._save_by_prefix(
+            state_addr, self.templates_prefix, template_hash.encode("ascii")
+        )
+
+    async def restore_component_template_hash(
+        self, state_addr: StateAddress
+    ) -> str | None:
+        hashed_value = await self._restore_by_prefix(state_addr, self.templates_prefix)
+        if hashed_value is None:
+            return None
+        return hashed_value.decode("ascii")
+
+    async def save_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        if not raw_states:
+            return
+        async with self.client.pipeline() as pipe:
+            self._queue_save_states(pipe, raw_states)
+            await pipe.execute()
+
+    async def restore_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return await self._restore_many_by_prefix(state_addrs, self.key_prefix)
+
+    async def touch_states(self, state_addrs: Iterable[StateAddress]) -> None:
+        async with self.client.pipeline() as pipe:
+            if self._queue_touch_states(pipe, state_addrs):
+                await pipe.execute()
+
+    async def save_contexts(self, raw_contexts: Mapping[StateAddress, bytes]) -> None:
+        if not raw_contexts:
+            return
+        async with self.client.pipeline() as pipe:
+            self._queue_save_many_by_prefix(pipe, raw_contexts, self.context_prefix)
+            await pipe.execute()
+
+    async def restore_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return await self._restore_many_by_prefix(state_addrs, self.context_prefix)
+
+    async def save_component_template_hashes(
+        self, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        if not template_hashes:
+            return
+        async with self.client.pipeline() as pipe:
+            self._queue_save_component_template_hashes(pipe, template_hashes)
+            await pipe.execute()
+
+    async def restore_component_template_hashes(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        hashed_values = await self._restore_many_by_prefix(
+            state_addrs, self.templates_prefix
+        )
+        return self._decode_template_hashes(hashed_values)
+
+    async def save_batch(
+        self,
+        raw_states: Mapping[StateAddress, bytes],
+        raw_contexts: Mapping[StateAddress, bytes],
+        template_hashes: Mapping[StateAddress, str],
+    ) -> None:
+        """Save states, contexts and component template hashes in one pipeline."""
+        if not (raw_states or raw_contexts or template_hashes):
+            return
+        async with self.client.pipeline() as pipe:
+            self._queue_save_batch(pipe, raw_states, raw_contexts, template_hashes)
+            await pipe.execute()
+
+    async def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        async with self.client.pipeline() as pipe:
+            self._queue_register_command_seq(pipe, state_addr, seq)
+            _, latest_seq, _ = await pipe.execute()
+        return latest_seq == seq
+
+    async def restore_command_seq(self, state_addr: StateAddress) -> int | None:
+        key_name = self._get_key_name(self.command_seq_prefix, state_addr.session_id)
+        latest_seq = await self.client.zscore(key_name, state_addr.component_id)
+        return None if latest_seq is None else int(latest_seq)
+
+    async def clear_session(self, session_id: str) -> None:
+        async with self.client.pipeline() as pipe:
+            self._queue_clear_session(pipe, session_id)
+            await pipe.execute()
+
+    async def clear_all_sessions(self) -> None:
+        await self.client.flushdb()
+
+    async def _save_by_prefix(
+        self, state_addr: StateAddress, prefix: str, raw_value: bytes
+    ) -> None:
+        async with self.client.pipeline() as pipe:
+            self._queue_save_by_prefix(pipe, state_addr, prefix, raw_value)
+            await pipe.execute()
+
+    async def _restore_by_prefix(
+        self, state_addr: StateAddress, prefix: str
+    ) -> bytes | None:
+        async with self.client.pipeline() as pipe:
+            self._queue_restore_by_prefix(pipe, state_addr, prefix)
+            raw_value, _ = await pipe.execute()
+        return raw_value
+
+    async def _restore_many_by_prefix(
+        self, state_addrs: Iterable[StateAddress], prefix: str
+    ) -> dict[StateAddress, bytes]:
+        async with self.client.pipeline() as pipe:
+            component_ids_by_session = self._queue_restore_many_by_prefix(
+                pipe, state_addrs, prefix
+            )
+            if not component_ids_by_session:
+                return {}
+            results = await pipe.execute()
+        return self._parse_restored_many(component_ids_by_session, results)
+
+
+async def _arestore_each(
+    restore: Callable[[StateAddress], Awaitable[T | None]],
+    state_addrs: Iterable[StateAddress],
+) -> dict[StateAddress, T]:
+    ret: dict[StateAddress, T] = {}
+    for state_addr in state_addrs:
+        raw_value = await restore(state_addr)
+        if raw_value is not None:
+            ret[state_addr] = raw_value
+    return ret
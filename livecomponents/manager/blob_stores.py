@@ -0,0 +1,159 @@
+import abc
+import datetime
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+
+from livecomponents.logging import logger
+from livecomponents.manager.async_stores import IAsyncStateStore
+from livecomponents.manager.codecs import Buffer
+from livecomponents.manager.stores import IStateStore
+
+# Stored blob values: bytes, or buffers like memory-mapped files
+BlobBuffer = Buffer
+
+
+class IBlobStore(abc.ABC):
+    """Store of blobs, large values of states, kept apart from them (see Blob).
+
+    Blobs are shared by all sessions, and addressed by the hash of their content.
+    They expire when they haven't been saved or restored with a state, or loaded,
+    for some time.
+    """
+
+    @abc.abstractmethod
+    def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        """Save blob values by their hashes, and reset their TTL.
+
+        Values, passed as None, have been saved before, and only their TTL is reset.
+        """
+        ...
+
+    @abc.abstractmethod
+    def restore_blob(self, blob_hash: str) -> BlobBuffer | None:
+        ...
+
+    async def asave_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        await sync_to_async(self.save_blobs)(raw_values)
+
+
+class StateStoreBlobStore(IBlobStore):
+    """Keeps blobs in the state store. Used when no blob store is configured."""
+
+    def __init__(self, store: IStateStore, async_store: IAsyncStateStore):
+        self.store = store
+        self.async_store = async_store
+
+    def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        self.store.save_blobs(raw_values)
+
+    def restore_blob(self, blob_hash: str) -> BlobBuffer | None:
+        return self.store.restore_blob(blob_hash)
+
+    async def asave_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        await self.async_store.save_blobs(raw_values)
+
+
+class FileSystemBlobStore(IBlobStore):
+    """Keeps blobs in files of a local directory, and memory-maps them on restore.
+
+    Every blob is written once. Saving it again, or restoring it, only updates
+    the modification time of its file, which counts as the last access. States
+    that refer to the blob save it again when they are saved or restored. Files
+    that haven't been accessed for the TTL are removed by collect_garbage(),
+    called by save_blobs() at most once per gc_interval.
+
+    Blobs of bytes are restored as read-only memoryviews of the mapped file,
+    without copying them into memory (see Blob). The directory must be shared
+    by all processes that serve the sessions.
+
+    Args:
+        root: Directory of blob files. Created if missing. By default, a
+            "livecomponents-blobs" directory in the system temporary directory.
+        ttl: Time-to-live for blobs. It should be at least as long as the session
+            TTL of the state store.
+        gc_interval: Minimum time between garbage collections, run by save_blobs().
+    """
+
+    def __init__(
+        self,
+        root: str | Path | None = None,
+        ttl: datetime.timedelta = datetime.timedelta(days=1),
+        gc_interval: datetime.timedelta = datetime.timedelta(hours=1),
+    ):
+        if root is None:
+            root = Path(tempfile.gettempdir()) / "livecomponents-blobs"
+        self.root = Path(root)
+        self.ttl = ttl
+        self.gc_interval = gc_interval
+        self._collected_at = time.time()
+        self._gc_lock = threading.Lock()
+
+    def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        for blob_hash, raw_value in raw_values.items():
+            path = self._get_path(blob_hash)
+            if self._touch(path) or raw_value is None:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so that readers never see a part
+            # of the blob.
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as tmp_file:
+                    tmp_file.write(raw_value)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        if time.time() - self._collected_at >= self.gc_interval.total_seconds():
+            self.collect_garbage()
+
+    def restore_blob(self, blob_hash: str) -> BlobBuffer | None:
+        path = self._get_path(blob_hash)
+        try:
+            with open(path, "rb") as file:
+                if not self._touch(path):
+                    return None
+                if os.fstat(file.fileno()).st_size == 0:
+                    # Empty files can't be mapped.
+                    return b""
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def collect_garbage(self) -> int:
+        """Remove blobs that haven't been accessed for the TTL. Return their number."""
+        with self._gc_lock:
+            self._collected_at = now = time.time()
+            expired_at = now - self.ttl.total_seconds()
+            removed = 0
+            for path in self.root.glob("*/*"):
+                try:
+                    if path.stat().st_mtime < expired_at:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            logger.debug("Removed %d expired blobs from %s", removed, self.root)
+        return removed
+
+    def _get_path(self, blob_hash: str) -> Path:
+        # Blobs are spread over subdirectories by the first two characters of
+        # their hashes, to keep directories small.
+        return self.root / blob_hash[:2] / blob_hash
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        """Update the modification time of the file. Return False if it's missing."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
@@ -0,0 +1,122 @@
+import hashlib
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Generic, TypeVar
+
+from pydantic import GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+T = TypeVar("T")
+
+_NOT_LOADED: Any = object()
+
+
+class BlobNotFound(LookupError):
+    pass
+
+
+class Blob(Generic[T]):
+    """Large value of a state field, stored apart from the state.
+
+    When the state is serialized, the value is pickled and saved to the store
+    under the hash of its content, so that states of all sessions share one copy
+    of equal values. The state keeps only the hash, and the value is loaded from
+    the store on the first access to `value`.
+
+    Values are treated as immutable. Once a blob has been saved, changes of its
+    value in place are not saved. Assign a new blob instead.
+
+    Fields of type Blob[T] of Pydantic models accept plain values, and wrap them
+    in a blob. Values of blobs are not validated.
+    """
+
+    def __init__(self, value: T):
+        self._value: Any = value
+        # Set when the blob is saved or restored
+        self.blob_hash: str | None = None
+        self._load: Callable[[str], Any] | None = None
+
+    @classmethod
+    def restore(cls, blob_hash: str, load: Callable[[str], Any]) -> "Blob":
+        """Return a blob, stored under the hash, loaded with the function."""
+        blob = cls.__new__(cls)
+        blob._value = _NOT_LOADED
+        blob.blob_hash = blob_hash
+        blob._load = load
+        return blob
+
+    @property
+    def value(self) -> T:
+        if self._value is _NOT_LOADED:
+            self._value = self._load(self.blob_hash)  # type: ignore
+        return self._value
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._value is not _NOT_LOADED
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Blob):
+            return NotImplemented
+        if self.blob_hash is not None and self.blob_hash == other.blob_hash:
+            return True
+        return self.value == other.value
+
+    def __repr__(self) -> str:
+        if self.is_loaded:
+            return f"Blob({self._value!r})"
+        return f"Blob(<not loaded: {self.blob_hash}>)"
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            lambda value: value if isinstance(value, Blob) else cls(value)
+        )
+
+
+def get_blob_hash(raw_value: bytes) -> str:
+    """Return the content hash, used to address the pickled value of a blob."""
+    return hashlib.blake2b(raw_value, digest_size=16).hexdigest()
+
+
+# Blobs, serialized in the current context. Pickled values of new blobs by their
+# hashes, and None for blobs that have been saved before.
+_blob_buffer: ContextVar[dict[str, bytes | None] | None] = ContextVar(
+    "livecomponents_blob_buffer", default=None
+)
+
+# Loads blob values by their hashes in the current context.
+_blob_loader: ContextVar[Callable[[str], Any] | None] = ContextVar(
+    "livecomponents_blob_loader", default=None
+)
+
+
+@contextmanager
+def collect_blobs() -> Iterator[dict[str, bytes | None]]:
+    """Collect blobs, serialized within the block, to save them to the store."""
+    token = _blob_buffer.set({})
+    try:
+        yield _blob_buffer.get()  # type: ignore
+    finally:
+        _blob_buffer.reset(token)
+
+
+def get_blob_buffer() -> dict[str, bytes | None] | None:
+    return _blob_buffer.get()
+
+
+@contextmanager
+def use_blob_loader(load: Callable[[str], Any]) -> Iterator[None]:
+    """Make blobs, restored within the block, load their values with the function."""
+    token = _blob_loader.set(load)
+    try:
+        yield
+    finally:
+        _blob_loader.reset(token)
+
+
+def get_blob_loader() -> Callable[[str], Any] | None:
+    return _blob_loader.get()
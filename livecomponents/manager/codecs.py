@@ -0,0 +1,235 @@
+import abc
+import lzma
+import mmap
+import threading
+import time
+import zlib
+from typing import ClassVar, NamedTuple, overload
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+class ICompressor(abc.ABC):
+    """Compression algorithm, used by StateCodec.
+
+    Every compressor has a unique tag byte, written in front of the values it has
+    compressed. Tags are chosen among bytes that never start a pickle, or a UTF-8
+    encoded text, so that values, stored without compression, can be told apart.
+    """
+
+    name: ClassVar[str]
+    tag: ClassVar[bytes]
+
+    @abc.abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    @abc.abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        ...
+
+
+class ZlibCompressor(ICompressor):
+    name = "zlib"
+    tag = b"\xf6"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LzmaCompressor(ICompressor):
+    name = "lzma"
+    tag = b"\xf7"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return lzma.compress(data, format=lzma.FORMAT_XZ, preset=self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lzma.decompress(data, format=lzma.FORMAT_XZ)
+
+
+class ZstdCompressor(ICompressor):
+    """Zstandard compression.
+
+    Requires Python 3.14, or the "zstandard" package.
+    """
+
+    name = "zstd"
+    tag = b"\xf8"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        try:
+            from compression import zstd  # type: ignore
+
+            self._compress = lambda data: zstd.compress(data, level=level)
+            self._decompress = zstd.decompress
+        except ImportError:
+            try:
+                import zstandard
+            except ImportError:
+                raise ImproperlyConfigured(
+                    "The zstd compressor requires Python 3.14 or the zstandard "
+                    "package. Install it with `pip install zstandard`."
+                )
+            self._compress = zstandard.ZstdCompressor(level=level).compress
+            self._decompress = zstandard.ZstdDecompressor().decompress
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompress(data)
+
+
+COMPRESSORS: dict[str, type[ICompressor]] = {
+    ZlibCompressor.name: ZlibCompressor,
+    LzmaCompressor.name: LzmaCompressor,
+    ZstdCompressor.name: ZstdCompressor,
+}
+
+# Stored values: bytes, or buffers like memory-mapped blob files
+Buffer = bytes | memoryview | mmap.mmap
+
+# Written in front of uncompressed values that start with a tag byte.
+RAW_TAG = b"\xf5"
+RAW = "raw"
+
+
+class CodecStats(NamedTuple):
+    """Counters of values, encoded and decoded with one compressor (or "raw")."""
+
+    encoded: int
+    decoded: int
+    # Total size of values before compression, and after it
+    input_bytes: int
+    output_bytes: int
+    encode_seconds: float
+    decode_seconds: float
+
+
+_EMPTY_STATS = CodecStats(0, 0, 0, 0, 0.0, 0.0)
+
+
+class StateCodec:
+    """Compresses states, contexts and templates before they are stored.
+
+    Values, smaller than min_size, or the ones that don't get smaller when
+    compressed, are stored as is. Compressed values start with the tag byte of
+    their compressor, so that values, written with different compressors (or
+    without one), can be read.
+
+    Args:
+        compressor: Name of the compressor ("zlib", "lzma" or "zstd"). If None,
+            values are not compressed, but compressed values are still read.
+        level: Compression level. If None, the default level of the compressor
+            is used.
+        min_size: Values smaller than this number of bytes are not compressed.
+    """
+
+    def __init__(
+        self,
+        compressor: str | None = None,
+        level: int | None = None,
+        min_size: int = 1024,
+    ):
+        self.compressor: ICompressor | None = None
+        if compressor is not None:
+            if compressor not in COMPRESSORS:
+                raise ImproperlyConfigured(f"Unknown compressor: {compressor}")
+            kwargs = {} if level is None else {"level": level}
+            self.compressor = COMPRESSORS[compressor](**kwargs)
+        self.min_size = min_size
+        self._decompressors: dict[bytes, ICompressor] = {}
+        self._stats: dict[str, CodecStats] = {}
+        self._lock = threading.Lock()
+
+    def encode(self, data: bytes) -> bytes:
+        elapsed = 0.0
+        if self.compressor is not None and len(data) >= self.min_size:
+            started_at = time.perf_counter()
+            compressed = self.compressor.compress(data)
+            elapsed = time.perf_counter() - started_at
+            if len(compressed) + 1 < len(data):
+                encoded = self.compressor.tag + compressed
+                self._count_encoded(self.compressor.name, data, encoded, elapsed)
+                return encoded
+        # Time, spent on compression that didn't pay off, is counted as "raw".
+        encoded = RAW_TAG + data if data[:1] in _TAGS else data
+        self._count_encoded(RAW, data, encoded, elapsed)
+        return encoded
+
+    @overload
+    def decode(self, data: bytes) -> bytes:
+        ...
+
+    @overload
+    def decode(self, data: Buffer) -> Buffer:
+        ...
+
+    def decode(self, data: Buffer) -> Buffer:
+        """Decode a stored value.
+
+        Buffers, like memory-mapped blob files, are returned without copying them
+        if they aren't compressed.
+        """
+        tag = data[:1]
+        if tag not in _TAGS:
+            return data
+        if tag == RAW_TAG:
+            return data[1:]
+        compressor = self._get_decompressor(tag)
+        started_at = time.perf_counter()
+        decoded = compressor.decompress(bytes(data[1:]))
+        elapsed = time.perf_counter() - started_at
+        with self._lock:
+            stats = self._stats.get(compressor.name, _EMPTY_STATS)
+            self._stats[compressor.name] = stats._replace(
+                decoded=stats.decoded + 1,
+                decode_seconds=stats.decode_seconds + elapsed,
+            )
+        return decoded
+
+    def get_stats(self) -> dict[str, CodecStats]:
+        """Return counters per compressor name.
+
+        Decoding of uncompressed values is not counted.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _get_decompressor(self, tag: bytes) -> ICompressor:
+        if self.compressor is not None and self.compressor.tag == tag:
+            return self.compressor
+        decompressor = self._decompressors.get(tag)
+        if decompressor is None:
+            decompressor = _COMPRESSORS_BY_TAG[tag]()
+            self._decompressors[tag] = decompressor
+        return decompressor
+
+    def _count_encoded(
+        self, name: str, data: bytes, encoded: bytes, elapsed: float
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(name, _EMPTY_STATS)
+            self._stats[name] = stats._replace(
+                encoded=stats.encoded + 1,
+                input_bytes=stats.input_bytes + len(data),
+                output_bytes=stats.output_bytes + len(encoded),
+                encode_seconds=stats.encode_seconds + elapsed,
+            )
+
+
+_COMPRESSORS_BY_TAG: dict[bytes, type[ICompressor]] = {
+    compressor_cls.tag: compressor_cls for compressor_cls in COMPRESSORS.values()
+}
+_TAGS = {RAW_TAG, *_COMPRESSORS_BY_TAG}
@@ -0,0 +1,41 @@
+from collections.abc import Callable
+from typing import Any
+
+from django.utils.functional import SimpleLazyObject, empty
+
+
+class LazyState(SimpleLazyObject):
+    """Proxy of a stored state that is deserialized on first access.
+
+    The proxy keeps the raw state it was restored from. If it has never been
+    accessed, the raw state is written back as is, without serializing it.
+
+    Only attribute access, and other operations on the proxy, trigger
+    deserialization. Use helper functions below to inspect the proxy itself.
+    """
+
+    def __init__(self, raw_state: bytes, deserialize: Callable[[bytes], Any]):
+        # Assigned to __dict__, since other attributes are set on the wrapped state.
+        self.__dict__["_raw_state"] = raw_state
+        super().__init__(lambda: deserialize(raw_state))
+
+
+def is_lazy_state_loaded(state: Any) -> bool:
+    """Return False if the state is a LazyState that hasn't been deserialized yet."""
+    return not isinstance(state, LazyState) or state._wrapped is not empty
+
+
+def get_unloaded_raw_state(state: Any) -> bytes | None:
+    """Return the raw state of a LazyState that hasn't been deserialized yet."""
+    if is_lazy_state_loaded(state):
+        return None
+    return state.__dict__["_raw_state"]
+
+
+def unwrap_state(state: Any) -> Any:
+    """Return the state, wrapped by a LazyState, deserializing it if needed."""
+    if isinstance(state, LazyState):
+        if state._wrapped is empty:
+            state._setup()
+        return state._wrapped
+    return state
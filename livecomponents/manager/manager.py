@@ -1,21 +1,57 @@
-from collections.abc import Callable
-from typing import TYPE_CHECKING, Any, Generic
+import datetime
+import time
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Mapping
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
 
+from asgiref.sync import sync_to_async
 from django.http import HttpRequest
 from django.template import Context
 from django_components.component_registry import registry
 from pydantic import Field
 
+from livecomponents.const import READONLY_COMMAND_MARKER
 from livecomponents.logging import logger
+from livecomponents.manager.async_stores import IAsyncStateStore, SyncToAsyncStateStore
+from livecomponents.manager.blob_stores import IBlobStore, StateStoreBlobStore
+from livecomponents.manager.blobs import (
+    BlobNotFound,
+    collect_blobs,
+    get_blob_buffer,
+    use_blob_loader,
+)
+from livecomponents.manager.codecs import StateCodec
 from livecomponents.manager.execution_results import ExecutionResults
-from livecomponents.manager.serializers import IStateSerializer
-from livecomponents.manager.stores import IStateStore
+from livecomponents.manager.lazy_state import (
+    LazyState,
+    get_unloaded_raw_state,
+    unwrap_state,
+)
+from livecomponents.manager.partial_states import (
+    StateHeader,
+    can_store_fields,
+    decode_state_header,
+    encode_state_header,
+    get_field_addresses,
+    is_state_header,
+)
+from livecomponents.manager.serializers import IStateSerializer, unpickle_blob_value
+from livecomponents.manager.stores import IStateStore, get_state_version
+from livecomponents.manager.template_registry import get_template_registry
+from livecomponents.manager.unit_of_work import (
+    UnitOfWork,
+    get_current_unit_of_work,
+    use_unit_of_work,
+)
 from livecomponents.types import State, StateAddress
-from livecomponents.utils import LiveComponentsModel
+from livecomponents.utils import LiveComponentsModel, call_async, call_sync
 
 if TYPE_CHECKING:
     from livecomponents.component import LiveComponent
 
+K = TypeVar("K")
+T = TypeVar("T")
+
 # Keys that are not serializable or don't need to be stored
 # when we store component's context.
 DEFAULT_CONTEXT_IGNORE_KEYS = {
@@ -66,6 +102,18 @@ class CallContext(LiveComponentsModel, Generic[State]):
 
         return call
 
+    async def acall(self, command_name: str, **kwargs):
+        """Call a command of the found component from an async command.
+
+        Async version of `call_context.find_one(...).command_name(**kwargs)`.
+        """
+        await self.state_manager.acall_with_context(
+            self,
+            component_id=self.component_id,
+            command_name=command_name,
+            kwargs=kwargs,
+        )
+
 
 class InitStateContext(LiveComponentsModel):
     request: HttpRequest
@@ -85,23 +133,459 @@ class UpdateStateContext(LiveComponentsModel, Generic[State]):
 
 
 class StateManager:
-    def __init__(self, serializer: IStateSerializer, store: IStateStore):
+    def __init__(
+        self,
+        serializer: IStateSerializer,
+        store: IStateStore,
+        async_store: IAsyncStateStore | None = None,
+        codec: StateCodec | None = None,
+        lazy_states: bool = False,
+        blob_store: IBlobStore | None = None,
+        partial_states: bool = False,
+        template_resave_interval: datetime.timedelta = datetime.timedelta(hours=1),
+    ):
         self.serializer = serializer
         self.store = store
+        # Compresses serialized states, contexts and templates. By default, values
+        # are stored uncompressed.
+        self.codec = codec or StateCodec()
+        # Used by async methods. Without a native async store, calls to the sync
+        # store are delegated to threads.
+        self.async_store = async_store or SyncToAsyncStateStore(store)
+        # If True, restored states are wrapped in LazyState proxies, and
+        # deserialized on first access.
+        self.lazy_states = lazy_states
+        # Blobs are kept in the state store, unless another store is configured.
+        self.blob_store = blob_store or StateStoreBlobStore(store, self.async_store)
+        # If True, fields of LiveComponentsModel states are stored separately, and
+        # only changed fields are saved.
+        self.partial_states = partial_states
+        # Templates, rendered by the process, are saved to the store again after
+        # this interval, in case they have expired or have been evicted.
+        self.template_resave_interval = template_resave_interval
+        # Times, when templates were saved to the store, by their hashes
+        self._saved_template_hashes: dict[str, float] = {}
+
+    def serialize(self, value: Any) -> bytes:
+        """Serialize and encode a state or a context for the store.
+
+        New blobs of the value are saved to the blob store. Within collect_blobs(),
+        they are collected instead, and the caller saves them.
+        """
+        if get_blob_buffer() is not None:
+            return self.codec.encode(self.serializer.serialize(value))
+        with collect_blobs() as raw_blobs:
+            raw_value = self.codec.encode(self.serializer.serialize(value))
+        self._save_blobs(raw_blobs)
+        return raw_value
+
+    def deserialize(self, raw_value: bytes) -> Any:
+        """Decode and deserialize a state or a context.
+
+        The TTL of blobs, restored with the value, is reset, whether their values
+        are loaded or not.
+        """
+        with collect_blobs() as raw_blobs, use_blob_loader(self._load_blob):
+            value = self.serializer.deserialize(self.codec.decode(raw_value))
+        self._save_blobs(raw_blobs)
+        return value
+
+    def deserialize_many(self, raw_values: Mapping[K, bytes]) -> dict[K, Any]:
+        """Decode and deserialize multiple states or contexts at once.
+
+        Serializers load Django models, referred to by all values, together. The
+        TTL of their blobs is reset at once.
+        """
+        with collect_blobs() as raw_blobs, use_blob_loader(self._load_blob):
+            values = self.serializer.deserialize_many(
+                {
+                    key: self.codec.decode(raw_value)
+                    for key, raw_value in raw_values.items()
+                }
+            )
+        self._save_blobs(raw_blobs)
+        return values
+
+    def _save_blobs(self, raw_blobs: Mapping[str, bytes | None]) -> None:
+        if raw_blobs:
+            self.blob_store.save_blobs(self._encode_blobs(raw_blobs))
+
+    async def _asave_blobs(self, raw_blobs: Mapping[str, bytes | None]) -> None:
+        if raw_blobs:
+            await self.blob_store.asave_blobs(self._encode_blobs(raw_blobs))
+
+    def _encode_blobs(
+        self, raw_blobs: Mapping[str, bytes | None]
+    ) -> dict[str, bytes | None]:
+        logger.debug("Saving %d blobs", len(raw_blobs))
+        return {
+            blob_hash: None if raw_value is None else self.codec.encode(raw_value)
+            for blob_hash, raw_value in raw_blobs.items()
+        }
+
+    def _load_blob(self, blob_hash: str) -> Any:
+        """Load the value of a blob, restored with a state."""
+        raw_value = self.blob_store.restore_blob(blob_hash)
+        if raw_value is None:
+            raise BlobNotFound(f"Blob {blob_hash} not found")
+        with use_blob_loader(self._load_blob):
+            return unpickle_blob_value(self.codec.decode(raw_value))
+
+    def _deserialize_state(self, raw_state: bytes) -> Any:
+        """Deserialize the state, or return its header if it's stored by fields."""
+        header = decode_state_header(raw_state)
+        if header is not None:
+            return header
+        if self.lazy_states:
+            return LazyState(raw_state, self.deserialize)
+        return self.deserialize(raw_state)
+
+    def _deserialize_states(
+        self, raw_states: Mapping[K, bytes], lazy: bool | None = None
+    ) -> dict[K, Any]:
+        """Deserialize the states, or return their headers if stored by fields.
+
+        By default, states are wrapped in LazyState proxies if lazy_states is set.
+        Async methods pass lazy=False: they deserialize states in a thread, and
+        a proxy would deserialize the state in the event loop on first access.
+        """
+        if lazy is None:
+            lazy = self.lazy_states
+        headers: dict[K, Any] = {}
+        for key, raw_state in raw_states.items():
+            header = decode_state_header(raw_state)
+            if header is not None:
+                headers[key] = header
+        if headers:
+            raw_states = {
+                key: raw_state
+                for key, raw_state in raw_states.items()
+                if key not in headers
+            }
+        if lazy:
+            states = {
+                key: LazyState(raw_state, self.deserialize)
+                for key, raw_state in raw_states.items()
+            }
+        else:
+            states = self.deserialize_many(raw_states)
+        states.update(headers)
+        return states
+
+    def _serialize_state(self, state: Any) -> bytes:
+        """Serialize the state.
+
+        A LazyState that has never been accessed can't have changed, and its raw
+        state is returned as is.
+        """
+        raw_state = get_unloaded_raw_state(state)
+        if raw_state is None:
+            raw_state = self.serialize(unwrap_state(state))
+        return raw_state
 
-    def save_component_template(self, state_addr: StateAddress, html: str):
-        self.store.save_component_template(state_addr, html.encode("utf-8"))
+    def _stores_fields(self, state: Any) -> bool:
+        return self.partial_states and can_store_fields(state)
+
+    def _serialize_state_fields(
+        self,
+        state_addr: StateAddress,
+        state: LiveComponentsModel,
+        loaded_version: bytes | None = None,
+        loaded_field_versions: Mapping[str, bytes] | None = None,
+    ) -> tuple[dict[StateAddress, bytes], bytes]:
+        """Serialize fields of the state as separate entries of the store.
+
+        The state itself is stored as a header, listing its class and fields.
+        If the state has been loaded with the same header (its version), only the
+        fields, changed since, are returned. Fields can be changed in place,
+        without assigning them, so if the versions of the loaded fields are known,
+        the other fields are serialized too, and returned if their versions
+        differ. Otherwise, the header and all fields are returned. Return the
+        entries and the version of the header.
+        """
+        state = unwrap_state(state)
+        raw_header = encode_state_header(type(state))  # type: ignore
+        version = get_state_version(raw_header)
+        assigned_fields = state.pop_changed_fields()
+        raw_states: dict[StateAddress, bytes] = {}
+        if version != loaded_version:
+            raw_states[state_addr] = raw_header
+            assigned_fields = frozenset(type(state).model_fields)
+            loaded_field_versions = None
+        field_addrs = get_field_addresses(state_addr, type(state).model_fields)
+        for field_name, field_addr in field_addrs.items():
+            if field_name in assigned_fields:
+                raw_states[field_addr] = self._serialize_state(
+                    getattr(state, field_name)
+                )
+            elif loaded_field_versions is not None:
+                raw_field = self._serialize_state(getattr(state, field_name))
+                if get_state_version(raw_field) != loaded_field_versions.get(
+                    field_name
+                ):
+                    raw_states[field_addr] = raw_field
+        return raw_states, version
+
+    def _build_states_from_headers(
+        self, headers: Mapping[StateAddress, StateHeader]
+    ) -> dict[StateAddress, LiveComponentsModel]:
+        """Fetch fields of states, stored by fields, and build the states."""
+        field_addrs = _get_field_addresses_of_states(headers)
+        raw_fields = self.store.restore_states(
+            field_addr
+            for addrs in field_addrs.values()
+            for field_addr in addrs.values()
+        )
+        return self._build_states_from_fields(headers, field_addrs, raw_fields)
+
+    async def _abuild_states_from_headers(
+        self, headers: Mapping[StateAddress, StateHeader]
+    ) -> dict[StateAddress, LiveComponentsModel]:
+        field_addrs = _get_field_addresses_of_states(headers)
+        raw_fields = await self.async_store.restore_states(
+            field_addr
+            for addrs in field_addrs.values()
+            for field_addr in addrs.values()
+        )
+        return await sync_to_async(self._build_states_from_fields)(
+            headers, field_addrs, raw_fields
+        )
+
+    def _build_states_from_fields(
+        self,
+        headers: Mapping[StateAddress, StateHeader],
+        field_addrs: Mapping[StateAddress, Mapping[str, StateAddress]],
+        raw_fields: Mapping[StateAddress, bytes],
+    ) -> dict[StateAddress, LiveComponentsModel]:
+        """Build states from their fields, deserialized together.
+
+        Stored fields, the model doesn't have anymore, are ignored, and missing
+        fields get their default values.
+        """
+        values = self.deserialize_many(raw_fields)
+        unit_of_work = get_current_unit_of_work()
+        states = {}
+        for state_addr, header in headers.items():
+            model_cls = header.get_model_class()
+            field_values = {
+                field_name: values[field_addr]
+                for field_name, field_addr in field_addrs[state_addr].items()
+                if field_name in model_cls.model_fields and field_addr in values
+            }
+            state = model_cls(**field_values)
+            state.pop_changed_fields()
+            states[state_addr] = state
+            if unit_of_work is not None:
+                # Compared with the fields when the unit of work is flushed.
+                unit_of_work.field_versions[state_addr] = {
+                    field_name: get_state_version(raw_fields[field_addr])
+                    for field_name, field_addr in field_addrs[state_addr].items()
+                    if field_addr in raw_fields
+                }
+        logger.debug(
+            "Building %d component states from %d fields", len(states), len(values)
+        )
+        return states
+
+    def register_template(self, html: str, template_hash: str | None = None) -> str:
+        """Register the component template and return its hash.
+
+        Templates are registered in the process-wide registry, and saved to the
+        store, so that other processes can re-render components with this
+        template. Each process saves a template once per template_resave_interval,
+        which restores it if it has expired, or has been evicted from the store.
+        """
+        if template_hash is None:
+            template_hash = get_template_registry().register(html)
+        now = time.monotonic()
+        saved_at = self._saved_template_hashes.get(template_hash)
+        if (
+            saved_at is None
+            or now - saved_at >= self.template_resave_interval.total_seconds()
+        ):
+            self.store.save_template(
+                template_hash, self.codec.encode(html.encode("utf-8"))
+            )
+            self._saved_template_hashes[template_hash] = now
+        return template_hash
+
+    def get_template(self, template_hash: str) -> str | None:
+        """Return the raw component template by its hash."""
+        registry = get_template_registry()
+        html = registry.get(template_hash)
+        if html is not None:
+            return html
+        html_bytes = self.store.restore_template(template_hash)
+        if not html_bytes:
+            return None
+        html = self.codec.decode(html_bytes).decode("utf-8")
+        registry.add(template_hash, html)
+        return html
+
+    def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
+    ):
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.template_hashes[state_addr] = template_hash
+            return
+        self.store.save_component_template_hash(state_addr, template_hash)
+
+    def restore_component_template_hash(self, state_addr: StateAddress) -> str | None:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and state_addr in unit_of_work.template_hashes:
+            return unit_of_work.template_hashes[state_addr]
+        return self.store.restore_component_template_hash(state_addr)
+
+    def save_component_template(
+        self, state_addr: StateAddress, html: str, template_hash: str | None = None
+    ):
+        template_hash = self.register_template(html, template_hash)
+        self.save_component_template_hash(state_addr, template_hash)
 
     def restore_component_template(self, state_addr: StateAddress) -> str | None:
-        html_bytes = self.store.restore_component_template(state_addr)
-        if html_bytes:
-            return html_bytes.decode("utf-8")
-        return None
+        template_hash = self.restore_component_template_hash(state_addr)
+        if template_hash is None:
+            return None
+        return self.get_template(template_hash)
+
+    def save_component_templates(self, templates: Mapping[StateAddress, str]):
+        template_hashes = {
+            state_addr: self.register_template(html)
+            for state_addr, html in templates.items()
+        }
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.template_hashes.update(template_hashes)
+            return
+        self.store.save_component_template_hashes(template_hashes)
+
+    def restore_component_templates(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        unit_of_work = get_current_unit_of_work()
+        buffered = unit_of_work.template_hashes if unit_of_work is not None else {}
+        state_addrs = list(state_addrs)
+        template_hashes = {
+            state_addr: buffered[state_addr]
+            for state_addr in state_addrs
+            if state_addr in buffered
+        }
+        template_hashes.update(
+            self.store.restore_component_template_hashes(
+                state_addr for state_addr in state_addrs if state_addr not in buffered
+            )
+        )
+        templates = {}
+        for state_addr, template_hash in template_hashes.items():
+            html = self.get_template(template_hash)
+            if html is not None:
+                templates[state_addr] = html
+        return templates
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator[UnitOfWork]:
+        """Run the block within a request-scoped unit of work.
+
+        Inside the block, every component state is loaded and deserialized at most
+        once, and all modified states are saved to the store when the block exits
+        successfully. If the block raises an exception, modified states are
+        discarded.
+
+        If a unit of work is already active, the block joins it.
+        """
+        current = get_current_unit_of_work()
+        if current is not None:
+            yield current
+            return
+        unit_of_work = UnitOfWork()
+        with use_unit_of_work(unit_of_work):
+            yield unit_of_work
+            self.flush(unit_of_work)
+
+    def flush(self, unit_of_work: UnitOfWork):
+        """Save dirty states and buffered writes of the unit of work to the store.
+
+        Dirty states that haven't changed since they were loaded are not saved
+        again, only their TTL is reset. New blobs of the states are saved first.
+        Serialized states are reported to the store with their versions, and the
+        unit of work releases them: if it's used again, states are loaded anew.
+        """
+        with collect_blobs() as raw_blobs:
+            raw_states, versioned_states, unchanged = self._serialize_dirty_states(
+                unit_of_work
+            )
+        self._save_blobs(raw_blobs)
+        raw_contexts = unit_of_work.pop_contexts()
+        template_hashes = unit_of_work.pop_template_hashes()
+        if raw_states or raw_contexts or template_hashes:
+            logger.debug(
+                "Flushing %d states, %d contexts and %d template hashes",
+                len(raw_states),
+                len(raw_contexts),
+                len(template_hashes),
+            )
+            self.store.save_batch(raw_states, raw_contexts, template_hashes)
+        if unchanged:
+            self.store.touch_states(unchanged)
+        unit_of_work.release()
+        if versioned_states:
+            self.store.remember_versioned_states(versioned_states)
+
+    def _serialize_dirty_states(
+        self, unit_of_work: UnitOfWork
+    ) -> tuple[
+        dict[StateAddress, bytes],
+        dict[StateAddress, tuple[Any, bytes]],
+        list[StateAddress],
+    ]:
+        """Serialize dirty states of the unit of work and mark them as clean.
+
+        Return serialized states that have changed, all dirty states with their
+        versions, and addresses of unchanged states. States, stored by fields,
+        contribute their changed fields, and no versions.
+        """
+        raw_states: dict[StateAddress, bytes] = {}
+        versioned_states: dict[StateAddress, tuple[Any, bytes]] = {}
+        unchanged: list[StateAddress] = []
+        for state_addr, state in unit_of_work.pop_dirty().items():
+            if self._stores_fields(state):
+                # Not remembered with the versions: the version of the header
+                # doesn't reflect changes of the fields.
+                raw_fields, version = self._serialize_state_fields(
+                    state_addr,
+                    state,
+                    unit_of_work.versions.get(state_addr),
+                    unit_of_work.field_versions.get(state_addr),
+                )
+                if raw_fields:
+                    raw_states.update(raw_fields)
+                    unit_of_work.versions[state_addr] = version
+                else:
+                    unchanged.append(state_addr)
+                continue
+            raw_state = self._serialize_state(state)
+            version = get_state_version(raw_state)
+            versioned_states[state_addr] = (state, version)
+            if unit_of_work.versions.get(state_addr) == version:
+                unchanged.append(state_addr)
+            else:
+                raw_states[state_addr] = raw_state
+                unit_of_work.versions[state_addr] = version
+        if unchanged:
+            logger.debug("Skipping %d unchanged states", len(unchanged))
+        return raw_states, versioned_states, unchanged
 
     def session_exists(self, session_id: str) -> bool:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and unit_of_work.has_session(session_id):
+            return True
         return self.store.session_exists(session_id)
 
     def component_initialized(self, state_addr: StateAddress) -> bool:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and unit_of_work.get(state_addr) is not None:
+            return True
         return self.store.component_initialized(state_addr)
 
     def get_or_create_component_state(
@@ -123,7 +607,7 @@ class StateManager:
                 component_kwargs=component_kwargs,
                 outer_context=outer_context,
             )
-            update_state(update_state_context)
+            call_sync(update_state, update_state_context)
             self.set_component_state(state_addr, state)
             return state
 
@@ -134,32 +618,168 @@ class StateManager:
             component_kwargs=component_kwargs,
             outer_context=outer_context,
         )
-        state = init_state(init_state_context)
+        state = call_sync(init_state, init_state_context)
         self.set_component_state(state_addr, state)
         return state
 
     def get_component_state(self, state_addr: StateAddress) -> Any | None:
-        raw_state = self.store.restore_state(state_addr)
-        if raw_state is None:
-            return None
-        state = self.serializer.deserialize(raw_state)
-        logger.debug("Getting component state for %r: %r", state_addr, state)
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and unit_of_work.is_loaded(state_addr):
+            return unit_of_work.get(state_addr)
+        state, version = self._load_component_state(state_addr)
+        if unit_of_work is not None:
+            state = unit_of_work.register_loaded(state_addr, state, version)
         return state
 
     def set_component_state(self, state_addr: StateAddress, state: Any):
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            logger.debug(
+                "Marking component state for %r as dirty", state_addr.component_id
+            )
+            unit_of_work.register_dirty(state_addr, state)
+            return
+        self._save_component_state(state_addr, state)
+
+    def get_component_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, Any]:
+        """Get states of multiple components, fetching them in one go.
+
+        Components without a state are omitted from the result. Inside a unit of
+        work, already loaded states are not fetched again, and fetched states
+        are remembered.
+        """
+        unit_of_work = get_current_unit_of_work()
+        states: dict[StateAddress, Any] = {}
+        to_load: list[StateAddress] = []
+        for state_addr in state_addrs:
+            if unit_of_work is not None and unit_of_work.is_loaded(state_addr):
+                state = unit_of_work.get(state_addr)
+                if state is not None:
+                    states[state_addr] = state
+            else:
+                to_load.append(state_addr)
+
+        loaded_states = self._load_component_states(to_load)
+        if unit_of_work is not None:
+            for state_addr in to_load:
+                state, version = loaded_states.get(state_addr, (None, None))
+                state = unit_of_work.register_loaded(state_addr, state, version)
+                if state is not None:
+                    states[state_addr] = state
+        else:
+            for state_addr, (state, _) in loaded_states.items():
+                states[state_addr] = state
+        return states
+
+    def prefetch_component_states(self, state_addrs: Iterable[StateAddress]):
+        """Load states of multiple components into the active unit of work.
+
+        Use it to fetch the states of a component subtree in one round trip before
+        rendering it. Without an active unit of work, there is nowhere to keep the
+        states, and the method does nothing.
+        """
+        if get_current_unit_of_work() is not None:
+            self.get_component_states(state_addrs)
+
+    def set_component_states(self, states: Mapping[StateAddress, Any]):
+        """Set states of multiple components, saving them in one go."""
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            for state_addr, state in states.items():
+                unit_of_work.register_dirty(state_addr, state)
+            return
+        self._save_component_states(states)
+
+    def _load_component_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, tuple[Any, bytes]]:
+        """Load states with their versions."""
+        state_addrs = list(state_addrs)
+        if not state_addrs:
+            return {}
+        versioned_states = self.store.restore_versioned_states(
+            state_addrs, self._deserialize_states
+        )
+        headers = _get_state_headers(
+            {state_addr: state for state_addr, (state, _) in versioned_states.items()}
+        )
+        if headers:
+            built_states = self._build_states_from_headers(headers)
+            for state_addr, state in built_states.items():
+                versioned_states[state_addr] = (state, versioned_states[state_addr][1])
+        logger.debug(
+            "Getting %d component states, found %d",
+            len(state_addrs),
+            len(versioned_states),
+        )
+        return versioned_states
+
+    def _save_component_states(self, states: Mapping[StateAddress, Any]):
+        if not states:
+            return
+        logger.debug("Setting %d component states", len(states))
+        with collect_blobs() as raw_blobs:
+            raw_states = self._serialize_component_states(states)
+        self._save_blobs(raw_blobs)
+        self.store.save_states(raw_states)
+        self.store.remember_raw_states(_get_whole_raw_states(states, raw_states))
+
+    def _serialize_component_states(
+        self, states: Mapping[StateAddress, Any]
+    ) -> dict[StateAddress, bytes]:
+        raw_states: dict[StateAddress, bytes] = {}
+        for state_addr, state in states.items():
+            if self._stores_fields(state):
+                raw_states.update(self._serialize_state_fields(state_addr, state)[0])
+            else:
+                raw_states[state_addr] = self._serialize_state(state)
+        return raw_states
+
+    def _load_component_state(
+        self, state_addr: StateAddress
+    ) -> tuple[Any | None, bytes | None]:
+        """Load the state with its version. Return (None, None) if not found."""
+        versioned_state = self.store.restore_versioned_state(
+            state_addr, self._deserialize_state
+        )
+        if versioned_state is None:
+            return None, None
+        state, version = versioned_state
+        if type(state) is StateHeader:
+            versioned_state = (
+                self._build_states_from_headers({state_addr: state})[state_addr],
+                version,
+            )
+        logger.debug(
+            "Getting component state for %r: %r", state_addr, versioned_state[0]
+        )
+        return versioned_state
+
+    def _save_component_state(self, state_addr: StateAddress, state: Any):
+        if self._stores_fields(state):
+            self._save_component_states({state_addr: state})
+            return
         logger.debug(
             "Setting component state for %r: %r", state_addr.component_id, state
         )
-        self.store.save_state(state_addr, self.serializer.serialize(state))
+        raw_state = self._serialize_state(state)
+        self.store.save_state(state_addr, raw_state)
+        self.store.remember_raw_states({state_addr: raw_state})
 
     def get_component_context(self, state_addr: StateAddress) -> dict[str, Any]:
-        raw_context = self.store.restore_context(state_addr)
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and state_addr in unit_of_work.contexts:
+            raw_context: bytes | None = unit_of_work.contexts[state_addr]
+        else:
+            raw_context = self.store.restore_context(state_addr)
         if raw_context is None:
             logger.debug(
                 "Getting component context for %r: not found", state_addr.component_id
             )
             return {}
-        flat_context = self.serializer.deserialize(raw_context)
+        flat_context = self.deserialize(raw_context)
         logger.debug(
             "Getting component context for %r: %r",
             state_addr.component_id,
@@ -175,9 +795,47 @@ class StateManager:
                 state_addr.component_id,
                 filtered_context,
             )
-            self.store.save_context(
-                state_addr, self.serializer.serialize(filtered_context)
+            raw_context = self.serialize(filtered_context)
+            unit_of_work = get_current_unit_of_work()
+            if unit_of_work is not None:
+                unit_of_work.contexts[state_addr] = raw_context
+                return
+            self.store.save_context(state_addr, raw_context)
+
+    def get_component_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, dict[str, Any]]:
+        """Get contexts of multiple components, fetching them in one go.
+
+        Components without a stored context are omitted from the result.
+        """
+        unit_of_work = get_current_unit_of_work()
+        buffered = unit_of_work.contexts if unit_of_work is not None else {}
+        state_addrs = list(state_addrs)
+        raw_contexts = {
+            state_addr: buffered[state_addr]
+            for state_addr in state_addrs
+            if state_addr in buffered
+        }
+        raw_contexts.update(
+            self.store.restore_contexts(
+                state_addr for state_addr in state_addrs if state_addr not in buffered
             )
+        )
+        return self.deserialize_many(raw_contexts)
+
+    def set_component_contexts(self, contexts: Mapping[StateAddress, dict[str, Any]]):
+        """Set contexts of multiple components, saving them in one go."""
+        raw_contexts = {}
+        for state_addr, context in contexts.items():
+            filtered_context = self.filter_flat_context(context)
+            if filtered_context:
+                raw_contexts[state_addr] = self.serialize(filtered_context)
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.contexts.update(raw_contexts)
+            return
+        self.store.save_contexts(raw_contexts)
 
     def filter_flat_context(self, flat_context: dict[str, Any]) -> dict[str, Any]:
         """Remove keys that are not serializable or don't need to be stored."""
@@ -196,7 +854,12 @@ class StateManager:
         state_addr: StateAddress,
         command_name: str,
         kwargs: dict[str, Any] | None = None,
+        execution_results: ExecutionResults | None = None,
     ) -> CallContext:
+        """Call the component command.
+
+        Pass execution_results to accumulate the results of several commands.
+        """
         component_cls = self.get_component_class(state_addr.get_component_name())
         component_instance = component_cls()
 
@@ -206,18 +869,22 @@ class StateManager:
         if state is None:
             raise ValueError(f"Component state not found: {state_addr}")
 
+        if execution_results is None:
+            execution_results = ExecutionResults()
         command = component_instance.get_command(command_name)
         call_context: CallContext = CallContext(
             request=request,
             state=state,
             state_address=state_addr,
             state_manager=self,
+            execution_results=execution_results,
         )
-        returned_value = command(call_context, **(kwargs or {}))
+        returned_value = call_sync(command, call_context, **(kwargs or {}))
         call_context.execution_results.process_returned_value(
             state_addr, returned_value
         )
-        self.set_component_state(state_addr, state)
+        if not is_readonly_command(command):
+            self.set_component_state(state_addr, state)
         return call_context
 
     def call_with_context(
@@ -245,12 +912,297 @@ class StateManager:
             execution_results=call_context.execution_results,
         )
 
-        returned_value = command(updated_call_context, **(kwargs or {}))
+        returned_value = call_sync(command, updated_call_context, **(kwargs or {}))
         updated_call_context.execution_results.process_returned_value(
             state_addr, returned_value
         )
 
-        self.set_component_state(state_addr, state)
+        if not is_readonly_command(command):
+            self.set_component_state(state_addr, state)
+
+    def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        """Register the sequence number of a component command.
+
+        Return False if the command is superseded by a command with a greater
+        sequence number. Unlike states, sequence numbers are not buffered by the
+        unit of work: concurrent requests must see them right away.
+        """
+        return self.store.register_command_seq(state_addr, seq)
+
+    def is_latest_command(self, state_addr: StateAddress, seq: int) -> bool:
+        """Return True if no command with a greater sequence number has arrived."""
+        latest_seq = self.store.restore_command_seq(state_addr)
+        return latest_seq is None or latest_seq <= seq
 
     def clear_session(self, session_id: str):
         self.store.clear_session(session_id=session_id)
+
+    # Async counterparts of the methods above. They use the async store, and share
+    # the unit of work with sync methods.
+
+    @asynccontextmanager
+    async def aunit_of_work(self) -> AsyncIterator[UnitOfWork]:
+        """Async version of unit_of_work()."""
+        current = get_current_unit_of_work()
+        if current is not None:
+            yield current
+            return
+        unit_of_work = UnitOfWork()
+        with use_unit_of_work(unit_of_work):
+            yield unit_of_work
+            await self.aflush(unit_of_work)
+
+    async def aflush(self, unit_of_work: UnitOfWork):
+        """Async version of flush(). States are serialized in a thread."""
+        raw_states, versioned_states, unchanged = await self._aserialize(
+            self._serialize_dirty_states, unit_of_work
+        )
+        raw_contexts = unit_of_work.pop_contexts()
+        template_hashes = unit_of_work.pop_template_hashes()
+        if raw_states or raw_contexts or template_hashes:
+            logger.debug(
+                "Flushing %d states, %d contexts and %d template hashes",
+                len(raw_states),
+                len(raw_contexts),
+                len(template_hashes),
+            )
+            await self.async_store.save_batch(raw_states, raw_contexts, template_hashes)
+        if unchanged:
+            await self.async_store.touch_states(unchanged)
+        unit_of_work.release()
+        if versioned_states:
+            await self.async_store.remember_versioned_states(versioned_states)
+
+    async def _aserialize(self, serialize: Callable[..., T], *args: Any) -> T:
+        """Call the serializing function in a thread, and save the new blobs.
+
+        Serializers may query the database, which Django doesn't allow in the event
+        loop. Blobs are collected in the thread, and saved with the async store.
+        """
+        ret, raw_blobs = await sync_to_async(_call_collecting_blobs)(serialize, *args)
+        await self._asave_blobs(raw_blobs)
+        return ret
+
+    async def _aload_component_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, tuple[Any, bytes]]:
+        """Async version of _load_component_states().
+
+        States are deserialized in a thread, and never lazily.
+        """
+        state_addrs = list(state_addrs)
+        if not state_addrs:
+            return {}
+        versioned_states = await self.async_store.restore_versioned_states(
+            state_addrs,
+            lambda raw_states: self._deserialize_states(raw_states, lazy=False),
+        )
+        headers = _get_state_headers(
+            {state_addr: state for state_addr, (state, _) in versioned_states.items()}
+        )
+        if headers:
+            built_states = await self._abuild_states_from_headers(headers)
+            for state_addr, state in built_states.items():
+                versioned_states[state_addr] = (state, versioned_states[state_addr][1])
+        logger.debug(
+            "Getting %d component states, found %d",
+            len(state_addrs),
+            len(versioned_states),
+        )
+        return versioned_states
+
+    async def asession_exists(self, session_id: str) -> bool:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and unit_of_work.has_session(session_id):
+            return True
+        return await self.async_store.session_exists(session_id)
+
+    async def acomponent_initialized(self, state_addr: StateAddress) -> bool:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and unit_of_work.get(state_addr) is not None:
+            return True
+        return await self.async_store.component_initialized(state_addr)
+
+    async def aget_component_state(self, state_addr: StateAddress) -> Any | None:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and unit_of_work.is_loaded(state_addr):
+            return unit_of_work.get(state_addr)
+        loaded_states = await self._aload_component_states([state_addr])
+        state, version = loaded_states.get(state_addr, (None, None))
+        if unit_of_work is not None:
+            state = unit_of_work.register_loaded(state_addr, state, version)
+        return state
+
+    async def aset_component_state(self, state_addr: StateAddress, state: Any):
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.register_dirty(state_addr, state)
+            return
+        if self._stores_fields(state):
+            await self.aset_component_states({state_addr: state})
+            return
+        raw_state = await self._aserialize(self._serialize_state, state)
+        await self.async_store.save_state(state_addr, raw_state)
+        await self.async_store.remember_raw_states({state_addr: raw_state})
+
+    async def aget_component_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, Any]:
+        unit_of_work = get_current_unit_of_work()
+        states: dict[StateAddress, Any] = {}
+        to_load: list[StateAddress] = []
+        for state_addr in state_addrs:
+            if unit_of_work is not None and unit_of_work.is_loaded(state_addr):
+                state = unit_of_work.get(state_addr)
+                if state is not None:
+                    states[state_addr] = state
+            else:
+                to_load.append(state_addr)
+
+        loaded_states = await self._aload_component_states(to_load)
+        if unit_of_work is not None:
+            for state_addr in to_load:
+                state, version = loaded_states.get(state_addr, (None, None))
+                state = unit_of_work.register_loaded(state_addr, state, version)
+                if state is not None:
+                    states[state_addr] = state
+        else:
+            for state_addr, (state, _) in loaded_states.items():
+                states[state_addr] = state
+        return states
+
+    async def aset_component_states(self, states: Mapping[StateAddress, Any]):
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            for state_addr, state in states.items():
+                unit_of_work.register_dirty(state_addr, state)
+            return
+        if not states:
+            return
+        logger.debug("Setting %d component states", len(states))
+        raw_states = await self._aserialize(self._serialize_component_states, states)
+        await self.async_store.save_states(raw_states)
+        await self.async_store.remember_raw_states(
+            _get_whole_raw_states(states, raw_states)
+        )
+
+    async def acall_component_command(
+        self,
+        request: HttpRequest,
+        state_addr: StateAddress,
+        command_name: str,
+        kwargs: dict[str, Any] | None = None,
+        execution_results: ExecutionResults | None = None,
+    ) -> CallContext:
+        """Async version of call_component_command().
+
+        The state is loaded and saved with the async store. Async commands are
+        awaited directly, and sync ones are executed in a thread.
+        """
+        component_cls = self.get_component_class(state_addr.get_component_name())
+        component_instance = component_cls()
+
+        state = await component_instance.aget_state(self, state_addr)
+        if state is None:
+            raise ValueError(f"Component state not found: {state_addr}")
+
+        if execution_results is None:
+            execution_results = ExecutionResults()
+        command = component_instance.get_command(command_name)
+        call_context: CallContext = CallContext(
+            request=request,
+            state=state,
+            state_address=state_addr,
+            state_manager=self,
+            execution_results=execution_results,
+        )
+        returned_value = await call_async(command, call_context, **(kwargs or {}))
+        call_context.execution_results.process_returned_value(
+            state_addr, returned_value
+        )
+        if not is_readonly_command(command):
+            await self.aset_component_state(state_addr, state)
+        return call_context
+
+    async def acall_with_context(
+        self,
+        call_context: CallContext,
+        component_id: str,
+        command_name: str,
+        kwargs: dict[str, Any] | None = None,
+    ):
+        """Async version of call_with_context()."""
+        state_addr = call_context.state_address.model_copy(
+            update={"component_id": component_id}
+        )
+        component_cls = self.get_component_class(state_addr.get_component_name())
+        component_instance = component_cls()
+
+        state = await self.aget_component_state(state_addr)
+        if state is None:
+            raise ValueError(f"Component state not found: {state_addr}")
+        command = component_instance.get_command(command_name)
+        updated_call_context: CallContext = CallContext(
+            request=call_context.request,
+            state=state,
+            state_address=state_addr,
+            state_manager=self,
+            execution_results=call_context.execution_results,
+        )
+
+        returned_value = await call_async(
+            command, updated_call_context, **(kwargs or {})
+        )
+        updated_call_context.execution_results.process_returned_value(
+            state_addr, returned_value
+        )
+
+        if not is_readonly_command(command):
+            await self.aset_component_state(state_addr, state)
+
+    async def aregister_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        return await self.async_store.register_command_seq(state_addr, seq)
+
+    async def ais_latest_command(self, state_addr: StateAddress, seq: int) -> bool:
+        latest_seq = await self.async_store.restore_command_seq(state_addr)
+        return latest_seq is None or latest_seq <= seq
+
+    async def aclear_session(self, session_id: str):
+        await self.async_store.clear_session(session_id)
+
+
+def is_readonly_command(command: Callable) -> bool:
+    """Return True if the command is marked with @command(readonly=True)."""
+    return getattr(command, READONLY_COMMAND_MARKER, False)
+
+
+def _get_whole_raw_states(
+    states: Mapping[StateAddress, Any], raw_states: Mapping[StateAddress, bytes]
+) -> dict[StateAddress, bytes]:
+    """Return raw states of saved states, except for states stored by fields."""
+    return {
+        state_addr: raw_states[state_addr]
+        for state_addr in states
+        if not is_state_header(raw_states[state_addr])
+    }
+
+
+def _call_collecting_blobs(
+    serialize: Callable[..., T], *args: Any
+) -> tuple[T, dict[str, bytes | None]]:
+    with collect_blobs() as raw_blobs:
+        return serialize(*args), raw_blobs
+
+
+def _get_state_headers(states: Mapping[K, Any]) -> dict[K, StateHeader]:
+    # Not isinstance(), which would make LazyState proxies deserialize states.
+    return {key: state for key, state in states.items() if type(state) is StateHeader}
+
+
+def _get_field_addresses_of_states(
+    headers: Mapping[StateAddress, StateHeader]
+) -> dict[StateAddress, dict[str, StateAddress]]:
+    return {
+        state_addr: get_field_addresses(state_addr, header.field_names)
+        for state_addr, header in headers.items()
+    }
@@ -0,0 +1,79 @@
+import functools
+import json
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+from livecomponents.manager.lazy_state import get_unloaded_raw_state, unwrap_state
+from livecomponents.manager.serializers import get_model_class_path, import_model_class
+from livecomponents.types import StateAddress
+from livecomponents.utils import LiveComponentsModel
+
+# Marks the header of a state, stored by fields. Headers are stored as is,
+# bypassing the serializer and the codec, whose tags they don't clash with.
+STATE_HEADER_TAG = b"\xfb"
+
+# Separates the component id from the field name in addresses of stored fields.
+# Component ids never contain it.
+FIELD_SEP = "\x1f"
+
+
+class StateHeader(NamedTuple):
+    """Stored in place of a state, whose fields are stored separately."""
+
+    class_path: str
+    field_names: tuple[str, ...]
+
+    def get_model_class(self) -> type[LiveComponentsModel]:
+        return import_model_class(self.class_path)  # type: ignore
+
+
+def can_store_fields(state: Any) -> bool:
+    """Return True if fields of the state can be stored separately.
+
+    These are LiveComponentsModel states, which track their changed fields, and
+    whose classes can be imported by their path. A LazyState that has never
+    been accessed is stored as is.
+    """
+    if get_unloaded_raw_state(state) is not None:
+        return False
+    state = unwrap_state(state)
+    return (
+        isinstance(state, LiveComponentsModel)
+        and get_model_class_path(type(state)) is not None  # type: ignore
+    )
+
+
+@functools.cache
+def encode_state_header(model_cls: type[LiveComponentsModel]) -> bytes:
+    header = {
+        "cls": get_model_class_path(model_cls),  # type: ignore
+        "fields": list(model_cls.model_fields),
+    }
+    return STATE_HEADER_TAG + json.dumps(header).encode()
+
+
+def is_state_header(raw_state: bytes) -> bool:
+    return raw_state[:1] == STATE_HEADER_TAG
+
+
+def decode_state_header(raw_state: bytes) -> StateHeader | None:
+    """Return the header of a state, stored by fields, or None for other states."""
+    if not is_state_header(raw_state):
+        return None
+    header = json.loads(raw_state[1:])
+    return StateHeader(header["cls"], tuple(header["fields"]))
+
+
+def get_field_address(state_addr: StateAddress, field_name: str) -> StateAddress:
+    return state_addr.with_component_id(
+        f"{state_addr.component_id}{FIELD_SEP}{field_name}"
+    )
+
+
+def get_field_addresses(
+    state_addr: StateAddress, field_names: Iterable[str]
+) -> dict[str, StateAddress]:
+    return {
+        field_name: get_field_address(state_addr, field_name)
+        for field_name in field_names
+    }
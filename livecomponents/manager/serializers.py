@@ -1,16 +1,41 @@
 import abc
+import base64
+import functools
+import importlib
 import io
+import json
+import mmap
 import pickle
 import pickletools
-from typing import Any
+import struct
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, NamedTuple, TypeVar
 
 from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import router
 from django.db.models import Model
 from django.forms import BaseForm
 from django.forms.renderers import DjangoTemplates
+from django.utils.module_loading import import_string
 from pydantic import BaseModel
 
+from livecomponents.form_utils import get_form_class, get_lazy_form_class
 from livecomponents.logging import logger
+from livecomponents.manager.blobs import (
+    Blob,
+    get_blob_buffer,
+    get_blob_hash,
+    get_blob_loader,
+)
+from livecomponents.manager.unit_of_work import get_current_unit_of_work
+
+K = TypeVar("K")
+
+# Django models are identified by their app label, model name and primary key.
+ModelKey = tuple[str, str, Any]
 
 
 class IStateSerializer(abc.ABC):
@@ -22,21 +47,357 @@ class IStateSerializer(abc.ABC):
     def serialize(self, state: Any) -> bytes:
         ...
 
+    def deserialize_many(self, raw_states: Mapping[K, bytes]) -> dict[K, Any]:
+        """Deserialize multiple states.
+
+        Serializers can override it to share work between states, like loading
+        Django models they refer to with one query.
+        """
+        return {
+            key: self.deserialize(raw_state) for key, raw_state in raw_states.items()
+        }
+
 
 class PickleStateSerializer(IStateSerializer):
+    """Serializer, based on pickle.
+
+    Saved Django models are pickled by their primary keys (see
+    LivecomponentsPickler). Primary keys of all models of the state are written
+    after the pickle, so that models are loaded with one in_bulk() query
+    per model class when the state is unpickled. deserialize_many() does the
+    same for multiple states at once.
+
+    Args:
+        model_snapshots: Snapshot policies of Django models, keyed by their labels
+            ("app_label.model_name"). Field values of these models are stored
+            with the state, and models are rebuilt from them without a query
+            while the policy allows it (see ModelSnapshotPolicy).
+    """
+
+    # Kept for subclasses that don't call __init__()
+    snapshot_policies: dict[str, "ModelSnapshotPolicy"] = {}
+
+    def __init__(self, model_snapshots: Mapping[str, dict] | None = None):
+        self.snapshot_policies = {
+            label.lower(): ModelSnapshotPolicy(**policy)
+            for label, policy in (model_snapshots or {}).items()
+        }
+
     def deserialize(self, raw_state: bytes) -> Any:
-        unpickler = LivecomponentsUnpickler(io.BytesIO(raw_state))
-        return unpickler.load()
+        return self._unpickle_many({None: raw_state})[None]
+
+    def deserialize_many(self, raw_states: Mapping[K, bytes]) -> dict[K, Any]:
+        return self._unpickle_many(raw_states)
+
+    def _unpickle_many(self, raw_states: Mapping[K, bytes]) -> dict[K, Any]:
+        files = {
+            key: read_model_keys(raw_state) for key, raw_state in raw_states.items()
+        }
+        snapshots = {
+            model_key: snapshot
+            for model_keys, _ in files.values()
+            for model_key, snapshot in model_keys.items()
+        }
+        models = restore_model_snapshots(snapshots, self.snapshot_policies)
+        models.update(
+            load_django_models(
+                model_key for model_key in snapshots if model_key not in models
+            )
+        )
+        return {
+            key: LivecomponentsUnpickler(file, models).load()
+            for key, (_, file) in files.items()
+        }
 
     def serialize(self, state: Any) -> bytes:
         buf = io.BytesIO()
-        pickler = LivecomponentsPickler(buf)
+        pickler = LivecomponentsPickler(buf, self.snapshot_policies)
         pickler.dump(state)
         optimized = pickletools.optimize(buf.getvalue())
+        if pickler.model_keys:
+            trailer = pickle.dumps(pickler.model_keys, pickle.HIGHEST_PROTOCOL)
+            optimized += trailer + struct.pack(">I", len(trailer)) + MODEL_KEYS_MARKER
         logger.debug("Serialized state size: %d bytes", len(optimized))
         return optimized
 
 
+# Pickled states with Django models end with the pickled dict of model keys and
+# their snapshots, its size (4 bytes), and this byte. Pickles without them end
+# with the STOP opcode.
+MODEL_KEYS_MARKER = b"\xfd"
+
+
+def read_model_keys(
+    raw_state: bytes,
+) -> tuple[dict[ModelKey, "ModelSnapshot | None"], io.BytesIO]:
+    """Read keys of Django models, pickled by their primary keys.
+
+    Return the keys with snapshots of the models (if taken), and the file to
+    unpickle the state from.
+    """
+    file = io.BytesIO(raw_state)
+    if not raw_state.endswith(MODEL_KEYS_MARKER):
+        return {}, file
+    (trailer_size,) = struct.unpack(">I", raw_state[-5:-1])
+    return pickle.loads(raw_state[-5 - trailer_size : -5]), file
+
+
+class JsonStateSerializer(PickleStateSerializer):
+    """Serializer that stores Pydantic states as JSON.
+
+    States that are Pydantic models are dumped with model_dump_json() and
+    restored with model_validate_json(), which is faster than pickle, produces
+    smaller states, and doesn't run arbitrary code on load. Field values that
+    can't be encoded as JSON are stored separately: saved Django models by their
+    primary key, and everything else (like Django forms) with pickle. Other
+    values, like component contexts, are pickled.
+
+    Values must survive the round trip through the types of their fields. For
+    example, a tuple in a field of type Any is restored as a list.
+
+    States, pickled before switching to this serializer, can still be read.
+    """
+
+    def serialize(self, state: Any) -> bytes:
+        class_path = None
+        if isinstance(state, BaseModel):
+            class_path = get_model_class_path(type(state))  # type: ignore
+        if class_path is None:
+            return super().serialize(state)
+
+        fallback_used = False
+
+        def fallback(value: Any) -> dict:
+            nonlocal fallback_used
+            fallback_used = True
+            return self._encode_fallback(value)
+
+        payload = state.model_dump_json(round_trip=True, fallback=fallback)
+        header = json.dumps({"cls": class_path, "fallback": fallback_used})
+        serialized = f"{header}\n{payload}".encode()
+        logger.debug("Serialized state size: %d bytes", len(serialized))
+        return serialized
+
+    def deserialize(self, raw_state: bytes) -> Any:
+        return self.deserialize_many({None: raw_state})[None]
+
+    def deserialize_many(self, raw_states: Mapping[K, bytes]) -> dict[K, Any]:
+        states = self._unpickle_many(
+            {
+                key: raw_state
+                for key, raw_state in raw_states.items()
+                if not raw_state.startswith(b"{")
+            }
+        )
+        # States with fallback values, decoded after their Django models are loaded
+        with_fallbacks: dict[K, tuple[type[BaseModel], Any]] = {}
+        for key, raw_state in raw_states.items():
+            if key in states:
+                continue
+            raw_header, _, payload = raw_state.partition(b"\n")
+            header = json.loads(raw_header)
+            model_cls = import_model_class(header["cls"])
+            if header["fallback"]:
+                with_fallbacks[key] = (model_cls, json.loads(payload))
+            else:
+                states[key] = model_cls.model_validate_json(payload)
+
+        models = load_django_models(
+            model_key
+            for _, data in with_fallbacks.values()
+            for model_key in find_fallback_model_keys(data)
+        )
+        for key, (model_cls, data) in with_fallbacks.items():
+            states[key] = model_cls.model_validate(self._decode_fallbacks(data, models))
+        return {key: states[key] for key in raw_states}
+
+    def _encode_fallback(self, value: Any) -> dict:
+        # Models with snapshots are pickled, so that their snapshots are stored.
+        if (
+            isinstance(value, Model)
+            and isinstance(value.pk, int | str)
+            and value._meta.label_lower not in self.snapshot_policies
+        ):
+            return {
+                JSON_FALLBACK_KEY: "django_model",
+                "app_label": value._meta.app_label,
+                "model_name": value._meta.model_name,
+                "pk": value.pk,
+            }
+        pickled = super().serialize(value)
+        return {
+            JSON_FALLBACK_KEY: "pickle",
+            "data": base64.b64encode(pickled).decode("ascii"),
+        }
+
+    def _decode_fallbacks(self, data: Any, models: Mapping[ModelKey, Model]) -> Any:
+        """Replace encoded fallback values with the original ones."""
+        if isinstance(data, list):
+            return [self._decode_fallbacks(item, models) for item in data]
+        if not isinstance(data, dict):
+            return data
+        fallback_type = data.get(JSON_FALLBACK_KEY)
+        if fallback_type == "django_model":
+            return models[(data["app_label"], data["model_name"], data["pk"])]
+        if fallback_type == "pickle":
+            return self._unpickle_many({None: base64.b64decode(data["data"])})[None]
+        return {
+            key: self._decode_fallbacks(value, models) for key, value in data.items()
+        }
+
+
+class CompositeStateSerializer(IStateSerializer):
+    """Serializer that reads states of any registered format, and writes one.
+
+    States are wrapped in an envelope: a marker byte, the envelope version, and
+    the ID of the format, followed by the payload of the format's serializer.
+    States without an envelope, written before this serializer was configured,
+    are read with the legacy format.
+
+    Switching the write format doesn't break live sessions: states in the old
+    format are read until they are saved again in the new one. Compression is
+    applied on top of the envelope by the state codec, which tags compressed
+    values with a codec ID of its own (see StateCodec).
+
+    Args:
+        write_format: Name of the format to write states in.
+        legacy_format: Name of the format to read states without an envelope in.
+        formats: Additional formats, keyed by their names. Every format is a dict
+            with an "id" (an integer from 128 to 255, stored in envelopes), a
+            serializer class path ("cls"), and an optional "config".
+    """
+
+    def __init__(
+        self,
+        write_format: str = "json",
+        legacy_format: str = "pickle",
+        formats: dict[str, dict] | None = None,
+    ):
+        format_configs = dict(BUILTIN_STATE_FORMATS)
+        for name, format_config in (formats or {}).items():
+            if not 128 <= format_config["id"] <= 255:
+                raise ImproperlyConfigured(
+                    f"ID of the state format {name!r} must be from 128 to 255"
+                )
+            format_configs[name] = format_config
+        format_ids = {format_config["id"] for format_config in format_configs.values()}
+        if len(format_ids) < len(format_configs):
+            raise ImproperlyConfigured("State formats must have unique IDs")
+        for name in (write_format, legacy_format):
+            if name not in format_configs:
+                raise ImproperlyConfigured(f"Unknown state format: {name}")
+
+        self.serializers: dict[str, IStateSerializer] = {}
+        self.serializers_by_id: dict[int, IStateSerializer] = {}
+        for name, format_config in format_configs.items():
+            serializer_cls = import_string(format_config["cls"])
+            serializer = serializer_cls(**format_config.get("config", {}))
+            self.serializers[name] = serializer
+            self.serializers_by_id[format_config["id"]] = serializer
+        self.write_serializer = self.serializers[write_format]
+        self.legacy_serializer = self.serializers[legacy_format]
+        self.envelope_header = ENVELOPE_MARKER + bytes(
+            [ENVELOPE_VERSION, format_configs[write_format]["id"]]
+        )
+
+    def serialize(self, state: Any) -> bytes:
+        return self.envelope_header + self.write_serializer.serialize(state)
+
+    def deserialize(self, raw_state: bytes) -> Any:
+        serializer, payload = self._open_envelope(raw_state)
+        return serializer.deserialize(payload)
+
+    def deserialize_many(self, raw_states: Mapping[K, bytes]) -> dict[K, Any]:
+        # States are grouped by format, so that serializers can load them together.
+        payloads: dict[int, dict[K, bytes]] = defaultdict(dict)
+        serializers: dict[int, IStateSerializer] = {}
+        for key, raw_state in raw_states.items():
+            serializer, payload = self._open_envelope(raw_state)
+            serializers[id(serializer)] = serializer
+            payloads[id(serializer)][key] = payload
+        states = {}
+        for serializer_id, serializer_payloads in payloads.items():
+            states.update(
+                serializers[serializer_id].deserialize_many(serializer_payloads)
+            )
+        return {key: states[key] for key in raw_states}
+
+    def _open_envelope(self, raw_state: bytes) -> tuple[IStateSerializer, bytes]:
+        """Return the serializer of the state and its payload."""
+        if not raw_state.startswith(ENVELOPE_MARKER):
+            return self.legacy_serializer, raw_state
+        envelope_version, format_id = raw_state[1], raw_state[2]
+        if envelope_version != ENVELOPE_VERSION:
+            raise ValueError(f"Unsupported state envelope version: {envelope_version}")
+        serializer = self.serializers_by_id.get(format_id)
+        if serializer is None:
+            raise ValueError(f"Unknown state format ID: {format_id}")
+        return serializer, raw_state[3:]
+
+
+# State envelopes start with this byte. It never starts a pickle, a JSON document,
+# or a value compressed by StateCodec.
+ENVELOPE_MARKER = b"\xfe"
+ENVELOPE_VERSION = 1
+
+# IDs from 1 to 127 are reserved for built-in formats.
+BUILTIN_STATE_FORMATS: dict[str, dict] = {
+    "pickle": {
+        "id": 1,
+        "cls": "livecomponents.manager.serializers.PickleStateSerializer",
+    },
+    "json": {
+        "id": 2,
+        "cls": "livecomponents.manager.serializers.JsonStateSerializer",
+    },
+}
+
+
+# Marks values, encoded by JsonStateSerializer without JSON.
+JSON_FALLBACK_KEY = "__livecomponents__"
+
+
+def find_fallback_model_keys(data: Any) -> Iterator[ModelKey]:
+    """Find keys of Django models, stored by JsonStateSerializer as fallbacks."""
+    if isinstance(data, list):
+        for item in data:
+            yield from find_fallback_model_keys(item)
+    elif isinstance(data, dict):
+        if data.get(JSON_FALLBACK_KEY) == "django_model":
+            yield data["app_label"], data["model_name"], data["pk"]
+        else:
+            for value in data.values():
+                yield from find_fallback_model_keys(value)
+
+
+@functools.cache
+def get_model_class_path(model_cls: type[BaseModel]) -> str | None:
+    """Return the import path of the model class, or None if it can't be imported.
+
+    For example, classes defined in functions or parametrized generic models
+    can't be imported by their names.
+    """
+    class_path = f"{model_cls.__module__}:{model_cls.__qualname__}"
+    try:
+        if import_model_class(class_path) is model_cls:
+            return class_path
+    except (ImportError, AttributeError, ValueError):
+        pass
+    return None
+
+
+@functools.cache
+def import_model_class(class_path: str) -> type[BaseModel]:
+    """Import a Pydantic model class by the path "module:QualifiedName"."""
+    module_name, _, qualname = class_path.partition(":")
+    obj: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    if not (isinstance(obj, type) and issubclass(obj, BaseModel)):
+        raise ValueError(f"{class_path} is not a Pydantic model")
+    return obj
+
+
 class LivecomponentsPickler(pickle.Pickler):
     """Pickler that supports more effective pickling of some objects.
 
@@ -47,6 +408,8 @@ class LivecomponentsPickler(pickle.Pickler):
       makes it possible to evolve the model's fields without breaking the state.
     - For Django templates: pickle the DjangoTemplates renderer.
     - For Django models: use persistent_id to pickle the model by its primary key.
+    - For blobs: use persistent_id to pickle the blob by the hash of its value,
+      saved separately (see save_blob()).
     """
 
     def reducer_override(self, obj):
@@ -61,7 +424,20 @@ class LivecomponentsPickler(pickle.Pickler):
             return pickle_django_model(obj)
         return NotImplemented
 
+    def __init__(
+        self,
+        file,
+        snapshot_policies: Mapping[str, "ModelSnapshotPolicy"] | None = None,
+        **kwargs,
+    ):
+        super().__init__(file, **kwargs)
+        self.snapshot_policies = snapshot_policies or {}
+        # Keys of models, pickled by their primary keys, with their snapshots
+        self.model_keys: dict[ModelKey, ModelSnapshot | None] = {}
+
     def persistent_id(self, obj):
+        if isinstance(obj, Blob):
+            return "blob", save_blob(obj)
         if isinstance(obj, Model):
             if obj.pk:
                 # Saved Django model.
@@ -70,7 +446,12 @@ class LivecomponentsPickler(pickle.Pickler):
                     obj.__class__,
                     obj.pk,
                 )
-                return "django_model", obj._meta.app_label, obj._meta.model_name, obj.pk
+                app_label, model_name = obj._meta.app_label, obj._meta.model_name
+                policy = self.snapshot_policies.get(obj._meta.label_lower)
+                self.model_keys[(app_label, model_name, obj.pk)] = (
+                    take_model_snapshot(obj, policy) if policy is not None else None
+                )
+                return "django_model", app_label, model_name, obj.pk
             else:
                 # Unsaved Django model. Don't use persistent_id.
                 logger.debug(
@@ -80,7 +461,21 @@ class LivecomponentsPickler(pickle.Pickler):
 
 
 class LivecomponentsUnpickler(pickle.Unpickler):
+    """Unpickler that restores Django models, pickled by their primary keys.
+
+    Models, already loaded with load_django_models(), can be passed in the models
+    mapping. Other models are loaded one by one.
+
+    Blobs are restored by their hashes, and load their values on first access.
+    """
+
+    def __init__(self, file, models: Mapping[ModelKey, Model] | None = None):
+        super().__init__(file)
+        self.models = models or {}
+
     def persistent_load(self, pid):
+        if pid[0] == "blob":
+            return restore_blob(pid[1])
         type_tag, app_label, model_name, pk = pid
         if type_tag == "django_model":
             logger.debug(
@@ -90,14 +485,230 @@ class LivecomponentsUnpickler(pickle.Unpickler):
                 model_name,
                 pk,
             )
-            model_class = apps.get_model(app_label, model_name)
-            try:
-                return model_class.objects.get(pk=pk)
-            except model_class.DoesNotExist:
+            model = self.models.get((app_label, model_name, pk))
+            if model is not None:
+                return model
+            return load_django_model(app_label, model_name, pk)
+        raise pickle.UnpicklingError(f"Unsupported persistent id: {pid}")
+
+
+def save_blob(blob: Blob) -> str:
+    """Pickle the value of a new blob for the store, and return the blob hash.
+
+    Pickled values are collected by StateManager (see collect_blobs()). Blobs,
+    saved before, are pickled by their hashes, and collected with a None value.
+    """
+    blob_buffer = get_blob_buffer()
+    if blob_buffer is None:
+        raise pickle.PicklingError("Blobs can only be serialized by StateManager")
+    if blob.blob_hash is None:
+        raw_value = pickle_blob_value(blob.value)
+        blob.blob_hash = get_blob_hash(raw_value)
+        blob_buffer[blob.blob_hash] = raw_value
+    else:
+        blob_buffer.setdefault(blob.blob_hash, None)
+    return blob.blob_hash
+
+
+def restore_blob(blob_hash: str) -> Blob:
+    """Restore a blob, whose value is loaded on first access.
+
+    Within collect_blobs(), the blob is collected with a None value, like blobs
+    saved before, so that its TTL is reset while states refer to it.
+    """
+    load = get_blob_loader()
+    if load is None:
+        raise pickle.UnpicklingError("Blobs can only be deserialized by StateManager")
+    logger.debug("Custom unpickling: Blob with persistent_id: hash=%s", blob_hash)
+    blob_buffer = get_blob_buffer()
+    if blob_buffer is not None:
+        blob_buffer.setdefault(blob_hash, None)
+    return Blob.restore(blob_hash, load)
+
+
+def pickle_blob_value(value: Any) -> bytes:
+    """Pickle the value of a blob, regardless of the configured serializer.
+
+    Bytes are stored as they are, after a tag byte.
+    """
+    if isinstance(value, bytes | bytearray | memoryview):
+        return RAW_BLOB_TAG + bytes(value)
+    return PickleStateSerializer().serialize(value)
+
+
+def unpickle_blob_value(raw_value: "bytes | memoryview | mmap.mmap") -> Any:
+    """Unpickle the value of a blob.
+
+    Blobs of bytes are returned as read-only memoryviews of the raw value, so
+    that values, memory-mapped by the blob store, aren't copied.
+    """
+    if raw_value[:1] == RAW_BLOB_TAG:
+        return memoryview(raw_value).toreadonly()[1:]
+    return PickleStateSerializer().deserialize(bytes(raw_value))
+
+
+# Written in front of blob values of bytes. Pickles start with the PROTO opcode.
+RAW_BLOB_TAG = b"\xfc"
+
+
+def load_django_model(app_label: str, model_name: str, pk: Any) -> Model:
+    model_key = (app_label, model_name, pk)
+    return load_django_models([model_key])[model_key]
+
+
+def load_django_models(model_keys: Iterable[ModelKey]) -> dict[ModelKey, Model]:
+    """Load Django models with one in_bulk() query per model class.
+
+    Within a unit of work, loaded models are kept in its identity map, so that
+    states that refer to the same model share one instance of it, and the model
+    is fetched from the database once per request.
+    """
+    identity_map = get_model_identity_map()
+    models = {}
+    # Primary keys of models to fetch, grouped by model class
+    missing: defaultdict[tuple[str, str], dict[Any, None]] = defaultdict(dict)
+    for model_key in model_keys:
+        if model_key in models:
+            continue
+        model = identity_map.get(model_key)
+        if model is not None:
+            models[model_key] = model
+        else:
+            app_label, model_name, pk = model_key
+            missing[(app_label, model_name)][pk] = None
+
+    for (app_label, model_name), pks in missing.items():
+        model_class = apps.get_model(app_label, model_name)
+        loaded = model_class.objects.in_bulk(list(pks))
+        for pk in pks:
+            if pk not in loaded:
                 raise pickle.UnpicklingError(
                     f"Model {model_class} with pk={pk} does not exist"
                 )
-        raise pickle.UnpicklingError(f"Unsupported persistent id: {pid}")
+            model_key = (app_label, model_name, pk)
+            models[model_key] = identity_map.setdefault(model_key, loaded[pk])
+    return models
+
+
+def get_model_identity_map() -> dict[ModelKey, Model]:
+    """Return the identity map of Django models of the current unit of work.
+
+    Without a unit of work, an empty map is returned, so models aren't shared.
+    """
+    unit_of_work = get_current_unit_of_work()
+    return unit_of_work.models if unit_of_work is not None else {}
+
+
+class ModelSnapshotPolicy(BaseModel):
+    """When a Django model can be rebuilt from its snapshot without a query.
+
+    Snapshots, younger than max_age seconds, are used as is. Older ones (or all of
+    them, if max_age is not set) are checked against the version_field column
+    with one query per model class, which is cheaper than fetching the rows.
+    If neither is set, snapshots are always used. Otherwise, stale models are
+    fetched from the database.
+    """
+
+    max_age: float | None = None
+    version_field: str | None = None
+
+
+class ModelSnapshot(NamedTuple):
+    """Field values of a Django model, stored with the state."""
+
+    taken_at: float
+    version: Any
+    values: dict[str, Any]
+
+
+# Models, rebuilt from snapshots, keep the time their snapshot was taken, so that
+# saving them again doesn't make the snapshot look fresh.
+SNAPSHOT_TAKEN_AT_ATTR = "_livecomponents_snapshot_taken_at"
+
+
+def take_model_snapshot(model: Model, policy: ModelSnapshotPolicy) -> ModelSnapshot:
+    # Deferred fields are left out, so that taking the snapshot doesn't query them.
+    values = {
+        field.attname: getattr(model, field.attname)
+        for field in model._meta.concrete_fields
+        if field.attname in model.__dict__
+    }
+    version = getattr(model, policy.version_field) if policy.version_field else None
+    taken_at = getattr(model, SNAPSHOT_TAKEN_AT_ATTR, None) or time.time()
+    return ModelSnapshot(taken_at=taken_at, version=version, values=values)
+
+
+def restore_model_snapshots(
+    snapshots: Mapping[ModelKey, ModelSnapshot | None],
+    policies: Mapping[str, ModelSnapshotPolicy],
+) -> dict[ModelKey, Model]:
+    """Rebuild Django models from their snapshots, if their policies allow it.
+
+    Models that are already loaded in the unit of work are returned as is. Models
+    that can't be rebuilt are left out, and must be fetched from the database.
+    """
+    identity_map = get_model_identity_map()
+    models = {}
+    # Snapshots to check against the version column, grouped by model class
+    to_verify: defaultdict[tuple[str, str], dict[Any, ModelSnapshot]] = defaultdict(
+        dict
+    )
+    now = time.time()
+    for model_key, snapshot in snapshots.items():
+        model = identity_map.get(model_key)
+        if model is not None:
+            models[model_key] = model
+            continue
+        app_label, model_name, pk = model_key
+        policy = policies.get(f"{app_label}.{model_name}")
+        if snapshot is None or policy is None:
+            continue
+        if policy.max_age is not None and now - snapshot.taken_at <= policy.max_age:
+            fresh = True
+        else:
+            fresh = policy.max_age is None and policy.version_field is None
+        if fresh:
+            models[model_key] = identity_map.setdefault(
+                model_key, build_model_from_snapshot(model_key, snapshot)
+            )
+        elif policy.version_field is not None:
+            to_verify[(app_label, model_name)][pk] = snapshot
+
+    for (app_label, model_name), model_snapshots in to_verify.items():
+        model_class = apps.get_model(app_label, model_name)
+        version_field = policies[f"{app_label}.{model_name}"].version_field
+        versions = dict(
+            model_class.objects.filter(pk__in=list(model_snapshots)).values_list(
+                "pk", version_field
+            )
+        )
+        for pk, snapshot in model_snapshots.items():
+            if pk in versions and versions[pk] == snapshot.version:
+                model_key = (app_label, model_name, pk)
+                models[model_key] = identity_map.setdefault(
+                    model_key, build_model_from_snapshot(model_key, snapshot)
+                )
+    return models
+
+
+def build_model_from_snapshot(model_key: ModelKey, snapshot: ModelSnapshot) -> Model:
+    app_label, model_name, pk = model_key
+    model_class = apps.get_model(app_label, model_name)
+    logger.debug(
+        "Custom unpickling: Django model from snapshot: class=%s, pk=%s",
+        model_class,
+        pk,
+    )
+    # Fields, added to the model after the snapshot was taken, are deferred, and
+    # fetched on access. Removed fields are ignored.
+    field_names, values = [], []
+    for field in model_class._meta.concrete_fields:
+        if field.attname in snapshot.values:
+            field_names.append(field.attname)
+            values.append(snapshot.values[field.attname])
+    model = model_class.from_db(router.db_for_read(model_class), field_names, values)
+    setattr(model, SNAPSHOT_TAKEN_AT_ATTR, snapshot.taken_at)
+    return model
 
 
 def pickle_django_templates(instance: DjangoTemplates):
@@ -120,12 +731,13 @@ def pickle_django_form(instance: BaseForm):
     # If the form is a ModelForm, we need to store the instance separately.
     if hasattr(instance, "instance"):
         constructor_kwargs["instance"] = instance.instance
+    form_class = get_form_class(instance)
     logger.debug(
         "Custom pickling: Form with initial and data: class=%s, constructor_kwargs=%r",
-        instance.__class__,
+        form_class,
         constructor_kwargs,
     )
-    return unpickle_django_form_v2, (instance.__class__, constructor_kwargs)
+    return unpickle_django_form_v2, (form_class, constructor_kwargs)
 
 
 def unpickle_django_form(cls, initial: dict | None, data: dict | None):
@@ -140,10 +752,8 @@ def unpickle_django_form_v2(cls, constructor_kwargs: dict):
     logger.debug(
         "Custom unpickling: Form with constructor_kwargs: class=%s", cls.__name__
     )
-    form = cls(**constructor_kwargs)
-    if form.is_bound:
-        form.full_clean()
-    return form
+    # Bound forms are validated when their errors or cleaned data are accessed.
+    return get_lazy_form_class(cls)(**constructor_kwargs)
 
 
 def pickle_pydantic_model(instance: BaseModel):
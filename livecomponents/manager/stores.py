@@ -2,11 +2,27 @@ import abc
 import base64
 import datetime
 import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, TypeVar, cast
 
 from redis import Redis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline
 
+from livecomponents.logging import logger
 from livecomponents.types import StateAddress
 
+T = TypeVar("T")
+
+# Commands are queued the same way to pipelines of sync and async clients.
+AnyPipeline = Pipeline | AsyncPipeline
+
+# Deserializes multiple raw states at once (see StateManager.deserialize_many()).
+DeserializeMany = Callable[[Mapping[StateAddress, bytes]], dict[StateAddress, Any]]
+
 
 class IStateStore(abc.ABC):
     @abc.abstractmethod
@@ -34,13 +50,25 @@ class IStateStore(abc.ABC):
         ...
 
     @abc.abstractmethod
-    def save_component_template(
-        self, state_addr: StateAddress, html_bytes: bytes
-    ) -> None:
+    def save_template(self, template_hash: str, html_bytes: bytes) -> None:
+        """Save a component template in the global, session-independent registry.
+
+        Templates are immutable and addressed by the hash of their content (see
+        get_template_hash()).
+        """
+
+    @abc.abstractmethod
+    def restore_template(self, template_hash: str) -> bytes | None:
         ...
 
     @abc.abstractmethod
-    def restore_component_template(self, state_addr: StateAddress) -> bytes | None:
+    def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
+    ) -> None:
+        """Associate the component with the hash of its template."""
+
+    @abc.abstractmethod
+    def restore_component_template_hash(self, state_addr: StateAddress) -> str | None:
         ...
 
     @abc.abstractmethod
@@ -51,69 +79,466 @@ class IStateStore(abc.ABC):
     def clear_all_sessions(self) -> None:
         ...
 
+    def save_component_template(
+        self, state_addr: StateAddress, html_bytes: bytes
+    ) -> None:
+        """Save the template globally and associate the component with it."""
+        template_hash = get_template_hash(html_bytes)
+        self.save_template(template_hash, html_bytes)
+        self.save_component_template_hash(state_addr, template_hash)
+
+    def restore_component_template(self, state_addr: StateAddress) -> bytes | None:
+        template_hash = self.restore_component_template_hash(state_addr)
+        if template_hash is None:
+            return None
+        return self.restore_template(template_hash)
+
+    # Bulk operations. The default implementations fall back to single-address
+    # methods. Stores are encouraged to override them with more efficient ones.
+    # Restore methods omit missing addresses from the result.
+
+    def save_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        for state_addr, raw_state in raw_states.items():
+            self.save_state(state_addr, raw_state)
+
+    def restore_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return _restore_each(self.restore_state, state_addrs)
+
+    def save_contexts(self, raw_contexts: Mapping[StateAddress, bytes]) -> None:
+        for state_addr, raw_context in raw_contexts.items():
+            self.save_context(state_addr, raw_context)
+
+    def restore_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return _restore_each(self.restore_context, state_addrs)
+
+    def save_component_template_hashes(
+        self, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        for state_addr, template_hash in template_hashes.items():
+            self.save_component_template_hash(state_addr, template_hash)
+
+    def restore_component_template_hashes(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        return _restore_each(self.restore_component_template_hash, state_addrs)
+
+    def save_batch(
+        self,
+        raw_states: Mapping[StateAddress, bytes],
+        raw_contexts: Mapping[StateAddress, bytes],
+        template_hashes: Mapping[StateAddress, str],
+    ) -> None:
+        """Save states, contexts and component template hashes together.
+
+        Used to flush the writes, buffered by the unit of work.
+        """
+        self.save_states(raw_states)
+        self.save_contexts(raw_contexts)
+        self.save_component_template_hashes(template_hashes)
+
+    # Deserialized states with their version stamps (see get_state_version()).
+    # StateManager loads states with these methods, and reports the states it has
+    # saved, so that stores can keep deserialized objects and skip the serializer
+    # (see TieredStateStore). By default, states are restored as raw bytes and
+    # deserialized every time.
+
+    def restore_versioned_state(
+        self, state_addr: StateAddress, deserialize: Callable[[bytes], Any]
+    ) -> tuple[Any, bytes] | None:
+        raw_state = self.restore_state(state_addr)
+        if raw_state is None:
+            return None
+        return deserialize(raw_state), get_state_version(raw_state)
+
+    def restore_versioned_states(
+        self,
+        state_addrs: Iterable[StateAddress],
+        deserialize_many: DeserializeMany,
+    ) -> dict[StateAddress, tuple[Any, bytes]]:
+        raw_states = self.restore_states(state_addrs)
+        states = deserialize_many(raw_states)
+        return {
+            state_addr: (states[state_addr], get_state_version(raw_state))
+            for state_addr, raw_state in raw_states.items()
+        }
+
+    def remember_versioned_states(
+        self, versioned_states: Mapping[StateAddress, tuple[Any, bytes]]
+    ) -> None:
+        """Called after the states have been saved, or found unchanged.
+
+        The objects are not used by the caller anymore.
+        """
+        pass
+
+    def remember_raw_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        """Called after the states have been saved by a caller that keeps the objects.
+
+        The caller can change the objects after that, so only the raw states are
+        passed.
+        """
+        pass
+
+    def restore_state_versions(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes] | None:
+        """Return version stamps of stored states, see get_state_version().
+
+        Return None if the store doesn't track versions.
+        """
+        return None
+
+    def touch_states(self, state_addrs: Iterable[StateAddress]) -> None:
+        """Reset the TTL of stored states.
+
+        Called instead of saving states that haven't changed.
+        """
+        pass
+
+    # Blobs, large values of states, stored apart from them (see Blob). They are
+    # shared by all sessions, and addressed by the hash of their content. The
+    # default implementation doesn't support them.
+
+    def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        """Save pickled blob values by their hashes, and reset their TTL.
+
+        Values, passed as None, have been saved before, and only their TTL is reset.
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support blobs")
+
+    def restore_blob(self, blob_hash: str) -> bytes | None:
+        raise NotImplementedError(f"{type(self).__name__} doesn't support blobs")
+
+    # Command sequence numbers, used to skip commands, superseded by newer ones.
+    # The default implementation doesn't track them, and every command is the
+    # latest one.
+
+    def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        """Remember the sequence number of a component command, if it's the greatest.
+
+        Return False if a command with a greater number is already registered.
+        """
+        return True
+
+    def restore_command_seq(self, state_addr: StateAddress) -> int | None:
+        """Return the greatest registered command sequence number."""
+        return None
+
+
+class _MemorySession:
+    """Values of one session, stored by MemoryStateStore."""
+
+    def __init__(self, expires_at: float):
+        self.lock = threading.Lock()
+        self.states: dict[str, bytes] = {}
+        self.contexts: dict[str, bytes] = {}
+        self.template_hashes: dict[str, str] = {}
+        self.command_seqs: dict[str, int] = {}
+        self.expires_at = expires_at
+        # Total length of stored values
+        self.size = 0
+        # Set when the session is removed from the store
+        self.removed = False
+
 
 class MemoryStateStore(IStateStore):
-    """In-memory state store. Suitable for tests."""
+    """In-process state store.
 
-    def __init__(self):
-        self._store: dict[StateAddress, bytes] = {}
-        self._context: dict[StateAddress, bytes] = {}
-        self._components: dict[StateAddress, bytes] = {}
+    Suitable for tests and single-process deployments. Values are indexed by
+    session, and sessions expire like in RedisStateStore.
+
+    Args:
+        ttl: Time-to-live for sessions. Each time the session is accessed, the TTL
+            is reset.
+        ttl_gc: Time-to-live for sessions, scheduled for deletion with
+            clear_session().
+        max_bytes: If set, least recently used sessions are evicted when the total
+            size of stored values exceeds this budget. The most recently used
+            session is never evicted. Blobs, shared by sessions, are not counted.
+
+    The store is thread-safe. The session index is guarded by one lock, and values
+    of each session by a lock of their own.
+    """
+
+    def __init__(
+        self,
+        ttl: datetime.timedelta = datetime.timedelta(days=1),
+        ttl_gc: datetime.timedelta = datetime.timedelta(hours=1),
+        max_bytes: int | None = None,
+    ):
+        self.ttl = ttl
+        self.ttl_gc = ttl_gc
+        self.max_bytes = max_bytes
+        # Sessions in the least recently used order
+        self._sessions: OrderedDict[str, _MemorySession] = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        self._size = 0
+        self._templates: dict[str, bytes] = {}
+        # Pickled blob values with the time they expire at, by their hashes
+        self._blobs: dict[str, tuple[float, bytes]] = {}
+        self._blobs_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total size of stored session values in bytes."""
+        return self._size
 
     def session_exists(self, session_id: str) -> bool:
-        return any(
-            state_addr.session_id == session_id for state_addr in self._store.keys()
-        )
+        session = self._get_session(session_id, touch=False)
+        return session is not None and bool(session.states)
 
     def component_initialized(self, state_addr: StateAddress) -> bool:
-        return state_addr in self._store
+        session = self._get_session(state_addr.session_id, touch=False)
+        return session is not None and state_addr.component_id in session.states
 
     def save_state(self, state_addr: StateAddress, raw_state: bytes) -> None:
-        self._store[state_addr] = raw_state
+        self._save_values("states", {state_addr: raw_state})
 
     def restore_state(self, state_addr: StateAddress) -> bytes | None:
-        return self._store.get(state_addr)
+        return self._restore_values("states", [state_addr]).get(state_addr)
 
     def save_context(self, state_addr: StateAddress, raw_context: bytes) -> None:
-        self._context[state_addr] = raw_context
+        self._save_values("contexts", {state_addr: raw_context})
 
     def restore_context(self, state_addr: StateAddress) -> bytes | None:
-        return self._context.get(state_addr)
+        return self._restore_values("contexts", [state_addr]).get(state_addr)
 
-    def save_component_template(
-        self, state_addr: StateAddress, html_bytes: bytes
+    def save_template(self, template_hash: str, html_bytes: bytes) -> None:
+        self._templates[template_hash] = html_bytes
+
+    def restore_template(self, template_hash: str) -> bytes | None:
+        return self._templates.get(template_hash)
+
+    def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
     ) -> None:
-        self._components[state_addr] = html_bytes
+        self._save_values("template_hashes", {state_addr: template_hash})
 
-    def restore_component_template(self, state_addr: StateAddress) -> bytes | None:
-        return self._components.get(state_addr)
+    def restore_component_template_hash(self, state_addr: StateAddress) -> str | None:
+        return self._restore_values("template_hashes", [state_addr]).get(state_addr)
+
+    def save_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        self._save_values("states", raw_states)
+
+    def restore_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return self._restore_values("states", state_addrs)
+
+    def save_contexts(self, raw_contexts: Mapping[StateAddress, bytes]) -> None:
+        self._save_values("contexts", raw_contexts)
+
+    def restore_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return self._restore_values("contexts", state_addrs)
+
+    def save_component_template_hashes(
+        self, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        self._save_values("template_hashes", template_hashes)
+
+    def restore_component_template_hashes(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        return self._restore_values("template_hashes", state_addrs)
+
+    def touch_states(self, state_addrs: Iterable[StateAddress]) -> None:
+        for session_id in {state_addr.session_id for state_addr in state_addrs}:
+            self._get_session(session_id)
+
+    def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        now = self._now()
+        expires_at = now + self.ttl.total_seconds()
+        with self._blobs_lock:
+            # Expired blobs are removed when blobs are saved.
+            for blob_hash, (blob_expires_at, _) in list(self._blobs.items()):
+                if blob_expires_at <= now:
+                    del self._blobs[blob_hash]
+            for blob_hash, raw_value in raw_values.items():
+                if raw_value is None:
+                    if blob_hash not in self._blobs:
+                        continue
+                    raw_value = self._blobs[blob_hash][1]
+                self._blobs[blob_hash] = (expires_at, raw_value)
+
+    def restore_blob(self, blob_hash: str) -> bytes | None:
+        now = self._now()
+        with self._blobs_lock:
+            expires_at, raw_value = self._blobs.get(blob_hash, (now, b""))
+            if expires_at <= now:
+                return None
+            self._blobs[blob_hash] = (now + self.ttl.total_seconds(), raw_value)
+            return raw_value
+
+    def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        session = self._get_or_create_session(state_addr.session_id)
+        with session.lock:
+            latest_seq = session.command_seqs.get(state_addr.component_id)
+            if latest_seq is not None and latest_seq > seq:
+                return False
+            session.command_seqs[state_addr.component_id] = seq
+            return True
+
+    def restore_command_seq(self, state_addr: StateAddress) -> int | None:
+        session = self._get_session(state_addr.session_id)
+        if session is None:
+            return None
+        return session.command_seqs.get(state_addr.component_id)
 
     def clear_session(self, session_id: str) -> None:
-        for state_addr in list(self._store.keys()):
-            if state_addr.session_id == session_id:
-                del self._store[state_addr]
-        for state_addr in list(self._context.keys()):
-            if state_addr.session_id == session_id:
-                del self._context[state_addr]
-        for state_addr in list(self._components.keys()):
-            if state_addr.session_id == session_id:
-                del self._components[state_addr]
+        # Like RedisStateStore, schedule the session for deletion.
+        expires_at = self._now() + self.ttl_gc.total_seconds()
+        with self._sessions_lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.expires_at = min(session.expires_at, expires_at)
 
     def clear_all_sessions(self) -> None:
-        self._store.clear()
-        self._context.clear()
-        self._components.clear()
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.removed = True
+            self._sessions.clear()
+            self._size = 0
+        self._templates.clear()
+        with self._blobs_lock:
+            self._blobs.clear()
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def _get_session(
+        self, session_id: str, touch: bool = True
+    ) -> _MemorySession | None:
+        """Return the session, if it exists and hasn't expired.
+
+        If touch is True, reset the session TTL and mark the session as recently
+        used.
+        """
+        now = self._now()
+        with self._sessions_lock:
+            session = self._find_session(session_id, now)
+            if session is not None and touch:
+                self._touch_session(session_id, session, now)
+            return session
 
+    def _get_or_create_session(self, session_id: str) -> _MemorySession:
+        """Return the session, and create it if it doesn't exist or has expired.
 
-class RedisStateStore(IStateStore):
-    """Redis-based state store.
+        The session TTL is reset, and the session is marked as recently used.
+        """
+        now = self._now()
+        with self._sessions_lock:
+            session = self._find_session(session_id, now)
+            if session is None:
+                session = _MemorySession(expires_at=now)
+                self._sessions[session_id] = session
+            self._touch_session(session_id, session, now)
+            return session
+
+    def _find_session(self, session_id: str, now: float) -> _MemorySession | None:
+        """Return the session, if it hasn't expired. Call with the sessions lock."""
+        self._remove_expired_sessions(now)
+        session = self._sessions.get(session_id)
+        if session is not None and session.expires_at <= now:
+            self._remove_session(session_id)
+            return None
+        return session
+
+    def _touch_session(
+        self, session_id: str, session: _MemorySession, now: float
+    ) -> None:
+        session.expires_at = now + self.ttl.total_seconds()
+        self._sessions.move_to_end(session_id)
+
+    def _save_values(
+        self, field: str, values: Mapping[StateAddress, bytes | str]
+    ) -> None:
+        for session_id, mapping in _group_by_session(values).items():
+            session = self._get_or_create_session(session_id)
+            with session.lock:
+                storage = getattr(session, field)
+                delta = 0
+                for component_id, value in mapping.items():
+                    old_value = storage.get(component_id)
+                    delta += len(value) - (0 if old_value is None else len(old_value))
+                    storage[component_id] = value
+                session.size += delta
+            with self._sessions_lock:
+                # The session might have been evicted in the meantime.
+                if not session.removed:
+                    self._size += delta
+                self._evict()
+
+    def _restore_values(self, field: str, state_addrs: Iterable[StateAddress]) -> dict:
+        ret = {}
+        for session_id, component_ids in _group_component_ids_by_session(
+            state_addrs
+        ).items():
+            session = self._get_session(session_id)
+            if session is None:
+                continue
+            with session.lock:
+                storage = getattr(session, field)
+                for component_id in component_ids:
+                    value = storage.get(component_id)
+                    if value is not None:
+                        state_addr = StateAddress(
+                            session_id=session_id, component_id=component_id
+                        )
+                        ret[state_addr] = value
+        return ret
+
+    def _remove_session(self, session_id: str) -> None:
+        # Must be called with the sessions lock held.
+        session = self._sessions.pop(session_id)
+        session.removed = True
+        self._size -= session.size
+
+    def _remove_expired_sessions(self, now: float) -> None:
+        # Least recently used sessions are the first to expire, unless they were
+        # scheduled for deletion. Those are removed when accessed or evicted.
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            self._remove_session(session_id)
+
+    def _evict(self) -> None:
+        # Must be called with the sessions lock held.
+        if self.max_bytes is None:
+            return
+        while self._size > self.max_bytes and len(self._sessions) > 1:
+            session_id = next(iter(self._sessions))
+            logger.debug("Evicting session %s from the memory store", session_id)
+            self._remove_session(session_id)
+
+
+class BaseRedisStateStore:
+    """Keys and commands, shared by RedisStateStore and AsyncRedisStateStore.
+
+    Both stores use the same keys, so they can be used side by side with the
+    same arguments. Commands are queued to pipelines of the store's client, and
+    executed by the store.
 
     Args:
         redis_url: URL of the Redis server.
         state_prefix: Prefix for keys that store component states.
+        state_versions_prefix: Prefix for keys that store version stamps of
+            component states.
         context_prefix: Prefix for keys that store component contexts.
-        templates_prefix: Prefix for keys that store component templates.
-        template_cache_prefix: Prefix for keys that store cached component templates.
+        templates_prefix: Prefix for keys that map component IDs of the session to
+            the hashes of their templates.
+        template_cache_prefix: Prefix for keys that store component templates,
+            shared by all sessions and addressed by the hash of their content.
+        command_seq_prefix: Prefix for keys that store the greatest sequence numbers
+            of component commands of the session.
+        blob_prefix: Prefix for keys that store blobs, large values of states,
+            shared by all sessions and addressed by the hash of their content.
         ttl: Time-to-live for session keys. Each time the session is accessed, the TTL
             is reset. If the session is not accessed for this time, it is deleted, and
             subsequent accesses will result in a "Session not found" error and a 410
@@ -125,25 +550,194 @@ class RedisStateStore(IStateStore):
             a "clear_session" call. We don't delete the session immediately in case the
             client decides to access the page again when clicking the back button,
             for example.
+        template_ttl: Time-to-live for component templates, shared by all sessions.
+            The TTL is reset when a template is restored. Processes that render a
+            template save it again once per template_resave_interval of
+            StateManager, so the TTL should be longer than that interval. If None,
+            templates never expire.
+        blob_ttl: Time-to-live for blobs. It's reset every time the blob is saved
+            with a state, or restored. By default, it's equal to the session TTL.
     """
 
     def __init__(
         self,
         redis_url: str = "redis://localhost:6379/0",
         state_prefix: str = "lc:states:",
+        state_versions_prefix: str = "lc:state_versions:",
         context_prefix: str = "lc:ctxs:",
         templates_prefix: str = "lc:templates:",
         template_cache_prefix: str = "lc:template_cache:",
+        command_seq_prefix: str = "lc:seqs:",
+        blob_prefix: str = "lc:blobs:",
         ttl: datetime.timedelta = datetime.timedelta(days=1),
         ttl_gc: datetime.timedelta = datetime.timedelta(hours=1),
+        template_ttl: datetime.timedelta | None = datetime.timedelta(days=1),
+        blob_ttl: datetime.timedelta | None = None,
     ):
-        self.client = Redis.from_url(redis_url)  # type: ignore
+        self.redis_url = redis_url
         self.key_prefix = state_prefix
+        self.state_versions_prefix = state_versions_prefix
         self.context_prefix = context_prefix
         self.templates_prefix = templates_prefix
         self.template_cache_prefix = template_cache_prefix
+        self.command_seq_prefix = command_seq_prefix
+        self.blob_prefix = blob_prefix
         self.ttl = ttl
         self.ttl_gc = ttl_gc
+        self.template_ttl = template_ttl
+        self.blob_ttl = blob_ttl or ttl
+
+    def _queue_save_by_prefix(
+        self, pipe: AnyPipeline, state_addr: StateAddress, prefix: str, raw_value: bytes
+    ) -> None:
+        key_name = self._get_key_name(prefix, state_addr.session_id)
+        pipe.hset(key_name, state_addr.component_id, raw_value)
+        pipe.expire(key_name, self.ttl)
+
+    def _queue_restore_by_prefix(
+        self, pipe: AnyPipeline, state_addr: StateAddress, prefix: str
+    ) -> None:
+        """Queue restoring the value. It's the first result of the pipeline."""
+        key_name = self._get_key_name(prefix, state_addr.session_id)
+        pipe.hget(key_name, state_addr.component_id)
+        pipe.expire(key_name, self.ttl)
+
+    def _queue_save_many_by_prefix(
+        self, pipe: AnyPipeline, raw_values: Mapping[StateAddress, bytes], prefix: str
+    ) -> None:
+        """Queue saving values for multiple addresses with one HSET per session."""
+        for session_id, mapping in _group_by_session(raw_values).items():
+            key_name = self._get_key_name(prefix, session_id)
+            # Component IDs are valid field names, and values are raw bytes.
+            pipe.hset(key_name, mapping=cast(Mapping[str | bytes, bytes], mapping))
+            pipe.expire(key_name, self.ttl)
+
+    def _queue_restore_many_by_prefix(
+        self, pipe: AnyPipeline, state_addrs: Iterable[StateAddress], prefix: str
+    ) -> dict[str, list[str]]:
+        """Queue restoring values for multiple addresses with one HMGET per session.
+
+        Return the queued component IDs by session ID. Pass them to
+        _parse_restored_many() with the results of the pipeline.
+        """
+        component_ids_by_session = _group_component_ids_by_session(state_addrs)
+        for session_id, component_ids in component_ids_by_session.items():
+            key_name = self._get_key_name(prefix, session_id)
+            pipe.hmget(key_name, component_ids)
+            pipe.expire(key_name, self.ttl)
+        return component_ids_by_session
+
+    @staticmethod
+    def _parse_restored_many(
+        component_ids_by_session: dict[str, list[str]], results: list[Any]
+    ) -> dict[StateAddress, bytes]:
+        """Convert HMGET results, one per session, to values keyed by addresses."""
+        ret: dict[StateAddress, bytes] = {}
+        for (session_id, component_ids), raw_values in zip(
+            component_ids_by_session.items(), results[::2]
+        ):
+            for component_id, raw_value in zip(component_ids, raw_values):
+                if raw_value is not None:
+                    state_addr = StateAddress(
+                        session_id=session_id, component_id=component_id
+                    )
+                    ret[state_addr] = raw_value
+        return ret
+
+    def _queue_save_states(
+        self, pipe: AnyPipeline, raw_states: Mapping[StateAddress, bytes]
+    ) -> None:
+        """Queue saving states together with their version stamps."""
+        self._queue_save_many_by_prefix(pipe, raw_states, self.key_prefix)
+        self._queue_save_many_by_prefix(
+            pipe, _get_state_versions(raw_states), self.state_versions_prefix
+        )
+
+    def _queue_save_component_template_hashes(
+        self, pipe: AnyPipeline, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        self._queue_save_many_by_prefix(
+            pipe, _encode_template_hashes(template_hashes), self.templates_prefix
+        )
+
+    @staticmethod
+    def _decode_template_hashes(
+        hashed_values: Mapping[StateAddress, bytes]
+    ) -> dict[StateAddress, str]:
+        return {
+            state_addr: hashed_value.decode("ascii")
+            for state_addr, hashed_value in hashed_values.items()
+        }
+
+    def _queue_save_batch(
+        self,
+        pipe: AnyPipeline,
+        raw_states: Mapping[StateAddress, bytes],
+        raw_contexts: Mapping[StateAddress, bytes],
+        template_hashes: Mapping[StateAddress, str],
+    ) -> None:
+        self._queue_save_states(pipe, raw_states)
+        self._queue_save_many_by_prefix(pipe, raw_contexts, self.context_prefix)
+        self._queue_save_component_template_hashes(pipe, template_hashes)
+
+    def _queue_touch_states(
+        self, pipe: AnyPipeline, state_addrs: Iterable[StateAddress]
+    ) -> bool:
+        """Queue resetting the TTL of states. Return False if nothing was queued."""
+        session_ids = {state_addr.session_id for state_addr in state_addrs}
+        for session_id in session_ids:
+            for prefix in (self.key_prefix, self.state_versions_prefix):
+                pipe.expire(self._get_key_name(prefix, session_id), self.ttl)
+        return bool(session_ids)
+
+    def _queue_save_blobs(
+        self, pipe: AnyPipeline, raw_values: Mapping[str, bytes | None]
+    ) -> None:
+        for blob_hash, raw_value in raw_values.items():
+            key_name = self._get_key_name(self.blob_prefix, blob_hash)
+            if raw_value is None:
+                pipe.expire(key_name, self.blob_ttl)
+            else:
+                pipe.set(key_name, raw_value, ex=self.blob_ttl)
+
+    def _queue_clear_session(self, pipe: AnyPipeline, session_id: str) -> None:
+        # Instead of deleting the keys, we set a TTL for garbage collection.
+        for prefix in (
+            self.key_prefix,
+            self.state_versions_prefix,
+            self.templates_prefix,
+            self.command_seq_prefix,
+        ):
+            pipe.expire(self._get_key_name(prefix, session_id), self.ttl_gc)
+
+    def _queue_register_command_seq(
+        self, pipe: AnyPipeline, state_addr: StateAddress, seq: int
+    ) -> None:
+        """Queue registering the sequence number.
+
+        The second result of the pipeline is the greatest registered one.
+        """
+        key_name = self._get_key_name(self.command_seq_prefix, state_addr.session_id)
+        # Sequence numbers are stored in a sorted set, and ZADD GT only
+        # updates the score if the new one is greater.
+        pipe.zadd(key_name, {state_addr.component_id: seq}, gt=True)
+        pipe.zscore(key_name, state_addr.component_id)
+        pipe.expire(key_name, self.ttl)
+
+    @staticmethod
+    def _get_key_name(key_prefix: str, session_id: str) -> str:
+        return f"{key_prefix}{session_id}"
+
+
+class RedisStateStore(BaseRedisStateStore, IStateStore):
+    """Redis-based state store.
+
+    See BaseRedisStateStore for the arguments.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.client = Redis.from_url(self.redis_url)  # type: ignore
 
     def session_exists(self, session_id: str) -> bool:
         key_name = self._get_key_name(self.key_prefix, session_id)
@@ -154,7 +748,7 @@ class RedisStateStore(IStateStore):
         return self.client.hexists(key_name, state_addr.component_id)
 
     def save_state(self, state_addr: StateAddress, raw_state: bytes) -> None:
-        return self._save_by_prefix(state_addr, self.key_prefix, raw_state)
+        return self.save_states({state_addr: raw_state})
 
     def restore_state(self, state_addr: StateAddress) -> bytes | None:
         return self._restore_by_prefix(state_addr, self.key_prefix)
@@ -165,71 +759,209 @@ class RedisStateStore(IStateStore):
     def restore_context(self, state_addr: StateAddress) -> bytes | None:
         return self._restore_by_prefix(state_addr, self.context_prefix)
 
+    def save_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        if not raw_states:
+            return
+        with self.client.pipeline() as pipe:
+            self._queue_save_states(pipe, raw_states)
+            pipe.execute()
+
+    def restore_state_versions(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return self._restore_many_by_prefix(state_addrs, self.state_versions_prefix)
+
+    def restore_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return self._restore_many_by_prefix(state_addrs, self.key_prefix)
+
+    def touch_states(self, state_addrs: Iterable[StateAddress]) -> None:
+        with self.client.pipeline() as pipe:
+            if self._queue_touch_states(pipe, state_addrs):
+                pipe.execute()
+
+    def save_contexts(self, raw_contexts: Mapping[StateAddress, bytes]) -> None:
+        if not raw_contexts:
+            return
+        with self.client.pipeline() as pipe:
+            self._queue_save_many_by_prefix(pipe, raw_contexts, self.context_prefix)
+            pipe.execute()
+
+    def restore_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return self._restore_many_by_prefix(state_addrs, self.context_prefix)
+
     def _save_by_prefix(
-        self, state_addr: StateAddress, prefix: str, raw_state: bytes
+        self, state_addr: StateAddress, prefix: str, raw_value: bytes
     ) -> None:
-        key_name = self._get_key_name(prefix, state_addr.session_id)
         with self.client.pipeline() as pipe:
-            pipe.hset(key_name, state_addr.component_id, raw_state)
-            pipe.expire(key_name, self.ttl)
+            self._queue_save_by_prefix(pipe, state_addr, prefix, raw_value)
             pipe.execute()
 
     def _restore_by_prefix(self, state_addr: StateAddress, prefix: str) -> bytes | None:
-        key_name = self._get_key_name(prefix, state_addr.session_id)
         with self.client.pipeline() as pipe:
-            pipe.hget(key_name, state_addr.component_id)
-            pipe.expire(key_name, self.ttl)
-            raw_state, _ = pipe.execute()
-        return raw_state
+            self._queue_restore_by_prefix(pipe, state_addr, prefix)
+            raw_value, _ = pipe.execute()
+        return raw_value
 
-    def save_component_template(
-        self, state_addr: StateAddress, html_bytes: bytes
-    ) -> None:
+    def _restore_many_by_prefix(
+        self, state_addrs: Iterable[StateAddress], prefix: str
+    ) -> dict[StateAddress, bytes]:
+        with self.client.pipeline() as pipe:
+            component_ids_by_session = self._queue_restore_many_by_prefix(
+                pipe, state_addrs, prefix
+            )
+            if not component_ids_by_session:
+                return {}
+            results = pipe.execute()
+        return self._parse_restored_many(component_ids_by_session, results)
+
+    def save_template(self, template_hash: str, html_bytes: bytes) -> None:
         """Save serialized LiveComponentNode to Redis.
 
-        Because live component nodes repeat themselves often, we cache them
-        separately to avoid storing the same data multiple times.
+        Because live component nodes repeat themselves often, we store them once,
+        independently of sessions, and keep only their hashes in sessions.
         """
-        hashed_value = self._get_hashed_value(html_bytes)
-        cache_key = self._get_key_name(self.template_cache_prefix, hashed_value)
-        nodes_key = self._get_key_name(self.templates_prefix, state_addr.session_id)
+        cache_key = self._get_key_name(self.template_cache_prefix, template_hash)
+        self.client.set(cache_key, html_bytes, ex=self.template_ttl)
+
+    def restore_template(self, template_hash: str) -> bytes | None:
+        cache_key = self._get_key_name(self.template_cache_prefix, template_hash)
+        if self.template_ttl is None:
+            return self.client.get(cache_key)
+        return self.client.getex(cache_key, ex=self.template_ttl)
+
+    def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        if not raw_values:
+            return
         with self.client.pipeline() as pipe:
-            pipe.set(cache_key, html_bytes)
-            pipe.expire(cache_key, self.ttl)
-
-            pipe.hset(nodes_key, state_addr.component_id, hashed_value)
-            pipe.expire(nodes_key, self.ttl)
+            self._queue_save_blobs(pipe, raw_values)
             pipe.execute()
 
-    def restore_component_template(self, state_addr: StateAddress) -> bytes | None:
-        templates_key = self._get_key_name(self.templates_prefix, state_addr.session_id)
-        with self.client.pipeline() as pipe:
-            pipe.hget(templates_key, state_addr.component_id)
-            pipe.expire(templates_key, self.ttl)
-            hashed_value, _ = pipe.execute()
+    def restore_blob(self, blob_hash: str) -> bytes | None:
+        key_name = self._get_key_name(self.blob_prefix, blob_hash)
+        return self.client.getex(key_name, ex=self.blob_ttl)
+
+    def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
+    ) -> None:
+        return self._save_by_prefix(
+            state_addr, self.templates_prefix, template_hash.encode("ascii")
+        )
+
+    def restore_component_template_hash(self, state_addr: StateAddress) -> str | None:
+        hashed_value = self._restore_by_prefix(state_addr, self.templates_prefix)
         if hashed_value is None:
             return None
-        cache_key = self._get_key_name(
-            self.template_cache_prefix, hashed_value.decode("ascii")
-        )
-        return self.client.get(cache_key)
+        return hashed_value.decode("ascii")
+
+    def save_component_template_hashes(
+        self, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        if not template_hashes:
+            return
+        with self.client.pipeline() as pipe:
+            self._queue_save_component_template_hashes(pipe, template_hashes)
+            pipe.execute()
+
+    def restore_component_template_hashes(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        hashed_values = self._restore_many_by_prefix(state_addrs, self.templates_prefix)
+        return self._decode_template_hashes(hashed_values)
+
+    def save_batch(
+        self,
+        raw_states: Mapping[StateAddress, bytes],
+        raw_contexts: Mapping[StateAddress, bytes],
+        template_hashes: Mapping[StateAddress, str],
+    ) -> None:
+        """Save states, contexts and component template hashes in one pipeline."""
+        if not (raw_states or raw_contexts or template_hashes):
+            return
+        with self.client.pipeline() as pipe:
+            self._queue_save_batch(pipe, raw_states, raw_contexts, template_hashes)
+            pipe.execute()
 
     def clear_session(self, session_id: str) -> None:
         with self.client.pipeline() as pipe:
-            # Instead of deleting the keys, we set a TTL for garbage collection.
-            pipe.expire(self._get_key_name(self.key_prefix, session_id), self.ttl_gc)
-            pipe.expire(
-                self._get_key_name(self.templates_prefix, session_id), self.ttl_gc
-            )
+            self._queue_clear_session(pipe, session_id)
             pipe.execute()
 
     def clear_all_sessions(self) -> None:
         self.client.flushdb()
 
-    @staticmethod
-    def _get_key_name(key_prefix: str, session_id: str) -> str:
-        return f"{key_prefix}{session_id}"
-
-    @staticmethod
-    def _get_hashed_value(value: bytes) -> str:
-        return base64.urlsafe_b64encode(hashlib.md5(value).digest()).decode("ascii")[:8]
+    def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        with self.client.pipeline() as pipe:
+            self._queue_register_command_seq(pipe, state_addr, seq)
+            _, latest_seq, _ = pipe.execute()
+        return latest_seq == seq
+
+    def restore_command_seq(self, state_addr: StateAddress) -> int | None:
+        key_name = self._get_key_name(self.command_seq_prefix, state_addr.session_id)
+        latest_seq = self.client.zscore(key_name, state_addr.component_id)
+        return None if latest_seq is None else int(latest_seq)
+
+
+def get_template_hash(html_bytes: bytes) -> str:
+    """Return a short content hash, used to address component templates."""
+    return base64.urlsafe_b64encode(hashlib.md5(html_bytes).digest()).decode("ascii")[
+        :8
+    ]
+
+
+def get_state_version(raw_state: bytes) -> bytes:
+    """Return the version stamp of a serialized state, a digest of its content."""
+    return hashlib.blake2b(raw_state, digest_size=16).digest()
+
+
+def _get_state_versions(
+    raw_states: Mapping[StateAddress, bytes]
+) -> dict[StateAddress, bytes]:
+    return {
+        state_addr: get_state_version(raw_state)
+        for state_addr, raw_state in raw_states.items()
+    }
+
+
+def _restore_each(
+    restore: Callable[[StateAddress], T | None],
+    state_addrs: Iterable[StateAddress],
+) -> dict[StateAddress, T]:
+    ret: dict[StateAddress, T] = {}
+    for state_addr in state_addrs:
+        raw_value = restore(state_addr)
+        if raw_value is not None:
+            ret[state_addr] = raw_value
+    return ret
+
+
+def _encode_template_hashes(
+    template_hashes: Mapping[StateAddress, str]
+) -> dict[StateAddress, bytes]:
+    return {
+        state_addr: template_hash.encode("ascii")
+        for state_addr, template_hash in template_hashes.items()
+    }
+
+
+def _group_by_session(values: Mapping[StateAddress, T]) -> dict[str, dict[str, T]]:
+    """Group values by session ID, and key them by component ID."""
+    grouped: dict[str, dict[str, T]] = defaultdict(dict)
+    for state_addr, value in values.items():
+        grouped[state_addr.session_id][state_addr.component_id] = value
+    return grouped
+
+
+def _group_component_ids_by_session(
+    state_addrs: Iterable[StateAddress],
+) -> dict[str, list[str]]:
+    """Group unique component IDs by session ID, preserving the order."""
+    grouped: dict[str, dict[str, None]] = defaultdict(dict)
+    for state_addr in state_addrs:
+        grouped[state_addr.session_id][state_addr.component_id] = None
+    return {
+        session_id: list(component_ids) for session_id, component_ids in grouped.items()
+    }
@@ -0,0 +1,32 @@
+from functools import cache
+
+from livecomponents.manager.stores import get_template_hash
+
+
+class TemplateRegistry:
+    """Process-wide registry of raw component templates, addressed by hash.
+
+    LiveComponentNode registers its template when the Django template is parsed.
+    Entries are immutable, so templates that this process hasn't parsed itself
+    but fetched from the store, are kept here as well.
+    """
+
+    def __init__(self):
+        self._templates: dict[str, str] = {}
+
+    def register(self, html: str) -> str:
+        """Register the template and return its hash."""
+        template_hash = get_template_hash(html.encode("utf-8"))
+        self._templates.setdefault(template_hash, html)
+        return template_hash
+
+    def add(self, template_hash: str, html: str) -> None:
+        self._templates.setdefault(template_hash, html)
+
+    def get(self, template_hash: str) -> str | None:
+        return self._templates.get(template_hash)
+
+
+@cache
+def get_template_registry() -> TemplateRegistry:
+    return TemplateRegistry()
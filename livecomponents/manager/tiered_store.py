@@ -0,0 +1,274 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, NamedTuple
+
+from django.utils.module_loading import import_string
+
+from livecomponents.manager.stores import (
+    DeserializeMany,
+    IStateStore,
+    get_state_version,
+)
+from livecomponents.types import StateAddress
+
+
+class _RawState(NamedTuple):
+    """Cached raw state of an object, kept by the caller that has saved it."""
+
+    raw_state: bytes
+
+
+class TieredStateStore(IStateStore):
+    """In-process cache of deserialized states (L1) in front of another store (L2).
+
+    Saved states are kept in the cache together with the version stamp of their
+    serialized form. When a state is restored, the cached version is compared with
+    the stored one, and if they match, the cached object is returned without
+    deserializing the state. Stores that track versions (like RedisStateStore)
+    return them without transferring the states. For other stores, states are
+    fetched, and their version stamps are calculated locally.
+
+    A cached object is handed out only once: it's removed from the cache when
+    restored, and comes back when the unit of work that restored it saves it
+    again. Commands modify states in place, so sharing an object between requests
+    would leak unsaved changes, and states that the unit of work hasn't saved are
+    not put back, because they may have been changed without being saved. For the
+    same reason, states saved outside a unit of work are cached serialized: their
+    callers keep the objects. They are deserialized when restored, but aren't
+    fetched from the wrapped store.
+
+    Args:
+        store: Wrapped store or its class configuration, a dict with "cls" and
+            optional "config" keys.
+        max_size: Maximum number of cached states.
+        verify_versions: If False, cached states are returned without checking
+            stored versions, and restoring them doesn't leave the process. It's
+            only safe if every session is served by one process (for example,
+            with sticky load balancing), so that no other process changes them.
+    """
+
+    def __init__(
+        self,
+        store: IStateStore | dict,
+        max_size: int = 1024,
+        verify_versions: bool = True,
+    ):
+        if isinstance(store, dict):
+            self.store: IStateStore = import_string(store["cls"])(
+                **store.get("config", {})
+            )
+        else:
+            self.store = store
+        self.max_size = max_size
+        self.verify_versions = verify_versions
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[StateAddress, tuple[bytes, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def restore_versioned_state(
+        self, state_addr: StateAddress, deserialize: Callable[[bytes], Any]
+    ) -> tuple[Any, bytes] | None:
+        return self.restore_versioned_states(
+            [state_addr],
+            lambda raw_states: {
+                addr: deserialize(raw_state) for addr, raw_state in raw_states.items()
+            },
+        ).get(state_addr)
+
+    def restore_versioned_states(
+        self,
+        state_addrs: Iterable[StateAddress],
+        deserialize_many: DeserializeMany,
+    ) -> dict[StateAddress, tuple[Any, bytes]]:
+        state_addrs = list(state_addrs)
+        cached = self._checkout(state_addrs)
+        states: dict[StateAddress, tuple[Any, bytes]] = {}
+        raw_states: dict[StateAddress, bytes] = {}
+        if cached and self.verify_versions:
+            stored_versions = self.store.restore_state_versions(cached.keys())
+            if stored_versions is None:
+                raw_states = self.store.restore_states(cached.keys())
+                stored_versions = {
+                    state_addr: get_state_version(raw_state)
+                    for state_addr, raw_state in raw_states.items()
+                }
+            for state_addr, (version, state) in cached.items():
+                if stored_versions.get(state_addr) == version:
+                    states[state_addr] = (state, version)
+        else:
+            states = {
+                state_addr: (state, version)
+                for state_addr, (version, state) in cached.items()
+            }
+
+        missing = [
+            state_addr
+            for state_addr in state_addrs
+            if state_addr not in states and state_addr not in raw_states
+        ]
+        if missing:
+            raw_states.update(self.store.restore_states(missing))
+        with self._lock:
+            self.hits += len(states)
+            self.misses += len(state_addrs) - len(states)
+        raw_states = {
+            state_addr: raw_state
+            for state_addr, raw_state in raw_states.items()
+            if state_addr not in states
+        }
+        for state_addr, (state, _) in list(states.items()):
+            if type(state) is _RawState:
+                raw_states[state_addr] = state.raw_state
+                del states[state_addr]
+        for state_addr, state in deserialize_many(raw_states).items():
+            states[state_addr] = (state, get_state_version(raw_states[state_addr]))
+        return states
+
+    def remember_versioned_states(
+        self, versioned_states: Mapping[StateAddress, tuple[Any, bytes]]
+    ) -> None:
+        self._remember(
+            (state_addr, version, state)
+            for state_addr, (state, version) in versioned_states.items()
+        )
+        self.store.remember_versioned_states(versioned_states)
+
+    def remember_raw_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        self._remember(
+            (state_addr, get_state_version(raw_state), _RawState(raw_state))
+            for state_addr, raw_state in raw_states.items()
+        )
+        self.store.remember_raw_states(raw_states)
+
+    def _remember(self, entries: Iterable[tuple[StateAddress, bytes, Any]]) -> None:
+        with self._lock:
+            for state_addr, version, state in entries:
+                self._cache[state_addr] = (version, state)
+                self._cache.move_to_end(state_addr)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def _checkout(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, tuple[bytes, Any]]:
+        """Remove states from the cache and return them."""
+        with self._lock:
+            return {
+                state_addr: self._cache.pop(state_addr)
+                for state_addr in state_addrs
+                if state_addr in self._cache
+            }
+
+    def _invalidate(self, state_addrs: Iterable[StateAddress]) -> None:
+        with self._lock:
+            for state_addr in state_addrs:
+                self._cache.pop(state_addr, None)
+
+    def _invalidate_session(self, session_id: str) -> None:
+        with self._lock:
+            for state_addr in list(self._cache):
+                if state_addr.session_id == session_id:
+                    del self._cache[state_addr]
+
+    # Methods below delegate to the wrapped store. Saved raw states invalidate
+    # cached ones. StateManager puts them back with remember_versioned_states().
+
+    def session_exists(self, session_id: str) -> bool:
+        return self.store.session_exists(session_id)
+
+    def component_initialized(self, state_addr: StateAddress) -> bool:
+        return self.store.component_initialized(state_addr)
+
+    def save_state(self, state_addr: StateAddress, raw_state: bytes) -> None:
+        self._invalidate([state_addr])
+        self.store.save_state(state_addr, raw_state)
+
+    def restore_state(self, state_addr: StateAddress) -> bytes | None:
+        return self.store.restore_state(state_addr)
+
+    def save_context(self, state_addr: StateAddress, raw_context: bytes) -> None:
+        self.store.save_context(state_addr, raw_context)
+
+    def restore_context(self, state_addr: StateAddress) -> bytes | None:
+        return self.store.restore_context(state_addr)
+
+    def save_template(self, template_hash: str, html_bytes: bytes) -> None:
+        self.store.save_template(template_hash, html_bytes)
+
+    def restore_template(self, template_hash: str) -> bytes | None:
+        return self.store.restore_template(template_hash)
+
+    def save_component_template_hash(
+        self, state_addr: StateAddress, template_hash: str
+    ) -> None:
+        self.store.save_component_template_hash(state_addr, template_hash)
+
+    def restore_component_template_hash(self, state_addr: StateAddress) -> str | None:
+        return self.store.restore_component_template_hash(state_addr)
+
+    def clear_session(self, session_id: str) -> None:
+        self._invalidate_session(session_id)
+        self.store.clear_session(session_id)
+
+    def clear_all_sessions(self) -> None:
+        with self._lock:
+            self._cache.clear()
+        self.store.clear_all_sessions()
+
+    def save_states(self, raw_states: Mapping[StateAddress, bytes]) -> None:
+        self._invalidate(raw_states)
+        self.store.save_states(raw_states)
+
+    def restore_states(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return self.store.restore_states(state_addrs)
+
+    def save_contexts(self, raw_contexts: Mapping[StateAddress, bytes]) -> None:
+        self.store.save_contexts(raw_contexts)
+
+    def restore_contexts(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes]:
+        return self.store.restore_contexts(state_addrs)
+
+    def save_component_template_hashes(
+        self, template_hashes: Mapping[StateAddress, str]
+    ) -> None:
+        self.store.save_component_template_hashes(template_hashes)
+
+    def restore_component_template_hashes(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, str]:
+        return self.store.restore_component_template_hashes(state_addrs)
+
+    def save_batch(
+        self,
+        raw_states: Mapping[StateAddress, bytes],
+        raw_contexts: Mapping[StateAddress, bytes],
+        template_hashes: Mapping[StateAddress, str],
+    ) -> None:
+        self._invalidate(raw_states)
+        self.store.save_batch(raw_states, raw_contexts, template_hashes)
+
+    def restore_state_versions(
+        self, state_addrs: Iterable[StateAddress]
+    ) -> dict[StateAddress, bytes] | None:
+        return self.store.restore_state_versions(state_addrs)
+
+    def touch_states(self, state_addrs: Iterable[StateAddress]) -> None:
+        self.store.touch_states(state_addrs)
+
+    def save_blobs(self, raw_values: Mapping[str, bytes | None]) -> None:
+        self.store.save_blobs(raw_values)
+
+    def restore_blob(self, blob_hash: str) -> bytes | None:
+        return self.store.restore_blob(blob_hash)
+
+    def register_command_seq(self, state_addr: StateAddress, seq: int) -> bool:
+        return self.store.register_command_seq(state_addr, seq)
+
+    def restore_command_seq(self, state_addr: StateAddress) -> int | None:
+        return self.store.restore_command_seq(state_addr)
@@ -0,0 +1,139 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from django.db.models import Model
+
+from livecomponents.types import StateAddress
+
+
+class UnitOfWork:
+    """Request-scoped identity map of component states and write buffer.
+
+    Within a unit of work, each component state is fetched from the store and
+    deserialized at most once. Every subsequent lookup returns the same object.
+    States, modified with set_component_state(), are marked as dirty and written
+    back to the store in one go when the unit of work is flushed.
+
+    A state, stored as None, means that we already looked it up and found nothing.
+
+    Version stamps of loaded and saved states are kept too. When the unit of work is
+    flushed, dirty states whose serialized form matches the version they were
+    loaded with are not written again.
+
+    Django models, restored as parts of states, are kept in an identity map too,
+    so that states that refer to the same model share one instance of it, and the
+    model is fetched from the database once.
+
+    Serialized contexts and component template hashes are buffered the same way, so
+    that a page render writes everything to the store at once. Reads are served from
+    the buffer first.
+
+    The unit of work can be shared by threads, rendering components in parallel.
+    It relies on atomic dict and set operations, and never replaces a loaded state
+    with another copy of it.
+    """
+
+    def __init__(self):
+        self.states: dict[StateAddress, Any] = {}
+        self.dirty: set[StateAddress] = set()
+        self.versions: dict[StateAddress, bytes] = {}
+        # Versions of the fields of states, restored from their fields, by field
+        # name. The versions of these states are the ones of their headers.
+        self.field_versions: dict[StateAddress, dict[str, bytes]] = {}
+        self.contexts: dict[StateAddress, bytes] = {}
+        self.template_hashes: dict[StateAddress, str] = {}
+        # Django models by their app label, model name and primary key
+        self.models: dict[tuple[str, str, Any], Model] = {}
+
+    def is_loaded(self, state_addr: StateAddress) -> bool:
+        return state_addr in self.states
+
+    def get(self, state_addr: StateAddress) -> Any | None:
+        return self.states.get(state_addr)
+
+    def register_loaded(
+        self, state_addr: StateAddress, state: Any | None, version: bytes | None = None
+    ) -> Any:
+        """Remember a loaded state and its version, and return the state to use.
+
+        If another thread has registered the state in the meantime (components can
+        be rendered in parallel), keep and return the already registered object.
+        """
+        registered = self.states.setdefault(state_addr, state)
+        if registered is state and version is not None:
+            self.versions.setdefault(state_addr, version)
+        return registered
+
+    def register_dirty(self, state_addr: StateAddress, state: Any) -> None:
+        self.states[state_addr] = state
+        self.dirty.add(state_addr)
+
+    def has_session(self, session_id: str) -> bool:
+        return any(
+            state_addr.session_id == session_id and state is not None
+            for state_addr, state in self.states.items()
+        )
+
+    def pop_contexts(self) -> dict[StateAddress, bytes]:
+        """Return buffered contexts and clear the buffer."""
+        contexts, self.contexts = self.contexts, {}
+        return contexts
+
+    def pop_template_hashes(self) -> dict[StateAddress, str]:
+        """Return buffered component template hashes and clear the buffer."""
+        template_hashes, self.template_hashes = self.template_hashes, {}
+        return template_hashes
+
+    def discard(self) -> None:
+        """Drop loaded states and buffered writes.
+
+        Flushing the unit of work saves nothing then, and doesn't report states,
+        possibly changed in place, as unchanged.
+        """
+        self.states.clear()
+        self.dirty.clear()
+        self.versions.clear()
+        self.contexts.clear()
+        self.template_hashes.clear()
+
+    def pop_dirty(self) -> dict[StateAddress, Any]:
+        """Return dirty states and mark them as clean."""
+        dirty_states = {
+            state_addr: self.states[state_addr] for state_addr in self.dirty
+        }
+        self.dirty.clear()
+        return dirty_states
+
+    def release(self) -> None:
+        """Drop loaded states and models after the unit of work has been flushed.
+
+        Flushed states are handed over to the store, which can pass them on to
+        other requests. If the unit of work is used again (a streamed response is
+        rendered after the flush), its states are loaded anew.
+        """
+        self.states.clear()
+        self.versions.clear()
+        self.field_versions.clear()
+        self.models.clear()
+
+
+_current_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar(
+    "livecomponents_unit_of_work", default=None
+)
+
+
+def get_current_unit_of_work() -> UnitOfWork | None:
+    """Return the unit of work, active in the current context, if any."""
+    return _current_unit_of_work.get()
+
+
+@contextmanager
+def use_unit_of_work(unit_of_work: UnitOfWork) -> Iterator[UnitOfWork]:
+    """Make the unit of work active in the current context."""
+    token = _current_unit_of_work.set(unit_of_work)
+    try:
+        yield unit_of_work
+    finally:
+        _current_unit_of_work.reset(token)
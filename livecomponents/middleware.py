@@ -0,0 +1,57 @@
+from collections.abc import Awaitable, Callable
+from typing import cast
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+
+from livecomponents.manager import get_state_manager
+
+
+class UnitOfWorkMiddleware:
+    """Buffer livecomponents store writes while the response is produced.
+
+    Without the middleware, every live component on the page saves its template,
+    context and state to the store separately. With the middleware, the request is
+    handled within a unit of work (see StateManager.unit_of_work()). Writes are
+    accumulated in memory, reads are served from the buffer, and everything is
+    flushed to the store at once when the response is ready.
+
+    Django turns exceptions of views into error responses before the middleware
+    gets them, so buffered writes are discarded if the response is a server
+    error (5xx).
+
+    Note that TemplateResponse objects are rendered before the middleware gets
+    the response back, so their writes are buffered too.
+
+    The middleware supports both sync and async requests. Under ASGI, the unit
+    of work is flushed with the async store.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse]
+        | Callable[[HttpRequest], Awaitable[HttpResponse]],
+    ):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        with get_state_manager().unit_of_work() as unit_of_work:
+            response = cast(HttpResponse, self.get_response(request))
+            if response.status_code >= 500:
+                unit_of_work.discard()
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        async with get_state_manager().aunit_of_work() as unit_of_work:
+            response = await self.get_response(request)  # type: ignore
+            if response.status_code >= 500:
+                unit_of_work.discard()
+        return response
@@ -5,6 +5,9 @@ from django.utils.module_loading import import_string
 from pydantic import BaseModel, Field
 
 from livecomponents.manager import StateManager
+from livecomponents.manager.async_stores import IAsyncStateStore
+from livecomponents.manager.blob_stores import IBlobStore
+from livecomponents.manager.codecs import StateCodec
 from livecomponents.manager.serializers import IStateSerializer
 from livecomponents.manager.stores import IStateStore
 
@@ -44,14 +47,89 @@ class LivecomponentsConfig(BaseModel):
         )
     )
 
+    async_state_store: ClassConfig[IAsyncStateStore] | None = Field(
+        default=None,
+        description=(
+            "Store, used by async methods of the state manager. If not set, they "
+            "call the state_store in a thread."
+        ),
+    )
+
+    state_codec: ClassConfig[StateCodec] | None = Field(
+        default=None,
+        description=(
+            "Codec that compresses serialized states, contexts and templates "
+            "before they are stored. If not set, values are stored uncompressed."
+        ),
+    )
+
+    blob_store: ClassConfig[IBlobStore] | None = Field(
+        default=None,
+        description=(
+            "Store of blobs, large values of states, kept apart from them. If not "
+            "set, blobs are kept in the state_store."
+        ),
+    )
+
     state_manager: ClassConfig[StateManager] = Field(
         default_factory=lambda: ClassConfig(
             cls="livecomponents.manager.manager.StateManager"
         )
     )
 
+    lazy_states: bool = Field(
+        default=False,
+        description=(
+            "If True, restored component states are deserialized on first access. "
+            "States that are never accessed are written back without serializing "
+            "them."
+        ),
+    )
+
+    partial_states: bool = Field(
+        default=False,
+        description=(
+            "If True, every field of a LiveComponentsModel state is stored as a "
+            "separate entry, and only the fields, assigned by a command, are "
+            "written back."
+        ),
+    )
+
     createlivecomponent: CreateLiveComponentConfig = CreateLiveComponentConfig()
 
+    compiled_template_cache_size: int = Field(
+        default=512,
+        description=(
+            "Maximum number of compiled component templates to keep in the "
+            "process-wide LRU cache, used to re-render components. "
+            "Set to 0 to disable the cache."
+        ),
+    )
+
+    render_workers: int = Field(
+        default=1,
+        description=(
+            "Number of threads, used to re-render dirty components after a command. "
+            "With the default value of 1, components are rendered one after another."
+        ),
+    )
+
+    stream_command_responses: bool = Field(
+        default=False,
+        description=(
+            "If True, commands return a streaming response, and the HTML of every "
+            "re-rendered component is sent to the client as soon as it's ready."
+        ),
+    )
+
+    async_views: bool = Field(
+        default=False,
+        description=(
+            "If True, commands are handled by an async view. Use it with ASGI "
+            "servers, async commands, and the async_state_store setting."
+        ),
+    )
+
     xframe_options_exempt: bool = Field(
         default=False,
         description=(
@@ -0,0 +1,159 @@
+/*
+ * Batch livecomponents commands.
+ *
+ * Commands of elements inside [data-livecomponents-batch] are not sent right away.
+ * They are queued and sent together to the "livecomponents:call-commands" endpoint,
+ * which executes them in order and re-renders dirty components once.
+ *
+ * If the element (or its ancestor) also has [data-livecomponents-coalesce], a new
+ * command replaces the queued command with the same component ID and name. Use it
+ * for events where only the latest value matters, like typing in a search box.
+ *
+ * Include the script after HTMX:
+ *
+ *   <script src="{% static 'livecomponents/batch.js' %}"
+ *           data-batch-url="{% url 'livecomponents:call-commands' %}"
+ *           data-batch-delay="50"></script>
+ */
+(function () {
+  const script = document.currentScript;
+  const batchUrl = script.dataset.batchUrl;
+  const batchDelay = parseInt(script.dataset.batchDelay || "50", 10);
+
+  // Internal HTMX API, used to read typed hx-vals the way the json-enc
+  // extension does. HTMX hands it to extensions when they are defined.
+  let api = null;
+  htmx.defineExtension("livecomponents-batch", {
+    init: function (apiRef) {
+      api = apiRef;
+    },
+  });
+
+  // Queued commands and request headers, keyed by session ID.
+  const queues = new Map();
+  let timer = null;
+  let inFlight = false;
+
+  function enqueue(sessionId, command, headers, coalesce) {
+    let queue = queues.get(sessionId);
+    if (!queue) {
+      queue = { commands: [], headers: {} };
+      queues.set(sessionId, queue);
+    }
+    if (coalesce) {
+      queue.commands = queue.commands.filter(function (queued) {
+        return !(
+          queued.component_id === command.component_id &&
+          queued.command_name === command.command_name
+        );
+      });
+    }
+    queue.commands.push(command);
+    Object.assign(queue.headers, headers);
+    schedule();
+  }
+
+  function schedule() {
+    if (timer === null && !inFlight) {
+      timer = setTimeout(flush, batchDelay);
+    }
+  }
+
+  async function flush() {
+    timer = null;
+    const batches = Array.from(queues.entries());
+    queues.clear();
+    inFlight = true;
+    try {
+      for (const [sessionId, queue] of batches) {
+        await send(sessionId, queue);
+      }
+    } finally {
+      inFlight = false;
+      if (queues.size > 0) {
+        schedule();
+      }
+    }
+  }
+
+  async function send(sessionId, queue) {
+    const url = batchUrl + "?" + new URLSearchParams({ session_id: sessionId });
+    const headers = Object.assign({}, queue.headers, {
+      "Content-Type": "application/json",
+      "HX-Request": "true",
+    });
+    const response = await fetch(url, {
+      method: "POST",
+      headers: headers,
+      body: JSON.stringify({ commands: queue.commands }),
+    });
+    if (response.status === 410) {
+      // Session expired
+      window.location.reload();
+      return;
+    }
+    if (response.headers.get("HX-Redirect")) {
+      window.location.href = response.headers.get("HX-Redirect");
+      return;
+    }
+    if (response.headers.get("HX-Refresh") === "true") {
+      window.location.reload();
+      return;
+    }
+    if (!response.ok) {
+      console.error("Livecomponents batch request failed", response.status);
+      return;
+    }
+    if (response.headers.get("HX-Replace-Url")) {
+      history.replaceState(null, "", response.headers.get("HX-Replace-Url"));
+    }
+    // Responses consist of out-of-band swaps only.
+    htmx.swap(document.body, await response.text(), { swapStyle: "none" });
+  }
+
+  // Command kwargs from request parameters. Like with the json-enc extension,
+  // values of hx-vals keep their JSON types, instead of becoming strings, and
+  // repeated parameters become lists.
+  function getKwargs(parameters, elt) {
+    const kwargs = {};
+    parameters.forEach(function (value, key) {
+      if (Object.hasOwn(kwargs, key)) {
+        if (!Array.isArray(kwargs[key])) {
+          kwargs[key] = [kwargs[key]];
+        }
+        kwargs[key].push(value);
+      } else {
+        kwargs[key] = value;
+      }
+    });
+    const vals = api ? api.getExpressionVars(elt) : {};
+    Object.keys(kwargs).forEach(function (key) {
+      if (Object.hasOwn(vals, key)) {
+        kwargs[key] = vals[key];
+      }
+    });
+    return kwargs;
+  }
+
+  document.addEventListener("htmx:configRequest", function (event) {
+    const detail = event.detail;
+    if (!detail.elt.closest("[data-livecomponents-batch]")) {
+      return;
+    }
+    const query = new URL(detail.path, window.location.href).searchParams;
+    const sessionId = query.get("session_id");
+    const componentId = query.get("component_id");
+    const commandName = query.get("command_name");
+    if (!sessionId || !componentId || !commandName) {
+      return;
+    }
+    const kwargs = getKwargs(detail.parameters, detail.elt);
+    event.preventDefault();
+    enqueue(
+      sessionId,
+      { component_id: componentId, command_name: commandName, kwargs: kwargs },
+      detail.headers,
+      detail.elt.closest("[data-livecomponents-coalesce]") !== null
+    );
+  });
+})();
@@ -0,0 +1,33 @@
+/*
+ * Latest-wins commands.
+ *
+ * Commands of elements inside [data-livecomponents-latest] carry an increasing
+ * per-component sequence number in the X-Livecomponents-Seq header. The server
+ * skips executing or rendering a command if a newer command for the same
+ * component has already arrived, and responds with "204 No Content".
+ *
+ * Include the script after HTMX:
+ *
+ *   <script src="{% static 'livecomponents/latest.js' %}"></script>
+ */
+(function () {
+  // Last sequence numbers, keyed by component ID.
+  const seqs = new Map();
+
+  document.addEventListener("htmx:configRequest", function (event) {
+    const detail = event.detail;
+    if (!detail.elt.closest("[data-livecomponents-latest]")) {
+      return;
+    }
+    const query = new URL(detail.path, window.location.href).searchParams;
+    const componentId = query.get("component_id");
+    if (!componentId) {
+      return;
+    }
+    // Base numbers on the clock to keep them increasing if the page is reloaded
+    // with the same session, e.g., with the back button.
+    const seq = Math.max((seqs.get(componentId) || 0) + 1, Date.now());
+    seqs.set(componentId, seq);
+    detail.headers["X-Livecomponents-Seq"] = String(seq);
+  });
+})();
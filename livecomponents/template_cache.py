@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import cache
+from typing import NamedTuple
+
+from django.template import Template
+
+from livecomponents.settings import get_config
+
+COMPONENT_TEMPLATE_PREAMBLE = "{% load livecomponents component_tags %}"
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_size: int
+    size: int
+
+
+class CompiledTemplateCache:
+    """Process-wide LRU cache of compiled component templates.
+
+    When a component is re-rendered, we build a Django template from its raw
+    template content (see "On Storing Raw HTML Templates"). Parsing the template
+    is expensive, and the same templates repeat over and over, so we keep
+    compiled templates around, keyed by the content hash of the raw template.
+
+    Args:
+        max_size: Maximum number of compiled templates to keep. When the cache is
+            full, the least recently used template is evicted. Zero disables the
+            cache.
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._templates: OrderedDict[str, Template] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compile(
+        self, template_hash: str, get_html: Callable[[], str]
+    ) -> Template:
+        """Return the compiled template for the hash, compiling it if necessary.
+
+        The get_html() callable is only called on a cache miss to fetch the raw
+        template content.
+        """
+        with self._lock:
+            template = self._templates.get(template_hash)
+            if template is not None:
+                self._templates.move_to_end(template_hash)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        # Compile outside the lock. If two threads compile the same template at
+        # the same time, one of the results wins, which is fine.
+        template = compile_component_template(get_html())
+        if self.max_size <= 0:
+            return template
+        with self._lock:
+            self._templates[template_hash] = template
+            self._templates.move_to_end(template_hash)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                max_size=self.max_size,
+                size=len(self._templates),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def compile_component_template(html: str) -> Template:
+    return Template(COMPONENT_TEMPLATE_PREAMBLE + html)
+
+
+@cache
+def get_compiled_template_cache() -> CompiledTemplateCache:
+    return CompiledTemplateCache(max_size=get_config().compiled_template_cache_size)
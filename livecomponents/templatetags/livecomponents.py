@@ -1,3 +1,4 @@
+import copy
 import secrets
 from collections.abc import Iterable
 from urllib.parse import urlencode
@@ -21,6 +22,7 @@ from django_components.templatetags.component_tags import (
 )
 
 from livecomponents.const import DEFAULT_OWN_ID, HIER_SEP, TYPE_SEP
+from livecomponents.manager.template_registry import get_template_registry
 from livecomponents.sessions import get_session_id
 from livecomponents.templatetags.utils import (
     capture_used_tokens,
@@ -231,25 +233,39 @@ class LiveComponentNode(ComponentNode):
         )
         self.component_template = component_template
         self.save_context_vars = save_context_vars
+        # Register the template once, when the Django template is parsed. On render,
+        # sessions only store the hash of the template.
+        self.component_template_hash = (
+            get_template_registry().register(component_template)
+            if component_template is not None
+            else None
+        )
 
     def render(self, context: Context):
-        # move "full_component_id" from context to context_kwargs
+        node = self
+        # move "full_component_id" from context to context_kwargs. Work on a copy
+        # of the node, because compiled templates are cached and shared between
+        # renders (see CompiledTemplateCache).
         if "full_component_id" in context:
-            self.context_kwargs["full_component_id"] = context["full_component_id"]
+            node = copy.copy(self)
+            node.context_kwargs = {
+                **self.context_kwargs,
+                "full_component_id": context["full_component_id"],
+            }
             context["full_component_id"] = None
 
-        state_addr = self.get_state_addr(context)
-        if self.component_template is not None:
-            self.save_component_template(state_addr, self.component_template)
+        state_addr = node.get_state_addr(context)
+        if node.component_template is not None:
+            node.save_component_template(state_addr, node.component_template)
 
         rendered_save_context_vars = render_save_context_vars(
-            self.save_context_vars, context
+            node.save_context_vars, context
         )
         if rendered_save_context_vars:
-            context = self.save_or_restore_context(
+            context = node.save_or_restore_context(
                 state_addr, context, rendered_save_context_vars
             )
-        return super().render(context)
+        return super(LiveComponentNode, node).render(context)
 
     def save_component_template(
         self, state_addr: StateAddress, component_template: str
@@ -257,7 +273,9 @@ class LiveComponentNode(ComponentNode):
         from livecomponents.manager import get_state_manager
 
         state_manager = get_state_manager()
-        state_manager.save_component_template(state_addr, component_template)
+        state_manager.save_component_template(
+            state_addr, component_template, self.component_template_hash
+        )
 
     def save_or_restore_context(
         self,
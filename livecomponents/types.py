@@ -1,6 +1,6 @@
-from typing import TypeVar
+from typing import Any, TypeVar
 
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from livecomponents.const import DEFAULT_OWN_ID, HIER_SEP, TYPE_SEP
 from livecomponents.utils import LiveComponentsPath, get_ancestor_id
@@ -97,3 +97,13 @@ class CallMethodRequestArgs(BaseModel):
 
     def get_state_address(self) -> StateAddress:
         return StateAddress(session_id=self.session_id, component_id=self.component_id)
+
+
+class BatchedCommand(BaseModel):
+    component_id: str
+    command_name: str
+    kwargs: dict[str, Any] = Field(default_factory=dict)
+
+
+class CallCommandsRequestBody(BaseModel):
+    commands: list[BatchedCommand] = Field(min_length=1)
@@ -1,10 +1,21 @@
 from django.urls import path
 
-from livecomponents.views import call_command, clear_session
+from livecomponents.settings import get_config
+from livecomponents.views import (
+    acall_command,
+    call_command,
+    call_commands,
+    clear_session,
+)
 
 app_name = "livecomponents"
 
 urlpatterns = [
-    path("call_command/", call_command, name="call-command"),
+    path(
+        "call_command/",
+        acall_command if get_config().async_views else call_command,
+        name="call-command",
+    ),
+    path("call_commands/", call_commands, name="call-commands"),
     path("clear_session/", clear_session, name="clear-session"),
 ]
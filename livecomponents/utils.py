@@ -1,3 +1,8 @@
+import inspect
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from asgiref.sync import async_to_sync, sync_to_async
 from django.core.exceptions import BadRequest
 from pydantic import BaseModel, ConfigDict
 
@@ -33,11 +38,64 @@ def find_component_id(
     return f"{parent_id}{HIER_SEP}{basename}"
 
 
+# Key of the fields, changed since the model was saved, in __dict__ of the model
+_CHANGED_FIELDS_KEY = "_livecomponents_changed_fields"
+
+
 class LiveComponentsModel(BaseModel):
-    """A subclass of Pydantic's model that allows arbitrary types."""
+    """A subclass of Pydantic's model that allows arbitrary types.
+
+    The model tracks the fields that have been assigned since it was saved. With
+    partial states (see StateManager), these fields are written back to the store,
+    and so are fields that compare different from the stored ones when serialized,
+    like lists that have been appended to.
+    """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if _CHANGED_FIELDS_KEY in self.__dict__ and name in type(self).model_fields:
+            self.__dict__[_CHANGED_FIELDS_KEY] |= {name}
+
+    def __copy__(self):
+        # Copies have never been saved. It also covers model_copy(update=...),
+        # which updates fields without assigning them.
+        copied = super().__copy__()
+        copied.__dict__.pop(_CHANGED_FIELDS_KEY, None)
+        return copied
+
+    def __deepcopy__(self, memo=None):
+        copied = super().__deepcopy__(memo)
+        copied.__dict__.pop(_CHANGED_FIELDS_KEY, None)
+        return copied
+
+    def mark_changed(self, *field_names: str) -> None:
+        """Mark fields as changed, e.g. after modifying their values in place."""
+        unknown_fields = set(field_names) - type(self).model_fields.keys()
+        if unknown_fields:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+        if _CHANGED_FIELDS_KEY in self.__dict__:
+            self.__dict__[_CHANGED_FIELDS_KEY] |= set(field_names)
+
+    def get_changed_fields(self) -> frozenset[str]:
+        """Return the fields, assigned since the model was saved.
+
+        All fields count as changed, if the model has never been saved.
+        """
+        # Kept in __dict__ rather than in a private attribute, so that it doesn't
+        # affect the comparison of models.
+        changed_fields = self.__dict__.get(_CHANGED_FIELDS_KEY)
+        if changed_fields is None:
+            return frozenset(type(self).model_fields)
+        return changed_fields
+
+    def pop_changed_fields(self) -> frozenset[str]:
+        """Return the changed fields, and mark the model as saved."""
+        changed_fields = self.get_changed_fields()
+        self.__dict__[_CHANGED_FIELDS_KEY] = frozenset()
+        return changed_fields
+
 
 class LiveComponentsPath:
     """Like a POSIX path, but with a different separator."""
@@ -87,3 +145,33 @@ def get_ancestor_id(component_id: str, ancestor_type: str) -> str | None:
         if type_ == ancestor_type:
             return HIER_SEP.join(chunks + [chunk])
     return None
+
+
+def call_sync(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call a sync or async function from sync code, and return its result.
+
+    Async functions (and sync wrappers returning awaitables) are run in the event
+    loop with async_to_sync().
+    """
+    result = func(*args, **kwargs)
+    if inspect.isawaitable(result):
+        return async_to_sync(_await)(result)
+    return result
+
+
+async def call_async(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call a sync or async function from async code, and return its result.
+
+    Async functions are awaited without thread hops. Sync functions may block, so
+    they are executed in a thread with sync_to_async().
+    """
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    result = await sync_to_async(func)(*args, **kwargs)
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+async def _await(awaitable: Awaitable) -> Any:
+    return await awaitable
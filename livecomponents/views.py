@@ -1,18 +1,33 @@
+import contextvars
 import json
+import threading
+from collections.abc import AsyncIterator, Generator, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
 from typing import Any
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import BadRequest
-from django.http import HttpRequest, HttpResponse
-from django.template import RequestContext, Template
+from django.db import close_old_connections, connections
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.template import RequestContext
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django_components.component_registry import NotRegistered
+from pydantic import ValidationError
 
+from livecomponents.const import COMMAND_SEQ_HEADER, SUPERSEDED_HEADER
 from livecomponents.exceptions import CancelRendering
 from livecomponents.logging import logger
 from livecomponents.manager import get_state_manager
+from livecomponents.manager.execution_results import ExecutionResults
 from livecomponents.manager.manager import CallContext
+from livecomponents.manager.unit_of_work import UnitOfWork, use_unit_of_work
 from livecomponents.settings import get_config
-from livecomponents.types import CallMethodRequestArgs, StateAddress
+from livecomponents.template_cache import get_compiled_template_cache
+from livecomponents.types import (
+    CallCommandsRequestBody,
+    CallMethodRequestArgs,
+    StateAddress,
+)
 
 
 def maybe_xframe_exempt(view_func):
@@ -30,6 +45,7 @@ def call_command(request: HttpRequest):
     args = CallMethodRequestArgs(**request.GET.dict())
     state_manager = get_state_manager()
     kwargs = parse_body(request)
+    seq = parse_command_seq(request)
 
     if not state_manager.session_exists(args.session_id):
         logger.warning(
@@ -37,27 +53,144 @@ def call_command(request: HttpRequest):
         )
         return HttpResponse("Session does not exist. It may have expired", status=410)
 
-    try:
-        call_context = state_manager.call_component_command(
-            request,
-            args.get_state_address(),
-            args.command_name,
-            kwargs=kwargs,
+    state_address = args.get_state_address()
+    if seq is not None and not state_manager.register_command_seq(state_address, seq):
+        return superseded_response(state_address, seq)
+
+    # Load every component state at most once, and save modified states in one go
+    # after the command has been executed and dirty components re-rendered.
+    with state_manager.unit_of_work() as unit_of_work:
+        try:
+            call_context = state_manager.call_component_command(
+                request,
+                state_address,
+                args.command_name,
+                kwargs=kwargs,
+            )
+        except NotRegistered as error:
+            raise BadRequest(
+                f"Component {args.component_id} is not registered"
+            ) from error
+        # Changes of the command are saved, but there's no need to render the
+        # components if a newer command has arrived in the meantime.
+        if seq is not None and not state_manager.is_latest_command(state_address, seq):
+            return superseded_response(state_address, seq)
+        return render_command_response(call_context, unit_of_work)
+
+
+@maybe_xframe_exempt
+async def acall_command(request: HttpRequest):
+    """Async version of call_command.
+
+    The state is loaded and saved with the async store, and async commands are
+    awaited without thread hops. Django templates are sync, so dirty components
+    are re-rendered in a thread.
+    """
+    if request.method != "POST":
+        return HttpResponse("Only POST allowed", status=405)
+    args = CallMethodRequestArgs(**request.GET.dict())
+    state_manager = get_state_manager()
+    kwargs = parse_body(request)
+    seq = parse_command_seq(request)
+
+    if not await state_manager.asession_exists(args.session_id):
+        logger.warning(
+            "Session %s does not exist. It may have expired", args.session_id
         )
-    except NotRegistered as error:
-        raise BadRequest(f"Component {args.component_id} is not registered") from error
+        return HttpResponse("Session does not exist. It may have expired", status=410)
+
+    state_address = args.get_state_address()
+    if seq is not None and not await state_manager.aregister_command_seq(
+        state_address, seq
+    ):
+        return superseded_response(state_address, seq)
+
+    async with state_manager.aunit_of_work() as unit_of_work:
+        try:
+            call_context = await state_manager.acall_component_command(
+                request,
+                state_address,
+                args.command_name,
+                kwargs=kwargs,
+            )
+        except NotRegistered as error:
+            raise BadRequest(
+                f"Component {args.component_id} is not registered"
+            ) from error
+        if seq is not None and not await state_manager.ais_latest_command(
+            state_address, seq
+        ):
+            return superseded_response(state_address, seq)
+        return await arender_command_response(call_context, unit_of_work)
+
+
+@maybe_xframe_exempt
+def call_commands(request: HttpRequest):
+    """Call several commands of one session, and re-render dirty components once.
 
+    Commands are executed in order against the same component states. The body
+    is a JSON object with the "commands" list of objects with "component_id",
+    "command_name" and optional "kwargs".
+    """
+    if request.method != "POST":
+        return HttpResponse("Only POST allowed", status=405)
+    session_id = request.GET.get("session_id")
+    if not session_id:
+        return HttpResponse("session_id is required", status=400)
+    try:
+        body = CallCommandsRequestBody.model_validate(parse_body(request))
+    except ValidationError as error:
+        raise BadRequest("Invalid livecomponent batch request body") from error
+    state_manager = get_state_manager()
+
+    if not state_manager.session_exists(session_id):
+        logger.warning("Session %s does not exist. It may have expired", session_id)
+        return HttpResponse("Session does not exist. It may have expired", status=410)
+
+    with state_manager.unit_of_work() as unit_of_work:
+        execution_results = ExecutionResults()
+        for command in body.commands:
+            try:
+                call_context = state_manager.call_component_command(
+                    request,
+                    StateAddress(
+                        session_id=session_id, component_id=command.component_id
+                    ),
+                    command.command_name,
+                    kwargs=command.kwargs,
+                    execution_results=execution_results,
+                )
+            except NotRegistered as error:
+                raise BadRequest(
+                    f"Component {command.component_id} is not registered"
+                ) from error
+        return render_command_response(call_context, unit_of_work)
+
+
+def render_command_response(
+    call_context: CallContext, unit_of_work: UnitOfWork
+) -> HttpResponse:
+    """Re-render dirty components of the call context, and return the response."""
     headers = call_context.execution_results.response_headers
 
     if not call_context.execution_results.is_partial_render_necessary():
         # Shortcut for full page refresh
-        return HttpResponse(
-            headers=call_context.execution_results.response_headers,
-        )
+        return HttpResponse(headers=headers)
 
     dirty_components = deduplicate_dirty_components(
         call_context.execution_results.dirty_components
     )
+    if get_config().stream_command_responses:
+        # The command results are flushed when the unit of work exits. Rendering
+        # happens later, while the response is streamed to the client.
+        return StreamingHttpResponse(
+            stream_re_rendered_components(
+                component_addresses=dirty_components,
+                call_context=call_context,
+                unit_of_work=unit_of_work,
+            ),
+            headers=headers,
+        )
     rendered_components = re_render_components(
         component_addresses=dirty_components,
         call_context=call_context,
@@ -76,14 +209,37 @@ def clear_session(request: HttpRequest):
     return HttpResponse("")
 
 
+def parse_command_seq(request: HttpRequest) -> int | None:
+    """Return the command sequence number from the request headers, if any."""
+    seq = request.headers.get(COMMAND_SEQ_HEADER)
+    if seq is None:
+        return None
+    try:
+        return int(seq)
+    except ValueError:
+        raise BadRequest(f"Invalid {COMMAND_SEQ_HEADER} header (not an integer)")
+
+
+def superseded_response(state_address: StateAddress, seq: int) -> HttpResponse:
+    logger.debug(
+        "Command #%d of %s is superseded by a newer one",
+        seq,
+        state_address.component_id,
+    )
+    return HttpResponse(status=204, headers={SUPERSEDED_HEADER: "true"})
+
+
 def parse_body(request: HttpRequest) -> dict[str, Any]:
     if request.content_type == "application/json":
         if request.body == b"":
             return {}
         try:
-            return json.loads(request.body.decode())
+            body = json.loads(request.body.decode())
         except (json.JSONDecodeError, UnicodeDecodeError):
             raise BadRequest("Invalid livecomponent request body (not valid JSON)")
+        if not isinstance(body, dict):
+            raise BadRequest("Invalid livecomponent request body (not a JSON object)")
+        return body
     return request.POST.dict()
 
 
@@ -105,25 +261,233 @@ def deduplicate_dirty_components(dirty_components: set[StateAddress]):
     return deduplicated
 
 
+async def arender_command_response(
+    call_context: CallContext, unit_of_work: UnitOfWork
+) -> HttpResponse:
+    """Async version of render_command_response()."""
+    execution_results = call_context.execution_results
+    if (
+        get_config().stream_command_responses
+        and execution_results.is_partial_render_necessary()
+    ):
+        # Stream with an async iterator. Otherwise, ASGI handler would consume
+        # the sync iterator in one go.
+        fragments = stream_re_rendered_components(
+            component_addresses=deduplicate_dirty_components(
+                execution_results.dirty_components
+            ),
+            call_context=call_context,
+            unit_of_work=unit_of_work,
+        )
+        return StreamingHttpResponse(
+            aiter_in_thread(fragments), headers=execution_results.response_headers
+        )
+    return await sync_to_async(render_command_response)(call_context, unit_of_work)
+
+
+async def aiter_in_thread(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """Consume a sync iterator item by item in a thread.
+
+    If the async iterator is closed early, the sync one is closed too.
+    """
+    try:
+        while True:
+            item = await sync_to_async(next_or_none)(iterator)
+            if item is None:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def next_or_none(iterator: Iterator[str]) -> str | None:
+    return next(iterator, None)
+
+
 def re_render_components(
     component_addresses: set[StateAddress], call_context: CallContext
 ) -> list[str]:
-    """Re-render components and return their HTML.
+    """Re-render components and return their HTML, ordered by component ID.
 
     If any of the components raises an CancelRendering() exception, then
     this component rendering is cancelled and an empty string is returned
     instead of the HTML for this component.
+
+    If the "render_workers" setting is greater than 1, components are rendered
+    concurrently in a thread pool.
     """
-    ret: list[str] = []
-    for component_address in component_addresses:
+    return list(iter_re_rendered_components(component_addresses, call_context))
+
+
+def iter_re_rendered_components(
+    component_addresses: Iterable[StateAddress],
+    call_context: CallContext,
+    ordered: bool = True,
+) -> Generator[str, None, None]:
+    """Re-render components one by one, and yield their HTML.
+
+    Components are rendered in the order of their IDs. When they are rendered in
+    parallel and ordered is False, their HTML is yielded as soon as it's ready.
+    """
+    sorted_addresses = sorted(component_addresses, key=lambda x: x.component_id)
+    render_workers = get_config().render_workers
+    if render_workers > 1 and len(sorted_addresses) > 1 and not in_atomic_block():
+        executor = get_render_executor(render_workers)
+        futures: list[Future[str]] = [
+            # Run in a copy of the current context to share the unit of work.
+            executor.submit(
+                re_render_component_in_context,
+                contextvars.copy_context(),
+                call_context,
+                component_address,
+            )
+            for component_address in sorted_addresses
+        ]
         try:
-            ret.append(re_render_component(call_context, component_address))
-        except CancelRendering:
-            logger.warning(
-                "Component %s cancelled rendering", component_address.component_id
+            for future in futures if ordered else as_completed(futures):
+                yield future.result()
+        finally:
+            # If the iterator is closed early, don't start the remaining
+            # components, and let running ones finish their writes.
+            for future in futures:
+                future.cancel()
+            wait(futures)
+        return
+    for component_address in sorted_addresses:
+        yield re_render_component_or_cancel(call_context, component_address)
+
+
+def stream_re_rendered_components(
+    component_addresses: Iterable[StateAddress],
+    call_context: CallContext,
+    unit_of_work: UnitOfWork,
+) -> Iterator[str]:
+    """Yield HTML of re-rendered components for a streaming response.
+
+    The response is consumed after the view has returned, so the unit of work of
+    the request is re-activated for every fragment, and flushed at the end. If
+    the client disconnects, and the response is closed early, the writes of the
+    components, rendered so far, are flushed too.
+    """
+    fragments = iter_re_rendered_components(
+        component_addresses, call_context, ordered=False
+    )
+    try:
+        while True:
+            with use_unit_of_work(unit_of_work):
+                html = next(fragments, None)
+            if html is None:
+                break
+            yield html + "\n"
+    finally:
+        with use_unit_of_work(unit_of_work):
+            # Wait for components, still rendered by worker threads.
+            fragments.close()
+            call_context.state_manager.flush(unit_of_work)
+
+
+def re_render_component_or_cancel(
+    call_context: CallContext, state_address: StateAddress
+) -> str:
+    try:
+        return re_render_component(call_context, state_address)
+    except CancelRendering:
+        logger.warning("Component %s cancelled rendering", state_address.component_id)
+        return ""
+
+
+def re_render_component_in_thread(
+    call_context: CallContext, state_address: StateAddress
+) -> str:
+    # Worker threads outlive the request. Like request handlers, they close
+    # connections that are broken or older than CONN_MAX_AGE, and reuse others.
+    close_old_connections()
+    try:
+        return re_render_component_or_cancel(call_context, state_address)
+    finally:
+        close_old_connections()
+
+
+def re_render_component_in_context(
+    context: contextvars.Context,
+    call_context: CallContext,
+    state_address: StateAddress,
+) -> str:
+    return context.run(re_render_component_in_thread, call_context, state_address)
+
+
+class RenderExecutor(ThreadPoolExecutor):
+    """Thread pool that closes database connections of its threads on shutdown."""
+
+    # Seconds to wait for every worker to pick up a closing task
+    close_timeout = 10.0
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self.close_connections()
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def close_connections(self) -> None:
+        """Close database connections of every worker thread.
+
+        Connections belong to the thread that has opened them, so every worker
+        gets a task that closes its own. The tasks wait for each other, so that
+        no worker takes two of them.
+        """
+        barrier = threading.Barrier(self._max_workers)
+
+        def close_thread_connections() -> None:
+            try:
+                barrier.wait(self.close_timeout)
+            except threading.BrokenBarrierError:
+                pass
+            connections.close_all()
+
+        for _ in range(self._max_workers):
+            try:
+                self.submit(close_thread_connections)
+            except RuntimeError:
+                # Already shut down
+                return
+
+
+_render_executors: dict[int, RenderExecutor] = {}
+_render_executors_lock = threading.Lock()
+
+
+def get_render_executor(max_workers: int) -> RenderExecutor:
+    with _render_executors_lock:
+        if max_workers not in _render_executors:
+            _render_executors[max_workers] = RenderExecutor(
+                max_workers=max_workers, thread_name_prefix="livecomponents-render"
             )
-            ret.append("")
-    return ret
+        return _render_executors[max_workers]
+
+
+def shutdown_render_executors() -> None:
+    """Shut down thread pools of parallel rendering and close their connections.
+
+    Call it when the worker process exits, for example, from the worker_exit
+    hook of Gunicorn.
+    """
+    with _render_executors_lock:
+        executors = list(_render_executors.values())
+        _render_executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+def in_atomic_block() -> bool:
+    """Return True if the request runs inside a database transaction.
+
+    Worker threads use their own database connections and wouldn't see uncommitted
+    changes, so components are rendered sequentially in this case.
+    """
+    return any(
+        connection.in_atomic_block
+        for connection in connections.all(initialized_only=True)
+    )
 
 
 def re_render_component(call_context: CallContext, state_address: StateAddress) -> str:
@@ -135,14 +499,24 @@ def re_render_component(call_context: CallContext, state_address: StateAddress)
             "full_component_id": state_address.component_id,
         },
     )
-    html = call_context.state_manager.restore_component_template(state_address)
-    if not html:
-        error_message = (
-            f"Cannot find HTML for '{state_address}'. "
-            f"Did you use '{{% component ... %}}' instead of "
-            f"'{{% livecomponent ... %}}' in the Django template?"
-        )
-        raise ValueError(error_message)
+    state_manager = call_context.state_manager
+    template_hash = state_manager.restore_component_template_hash(state_address)
+    if not template_hash:
+        raise ValueError(get_missing_template_message(state_address))
+
+    def get_html() -> str:
+        html = state_manager.get_template(template_hash)
+        if not html:
+            raise ValueError(get_missing_template_message(state_address))
+        return html
 
-    template = "{% load livecomponents component_tags %}" + html
-    return Template(template).render(context)
+    template = get_compiled_template_cache().get_or_compile(template_hash, get_html)
+    return template.render(context)
+
+
+def get_missing_template_message(state_address: StateAddress) -> str:
+    return (
+        f"Cannot find HTML for '{state_address}'. "
+        f"Did you use '{{% component ... %}}' instead of "
+        f"'{{% livecomponent ... %}}' in the Django template?"
+    )
@@ -5,12 +5,6 @@ import pytest
 from livecomponents.manager import get_state_manager
 from livecomponents.manager.stores import RedisStateStore
 
-# Playwright runs the async loop which makes Django raising a SynchronousOnlyOperation
-# exception. This is a workaround to allow async code in tests.
-# See more, for example, in
-# https://github.com/microsoft/playwright-python/issues/439#issuecomment-763339612
-os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
-
 
 @pytest.fixture
 def state_manager():
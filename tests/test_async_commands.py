@@ -0,0 +1,132 @@
+import asyncio
+from urllib.parse import urlencode
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.template import RequestContext, Template
+from django_components import component
+from myapp.models import CoffeeBean
+
+from livecomponents import LiveComponent, LiveComponentsModel, command
+from livecomponents.types import StateAddress
+from livecomponents.views import acall_command
+
+
+class AsyncCounterState(LiveComponentsModel):
+    count: int = 0
+
+
+@component.register("tests/asynccounter")
+class AsyncCounterComponent(LiveComponent[AsyncCounterState]):
+    def get_template_string(self, context):
+        return (
+            "{% load livecomponents %}"
+            "<div {% component_attrs component_id %}>{{ label }}: {{ count }}</div>"
+        )
+
+    async def init_state(self, context):
+        await asyncio.sleep(0)
+        return AsyncCounterState()
+
+    async def get_extra_context_data(self, extra_context_request):
+        await asyncio.sleep(0)
+        return {"label": "Async count"}
+
+    @command
+    async def increment(self, call_context):
+        await asyncio.sleep(0)
+        call_context.state.count += 1
+
+
+def test_async_component_renders(rf, state_manager):
+    html = render_livecomponent(rf, "session")
+    assert "Async count: 0" in html
+
+
+def test_sync_view_calls_async_command(rf, client, state_manager):
+    render_livecomponent(rf, "session")
+
+    resp = client.post(call_command_url("session"), content_type="application/json")
+
+    assert "Async count: 1" in resp.content.decode()
+
+
+def test_async_view_calls_async_command(rf, state_manager):
+    render_livecomponent(rf, "session")
+    request = rf.post(call_command_url("session"), content_type="application/json")
+
+    resp = async_to_sync(acall_command)(request)
+
+    assert "Async count: 1" in resp.content.decode()
+    state_addr = StateAddress(
+        session_id="session", component_id="|tests/asynccounter:0"
+    )
+    assert state_manager.get_component_state(state_addr).count == 1
+
+
+class AsyncBeanState(LiveComponentsModel):
+    bean: CoffeeBean
+    selected: bool = False
+
+
+@component.register("tests/asyncbean")
+class AsyncBeanComponent(LiveComponent[AsyncBeanState]):
+    def get_template_string(self, context):
+        return (
+            "{% load livecomponents %}"
+            "<div {% component_attrs component_id %}>"
+            "{{ bean.name }}{% if selected %} (selected){% endif %}"
+            "</div>"
+        )
+
+    async def init_state(self, context):
+        return AsyncBeanState(bean=await CoffeeBean.objects.aget(name="Bean"))
+
+    @command
+    async def select(self, call_context):
+        call_context.state.selected = True
+
+
+@pytest.mark.django_db
+def test_async_view_calls_command_of_model_backed_state(rf, state_manager):
+    # DJANGO_ALLOW_ASYNC_UNSAFE is not set, so querying models in the event loop
+    # would raise SynchronousOnlyOperation.
+    CoffeeBean.objects.create(
+        name="Bean", origin="Origin", roast_level="Roast", flavor_notes="Notes"
+    )
+    render_livecomponent(rf, "session", "tests/asyncbean")
+    request = rf.post(
+        call_command_url("session", "|tests/asyncbean:0", "select"),
+        content_type="application/json",
+    )
+
+    resp = async_to_sync(acall_command)(request)
+
+    assert resp.status_code == 200
+    assert "Bean (selected)" in resp.content.decode()
+
+
+def render_livecomponent(
+    rf, session_id: str, component_name: str = "tests/asynccounter"
+) -> str:
+    request = rf.get("/")
+    template = Template(
+        f'{{% load livecomponents %}}{{% livecomponent "{component_name}" %}}'
+    )
+    context = RequestContext(
+        request, {"request": request, "LIVECOMPONENTS_SESSION_ID": session_id}
+    )
+    return template.render(context)
+
+
+def call_command_url(
+    session_id: str,
+    component_id: str = "|tests/asynccounter:0",
+    command_name: str = "increment",
+) -> str:
+    kwargs = {
+        "session_id": session_id,
+        "component_id": component_id,
+        "command_name": command_name,
+    }
+    return f"/livecomponents/call_command/?{urlencode(kwargs)}"
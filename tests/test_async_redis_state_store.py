@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+
+from livecomponents.manager.async_stores import AsyncRedisStateStore
+from livecomponents.manager.stores import RedisStateStore
+from livecomponents.types import StateAddress
+
+
+@pytest.fixture
+def async_redis_state_store():
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        pytest.skip("Redis URL not provided")
+    return AsyncRedisStateStore(redis_url=redis_url)
+
+
+def test_async_store_shares_keys_with_sync_store(async_redis_state_store):
+    sync_store = RedisStateStore(redis_url=async_redis_state_store.redis_url)
+    sync_store.clear_all_sessions()
+    state_addr = StateAddress(session_id="session_id", component_id="|root:0")
+    other_addr = state_addr.with_component_id("|root:1")
+
+    async def save_and_restore():
+        await async_redis_state_store.save_batch(
+            {state_addr: b"state"}, {state_addr: b"context"}, {state_addr: "hash"}
+        )
+        return (
+            await async_redis_state_store.session_exists("session_id"),
+            await async_redis_state_store.restore_states([state_addr, other_addr]),
+        )
+
+    session_exists, states = asyncio.run(save_and_restore())
+
+    assert session_exists
+    assert states == {state_addr: b"state"}
+    assert sync_store.restore_state(state_addr) == b"state"
+    assert sync_store.restore_context(state_addr) == b"context"
+    assert sync_store.restore_component_template_hash(state_addr) == "hash"
+
+
+def test_async_store_restores_contexts_template_hashes_and_blobs(
+    async_redis_state_store,
+):
+    sync_store = RedisStateStore(redis_url=async_redis_state_store.redis_url)
+    sync_store.clear_all_sessions()
+    state_addr = StateAddress(session_id="session_id", component_id="|root:0")
+    other_addr = state_addr.with_component_id("|root:1")
+    sync_store.save_batch({}, {state_addr: b"context"}, {state_addr: "hash"})
+    sync_store.save_blobs({"blob": b"value"})
+
+    async def restore():
+        return (
+            await async_redis_state_store.restore_contexts([state_addr, other_addr]),
+            await async_redis_state_store.restore_component_template_hashes(
+                [state_addr, other_addr]
+            ),
+            await async_redis_state_store.restore_blob("blob"),
+        )
+
+    assert asyncio.run(restore()) == (
+        {state_addr: b"context"},
+        {state_addr: "hash"},
+        b"value",
+    )
+
+
+def test_async_store_uses_client_per_event_loop(async_redis_state_store):
+    async def get_client():
+        return async_redis_state_store.client
+
+    assert asyncio.run(get_client()) is not asyncio.run(get_client())
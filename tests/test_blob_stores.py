@@ -0,0 +1,85 @@
+import datetime
+import mmap
+import os
+import time
+
+from pydantic import BaseModel
+
+from livecomponents import Blob
+from livecomponents.manager.blob_stores import FileSystemBlobStore
+from livecomponents.manager.manager import StateManager
+from livecomponents.manager.serializers import PickleStateSerializer
+from livecomponents.manager.stores import MemoryStateStore
+from livecomponents.types import StateAddress
+
+
+class UploadState(BaseModel):
+    file_name: str
+    content: Blob[bytes]
+
+
+def test_blobs_are_written_once_and_memory_mapped(tmp_path):
+    store = FileSystemBlobStore(tmp_path)
+    store.save_blobs({"abcdef": b"content"})
+    path = tmp_path / "ab" / "abcdef"
+    os.utime(path, (0, 0))
+
+    store.save_blobs({"abcdef": b"ignored", "unknown": None})
+
+    assert path.stat().st_mtime > 0
+    restored = store.restore_blob("abcdef")
+    assert isinstance(restored, mmap.mmap)
+    assert restored[:] == b"content"
+    assert store.restore_blob("unknown") is None
+
+
+def test_expired_blobs_are_collected(tmp_path):
+    store = FileSystemBlobStore(tmp_path, ttl=datetime.timedelta(hours=1))
+    store.save_blobs({"expired": b"expired", "fresh": b"fresh"})
+    expired_at = time.time() - 2 * 3600
+    os.utime(tmp_path / "ex" / "expired", (expired_at, expired_at))
+
+    assert store.collect_garbage() == 1
+    assert store.restore_blob("expired") is None
+    assert store.restore_blob("fresh")[:] == b"fresh"
+
+
+def test_bytes_are_restored_as_memory_mapped_views(tmp_path):
+    state_manager = StateManager(
+        serializer=PickleStateSerializer(),
+        store=MemoryStateStore(),
+        blob_store=FileSystemBlobStore(tmp_path),
+    )
+    state_addr = StateAddress(session_id="session", component_id="|upload:0")
+    state_manager.set_component_state(
+        state_addr, UploadState(file_name="beans.csv", content=b"name\nKenyan AA\n")
+    )
+
+    state = state_manager.get_component_state(state_addr)
+
+    assert isinstance(state.content.value, memoryview)
+    assert state.content.value.readonly
+    assert state.content.value == b"name\nKenyan AA\n"
+    assert len(list(tmp_path.glob("*/*"))) == 1
+
+
+def test_restoring_states_resets_blob_ttl(tmp_path):
+    blob_store = FileSystemBlobStore(tmp_path, ttl=datetime.timedelta(hours=1))
+    state_manager = StateManager(
+        serializer=PickleStateSerializer(),
+        store=MemoryStateStore(),
+        blob_store=blob_store,
+    )
+    state_addr = StateAddress(session_id="session", component_id="|upload:0")
+    state_manager.set_component_state(
+        state_addr, UploadState(file_name="beans.csv", content=b"name\nKenyan AA\n")
+    )
+    (path,) = tmp_path.glob("*/*")
+    expired_at = time.time() - 2 * 3600
+    os.utime(path, (expired_at, expired_at))
+
+    state = state_manager.get_component_state(state_addr)
+
+    assert not state.content.is_loaded
+    assert blob_store.collect_garbage() == 0
+    assert state.content.value == b"name\nKenyan AA\n"
@@ -0,0 +1,79 @@
+import pickle
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from livecomponents.manager.codecs import RAW, StateCodec
+from livecomponents.manager.manager import StateManager
+from livecomponents.manager.serializers import PickleStateSerializer
+from livecomponents.manager.stores import MemoryStateStore
+from livecomponents.types import StateAddress
+
+LARGE_VALUE = b"<tr><td>coffee</td></tr>" * 100
+
+
+@pytest.mark.parametrize("compressor", ["zlib", "lzma"])
+def test_large_values_are_compressed(compressor):
+    codec = StateCodec(compressor=compressor)
+
+    encoded = codec.encode(LARGE_VALUE)
+
+    assert len(encoded) < len(LARGE_VALUE)
+    assert codec.decode(encoded) == LARGE_VALUE
+    stats = codec.get_stats()[compressor]
+    assert stats.encoded == stats.decoded == 1
+    assert stats.input_bytes == len(LARGE_VALUE)
+    assert stats.output_bytes == len(encoded)
+
+
+def test_small_values_are_stored_raw():
+    codec = StateCodec(compressor="zlib", min_size=1024)
+    value = pickle.dumps({"small": 1})
+
+    assert codec.encode(value) == value
+    assert codec.get_stats()[RAW].encoded == 1
+
+
+def test_raw_values_starting_with_tag_byte_are_escaped():
+    codec = StateCodec()
+    value = b"\xf6not compressed"
+
+    encoded = codec.encode(value)
+
+    assert encoded != value
+    assert codec.decode(encoded) == value
+
+
+def test_values_written_with_other_codecs_can_be_read():
+    legacy_value = pickle.dumps(["legacy"])
+    lzma_value = StateCodec(compressor="lzma").encode(LARGE_VALUE)
+    codec = StateCodec(compressor="zlib")
+
+    assert codec.decode(legacy_value) == legacy_value
+    assert codec.decode(lzma_value) == LARGE_VALUE
+
+
+def test_unknown_compressor():
+    with pytest.raises(ImproperlyConfigured):
+        StateCodec(compressor="unknown")
+
+
+def test_state_manager_compresses_states_and_templates():
+    store = MemoryStateStore()
+    state_manager = StateManager(
+        serializer=PickleStateSerializer(),
+        store=store,
+        codec=StateCodec(compressor="zlib", min_size=0),
+    )
+    state_addr = StateAddress(session_id="session", component_id="|table:0")
+    state = {"rows": ["coffee"] * 100}
+
+    state_manager.set_component_state(state_addr, state)
+    state_manager.save_component_template(state_addr, LARGE_VALUE.decode())
+
+    assert len(store.restore_state(state_addr)) < len(pickle.dumps(state))
+    assert state_manager.get_component_state(state_addr) == state
+    template_hash = store.restore_component_template_hash(state_addr)
+    raw_template = store.restore_template(template_hash)
+    assert len(raw_template) < len(LARGE_VALUE)
+    assert state_manager.codec.decode(raw_template) == LARGE_VALUE
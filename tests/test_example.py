@@ -6,6 +6,18 @@ from django.urls import reverse
 from playwright.sync_api import Page, expect
 
 
+@pytest.fixture(scope="module", autouse=True)
+def allow_async_unsafe():
+    # Playwright runs the async loop which makes Django raising a
+    # SynchronousOnlyOperation exception. This is a workaround to allow sync code
+    # in these tests. See more, for example, in
+    # https://github.com/microsoft/playwright-python/issues/439#issuecomment-763339612
+    # Module-scoped, so that the database is set up and torn down with it.
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("DJANGO_ALLOW_ASYNC_UNSAFE", "true")
+        yield
+
+
 def test_counter(live_server, page: Page):
     page.set_default_timeout(5_000)
     page.goto(str(live_server))
@@ -62,6 +74,12 @@ def test_coffee(live_server, page: Page):
     expect(page.get_by_test_id("coffee-edit-form")).to_be_hidden()
     expect(page.get_by_test_id("coffee-stock-quantity")).to_have_text("101")
 
+    # Stock buttons send batched commands, whose amounts must stay integers.
+    page.get_by_role("link", name="+1").click()
+    page.get_by_role("link", name="+1").click()
+    page.get_by_role("link", name="-1").click()
+    expect(page.get_by_test_id("coffee-stock-quantity")).to_have_text("102")
+
     # Click on the "Delete" button and assert the record is deleted.
     page.on("dialog", lambda dialog: dialog.accept())
     page.get_by_test_id("coffee-delete-button").click()
@@ -34,3 +34,11 @@ def test_populate_model_form_with_data(admin_user):
     assert populated_form.is_bound
     assert populated_form.cleaned_data == form_data
     assert populated_form.instance == admin_user
+
+
+def test_populated_form_is_validated_on_access_to_cleaned_data():
+    form_data = {"name": "John", "email": "not an email"}
+    populated_form = populate_form_with_data(MyForm(), form_data)
+    assert isinstance(populated_form, MyForm)
+    assert populated_form.cleaned_data == {"name": "John"}
+    assert populated_form.errors == {"email": ["Enter a valid email address."]}
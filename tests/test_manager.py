@@ -0,0 +1,552 @@
+import asyncio
+import datetime
+import pickle
+from collections import Counter
+
+import pytest
+from django_components import component
+from myapp.models import CoffeeBean
+from pydantic import BaseModel
+
+from livecomponents import LiveComponent, command
+from livecomponents.manager.blobs import Blob
+from livecomponents.manager.manager import StateManager
+from livecomponents.manager.partial_states import get_field_address, is_state_header
+from livecomponents.manager.serializers import (
+    JsonStateSerializer,
+    PickleStateSerializer,
+)
+from livecomponents.manager.stores import MemoryStateStore
+from livecomponents.types import StateAddress
+from livecomponents.utils import LiveComponentsModel
+
+
+class CounterState(BaseModel):
+    value: int = 0
+
+
+@component.register("tests/counter")
+class CounterComponent(LiveComponent[CounterState]):
+    def init_state(self, context):
+        return CounterState()
+
+    @command
+    def increment(self, call_context):
+        call_context.state.value += 1
+
+    @command
+    def noop(self, call_context):
+        pass
+
+    @command(readonly=True)
+    def peek(self, call_context):
+        pass
+
+
+class CountingMemoryStateStore(MemoryStateStore):
+    """Memory store that counts calls to its methods."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: Counter[str] = Counter()
+
+    def restore_state(self, state_addr):
+        self.calls["restore_state"] += 1
+        return super().restore_state(state_addr)
+
+    def save_state(self, state_addr, raw_state):
+        self.calls["save_state"] += 1
+        return super().save_state(state_addr, raw_state)
+
+    def restore_states(self, state_addrs):
+        self.calls["restore_states"] += 1
+        return super().restore_states(state_addrs)
+
+    def save_states(self, raw_states):
+        self.calls["save_states"] += 1
+        self.calls["saved_states"] += len(raw_states)
+        return super().save_states(raw_states)
+
+    def touch_states(self, state_addrs):
+        self.calls["touch_states"] += 1
+        return super().touch_states(state_addrs)
+
+
+@pytest.fixture
+def memory_state_manager():
+    return StateManager(
+        serializer=PickleStateSerializer(), store=CountingMemoryStateStore()
+    )
+
+
+@pytest.fixture
+def state_addr():
+    return StateAddress(session_id="session", component_id="|counter:0")
+
+
+def test_unit_of_work_loads_state_once(memory_state_manager, state_addr):
+    memory_state_manager.set_component_state(state_addr, CounterState(value=1))
+    store = memory_state_manager.store
+    store.calls.clear()
+
+    with memory_state_manager.unit_of_work():
+        first = memory_state_manager.get_component_state(state_addr)
+        second = memory_state_manager.get_component_state(state_addr)
+
+    assert first is second
+    assert store.calls["restore_state"] == 1
+
+
+def test_unit_of_work_remembers_missing_states(memory_state_manager, state_addr):
+    store = memory_state_manager.store
+    with memory_state_manager.unit_of_work():
+        assert memory_state_manager.get_component_state(state_addr) is None
+        assert memory_state_manager.get_component_state(state_addr) is None
+    assert store.calls["restore_state"] == 1
+
+
+def test_unit_of_work_flushes_dirty_states_on_exit(memory_state_manager, state_addr):
+    store = memory_state_manager.store
+    with memory_state_manager.unit_of_work():
+        state = CounterState(value=1)
+        memory_state_manager.set_component_state(state_addr, state)
+        state.value = 2
+        memory_state_manager.set_component_state(state_addr, state)
+        assert memory_state_manager.component_initialized(state_addr)
+        assert memory_state_manager.session_exists(state_addr.session_id)
+        assert store.calls["save_states"] == 0
+
+    assert store.calls["save_states"] == 1
+    assert memory_state_manager.get_component_state(state_addr).value == 2
+
+
+def test_unit_of_work_discards_dirty_states_on_error(memory_state_manager, state_addr):
+    with pytest.raises(RuntimeError):
+        with memory_state_manager.unit_of_work():
+            memory_state_manager.set_component_state(state_addr, CounterState())
+            raise RuntimeError("Command failed")
+
+    assert memory_state_manager.get_component_state(state_addr) is None
+
+
+def test_nested_unit_of_work_joins_outer_one(memory_state_manager, state_addr):
+    store = memory_state_manager.store
+    with memory_state_manager.unit_of_work() as outer:
+        with memory_state_manager.unit_of_work() as inner:
+            memory_state_manager.set_component_state(state_addr, CounterState())
+        assert inner is outer
+        assert store.calls["save_states"] == 0
+    assert store.calls["save_states"] == 1
+
+
+def test_get_component_states_fetches_missing_states_in_bulk(
+    memory_state_manager, state_addr
+):
+    other_addr = state_addr.with_component_id("|counter:1")
+    missing_addr = state_addr.with_component_id("|counter:2")
+    memory_state_manager.set_component_states(
+        {state_addr: CounterState(value=1), other_addr: CounterState(value=2)}
+    )
+    store = memory_state_manager.store
+
+    with memory_state_manager.unit_of_work():
+        loaded = memory_state_manager.get_component_state(state_addr)
+        states = memory_state_manager.get_component_states(
+            [state_addr, other_addr, missing_addr]
+        )
+        assert memory_state_manager.get_component_state(missing_addr) is None
+
+    assert states == {state_addr: loaded, other_addr: CounterState(value=2)}
+    assert states[state_addr] is loaded
+    assert store.calls["restore_state"] == 1
+    assert store.calls["restore_states"] == 1
+
+
+def test_component_contexts_in_bulk(memory_state_manager, state_addr):
+    other_addr = state_addr.with_component_id("|counter:1")
+    memory_state_manager.set_component_contexts(
+        {state_addr: {"title": "First", "_private": 1}, other_addr: {"request": 1}}
+    )
+
+    contexts = memory_state_manager.get_component_contexts([state_addr, other_addr])
+
+    assert contexts == {state_addr: {"title": "First"}}
+
+
+def test_unit_of_work_buffers_contexts_and_templates(memory_state_manager, state_addr):
+    store = memory_state_manager.store
+    with memory_state_manager.unit_of_work():
+        memory_state_manager.set_component_context(state_addr, {"title": "Title"})
+        memory_state_manager.save_component_template(state_addr, "<div></div>")
+        assert store.restore_context(state_addr) is None
+        assert store.restore_component_template(state_addr) is None
+        assert memory_state_manager.get_component_context(state_addr) == {
+            "title": "Title"
+        }
+        assert memory_state_manager.restore_component_template(state_addr) == (
+            "<div></div>"
+        )
+
+    assert memory_state_manager.get_component_context(state_addr) == {"title": "Title"}
+    assert memory_state_manager.restore_component_template(state_addr) == (
+        "<div></div>"
+    )
+
+
+def test_templates_are_saved_to_store_once_per_process(memory_state_manager):
+    store = memory_state_manager.store
+    first = StateAddress(session_id="first", component_id="|counter:0")
+    second = StateAddress(session_id="second", component_id="|counter:0")
+
+    memory_state_manager.save_component_template(first, "<div>counter</div>")
+    template_hash = store.restore_component_template_hash(first)
+    store.clear_all_sessions()
+    memory_state_manager.save_component_template(second, "<div>counter</div>")
+
+    assert store.restore_component_template_hash(second) == template_hash
+    assert store.restore_template(template_hash) is None
+    assert memory_state_manager.restore_component_template(second) == (
+        "<div>counter</div>"
+    )
+
+
+def test_templates_are_saved_again_after_resave_interval(memory_state_manager):
+    store = memory_state_manager.store
+    state_addr = StateAddress(session_id="session", component_id="|counter:0")
+    memory_state_manager.save_component_template(state_addr, "<div>counter</div>")
+    template_hash = store.restore_component_template_hash(state_addr)
+    store.clear_all_sessions()
+
+    memory_state_manager.template_resave_interval = datetime.timedelta(0)
+    memory_state_manager.save_component_template(state_addr, "<div>counter</div>")
+
+    assert store.restore_template(template_hash) is not None
+
+
+def test_get_template_falls_back_to_store(memory_state_manager):
+    memory_state_manager.store.save_template("remote", b"<div>remote</div>")
+
+    assert memory_state_manager.get_template("remote") == "<div>remote</div>"
+    assert memory_state_manager.get_template("unknown") is None
+
+
+def test_async_methods_share_unit_of_work(memory_state_manager, state_addr):
+    memory_state_manager.set_component_state(state_addr, CounterState(value=1))
+    other_addr = state_addr.with_component_id("|counter:1")
+
+    async def update_states():
+        async with memory_state_manager.aunit_of_work():
+            state = await memory_state_manager.aget_component_state(state_addr)
+            assert memory_state_manager.get_component_state(state_addr) is state
+            state.value = 2
+            await memory_state_manager.aset_component_state(state_addr, state)
+            await memory_state_manager.aset_component_states(
+                {other_addr: CounterState(value=3)}
+            )
+            assert memory_state_manager.store.calls["save_states"] == 0
+
+    asyncio.run(update_states())
+
+    assert memory_state_manager.store.calls["save_states"] == 1
+    states = memory_state_manager.get_component_states([state_addr, other_addr])
+    assert states == {
+        state_addr: CounterState(value=2),
+        other_addr: CounterState(value=3),
+    }
+
+
+class BeanState(LiveComponentsModel):
+    bean: CoffeeBean
+    edit_mode: bool = False
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("partial_states", [False, True])
+def test_async_methods_load_model_backed_states(partial_states, state_addr):
+    # Without DJANGO_ALLOW_ASYNC_UNSAFE, querying models in the event loop raises
+    # SynchronousOnlyOperation.
+    bean = CoffeeBean.objects.create(
+        name="Bean", origin="Origin", roast_level="Roast", flavor_notes="Notes"
+    )
+    state_manager = StateManager(
+        serializer=PickleStateSerializer(),
+        store=CountingMemoryStateStore(),
+        lazy_states=True,
+        partial_states=partial_states,
+    )
+    state_manager.set_component_state(state_addr, BeanState(bean=bean))
+    other_addr = state_addr.with_component_id("|counter:1")
+
+    async def update_states():
+        async with state_manager.aunit_of_work():
+            state = await state_manager.aget_component_state(state_addr)
+            state.edit_mode = True
+            await state_manager.aset_component_state(state_addr, state)
+        await state_manager.aset_component_state(other_addr, BeanState(bean=bean))
+        return await state_manager.aget_component_states([state_addr, other_addr])
+
+    states = asyncio.run(update_states())
+
+    assert states[state_addr].bean.name == "Bean"
+    assert states[state_addr].edit_mode
+    assert states[other_addr].bean == bean
+
+
+def test_unit_of_work_skips_unchanged_states(memory_state_manager, state_addr):
+    other_addr = state_addr.with_component_id("|counter:1")
+    memory_state_manager.set_component_states(
+        {state_addr: CounterState(value=1), other_addr: CounterState(value=1)}
+    )
+    store = memory_state_manager.store
+    store.calls.clear()
+
+    with memory_state_manager.unit_of_work():
+        states = memory_state_manager.get_component_states([state_addr, other_addr])
+        memory_state_manager.set_component_states(states)
+    assert store.calls["save_states"] == 0
+    assert store.calls["touch_states"] == 1
+
+    with memory_state_manager.unit_of_work():
+        state = memory_state_manager.get_component_state(state_addr)
+        state.value = 2
+        memory_state_manager.set_component_states({state_addr: state})
+    assert store.calls["save_states"] == 1
+    assert memory_state_manager.get_component_state(state_addr).value == 2
+
+
+def test_commands_save_only_changed_states(rf, memory_state_manager):
+    state_addr = StateAddress(session_id="session", component_id="|tests/counter:0")
+    memory_state_manager.set_component_state(state_addr, CounterState())
+    store = memory_state_manager.store
+    store.calls.clear()
+
+    with memory_state_manager.unit_of_work():
+        memory_state_manager.call_component_command(rf.post("/"), state_addr, "noop")
+    assert store.calls["save_states"] == 0
+
+    with memory_state_manager.unit_of_work():
+        memory_state_manager.call_component_command(
+            rf.post("/"), state_addr, "increment"
+        )
+    assert store.calls["save_states"] == 1
+    assert memory_state_manager.get_component_state(state_addr).value == 1
+
+
+def test_readonly_command_does_not_save_state(rf, memory_state_manager):
+    state_addr = StateAddress(session_id="session", component_id="|tests/counter:0")
+    memory_state_manager.set_component_state(state_addr, CounterState())
+    store = memory_state_manager.store
+    store.calls.clear()
+
+    memory_state_manager.call_component_command(rf.post("/"), state_addr, "peek")
+
+    assert store.calls["save_state"] == 0
+
+
+class CountingPickleStateSerializer(PickleStateSerializer):
+    """Pickle serializer that counts serialized and deserialized values."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: Counter[str] = Counter()
+
+    def serialize(self, state):
+        self.calls["serialize"] += 1
+        return super().serialize(state)
+
+    def deserialize(self, raw_state):
+        self.calls["deserialize"] += 1
+        return super().deserialize(raw_state)
+
+
+def test_lazy_states_are_deserialized_on_first_access(state_addr):
+    other_addr = state_addr.with_component_id("|counter:1")
+    serializer = CountingPickleStateSerializer()
+    state_manager = StateManager(
+        serializer=serializer, store=CountingMemoryStateStore(), lazy_states=True
+    )
+    state_manager.set_component_states(
+        {state_addr: CounterState(value=1), other_addr: CounterState(value=1)}
+    )
+    serializer.calls.clear()
+    state_manager.store.calls.clear()
+
+    with state_manager.unit_of_work():
+        states = state_manager.get_component_states([state_addr, other_addr])
+        assert serializer.calls["deserialize"] == 0
+        states[state_addr].value = 2
+        assert serializer.calls["deserialize"] == 1
+        state_manager.set_component_states(states)
+
+    # The state, never accessed, is neither deserialized nor serialized again.
+    assert serializer.calls == {"deserialize": 1, "serialize": 1}
+    assert state_manager.store.calls["save_states"] == 1
+    assert state_manager.store.calls["touch_states"] == 1
+    assert state_manager.get_component_states([state_addr, other_addr]) == {
+        state_addr: CounterState(value=2),
+        other_addr: CounterState(value=1),
+    }
+
+
+def test_unaccessed_lazy_state_is_saved_as_is(state_addr):
+    other_addr = state_addr.with_component_id("|counter:1")
+    serializer = CountingPickleStateSerializer()
+    state_manager = StateManager(
+        serializer=serializer, store=CountingMemoryStateStore(), lazy_states=True
+    )
+    state_manager.set_component_state(state_addr, CounterState(value=1))
+    serializer.calls.clear()
+
+    state = state_manager.get_component_state(state_addr)
+    state_manager.set_component_state(other_addr, state)
+
+    assert serializer.calls["serialize"] == 0
+    assert state_manager.get_component_state(other_addr) == CounterState(value=1)
+
+
+class CsvState(BaseModel):
+    show_header: bool = False
+    records: Blob[list[list[str]]]
+
+
+class CountingBlobsMemoryStateStore(CountingMemoryStateStore):
+    def save_blobs(self, raw_values):
+        self.calls["save_blobs"] += 1
+        self.calls["saved_blob_values"] += sum(
+            raw_value is not None for raw_value in raw_values.values()
+        )
+        return super().save_blobs(raw_values)
+
+    def restore_blob(self, blob_hash):
+        self.calls["restore_blob"] += 1
+        return super().restore_blob(blob_hash)
+
+
+@pytest.mark.parametrize("serializer_cls", [PickleStateSerializer, JsonStateSerializer])
+def test_blobs_are_saved_once_and_loaded_on_access(serializer_cls, state_addr):
+    other_addr = StateAddress(session_id="other", component_id="|counter:0")
+    records = [["Bean", "Kenya"]] * 100
+    store = CountingBlobsMemoryStateStore()
+    state_manager = StateManager(serializer=serializer_cls(), store=store)
+
+    state_manager.set_component_states(
+        {state_addr: CsvState(records=records), other_addr: CsvState(records=records)}
+    )
+    assert store.calls["saved_blob_values"] == 1
+
+    with state_manager.unit_of_work():
+        state = state_manager.get_component_state(state_addr)
+        state.show_header = True
+        state_manager.set_component_state(state_addr, state)
+    # Restoring and saving the state reset the TTL of its blob.
+    assert store.calls["save_blobs"] == 3
+    assert store.calls["saved_blob_values"] == 1
+    assert store.calls["restore_blob"] == 0
+
+    state = state_manager.get_component_state(state_addr)
+    assert state.show_header
+    assert state.records.value == records
+    assert store.calls["restore_blob"] == 1
+    assert len(state_manager.serialize(state)) < 200
+
+
+def test_blobs_require_state_manager():
+    with pytest.raises(pickle.PicklingError):
+        PickleStateSerializer().serialize(CsvState(records=[]))
+
+
+class RowState(LiveComponentsModel):
+    edit_mode: bool = False
+    records: list[list[str]] = []
+
+
+def test_partial_states_save_only_changed_fields(state_addr):
+    serializer = CountingPickleStateSerializer()
+    store = CountingMemoryStateStore()
+    state_manager = StateManager(
+        serializer=serializer, store=store, partial_states=True
+    )
+    records = [["Bean", "Kenya"]] * 100
+    state_manager.set_component_state(state_addr, RowState(records=records))
+    assert serializer.calls["serialize"] == 2
+    serializer.calls.clear()
+    store.calls.clear()
+
+    with state_manager.unit_of_work():
+        state = state_manager.get_component_state(state_addr)
+        state.edit_mode = True
+        state_manager.set_component_state(state_addr, state)
+    # Only the edit mode is written back, not the records.
+    assert store.calls["saved_states"] == 1
+
+    with state_manager.unit_of_work():
+        state = state_manager.get_component_state(state_addr)
+        state_manager.set_component_state(state_addr, state)
+    assert store.calls["saved_states"] == 1
+    assert store.calls["touch_states"] == 1
+
+    assert state_manager.get_component_state(state_addr) == RowState(
+        edit_mode=True, records=records
+    )
+
+
+class RowListState(LiveComponentsModel):
+    title: str = ""
+    row: RowState = RowState()
+
+
+def test_partial_states_save_fields_changed_in_place(state_addr):
+    store = CountingMemoryStateStore()
+    state_manager = StateManager(
+        serializer=PickleStateSerializer(), store=store, partial_states=True
+    )
+    state_manager.set_component_state(state_addr, RowListState())
+    store.calls.clear()
+
+    with state_manager.unit_of_work():
+        state = state_manager.get_component_state(state_addr)
+        state.row.records.append(["Bean", "Kenya"])
+        state.row.edit_mode = True
+        state_manager.set_component_state(state_addr, state)
+    # The row is written back, the title isn't.
+    assert store.calls["saved_states"] == 1
+
+    assert state_manager.get_component_state(state_addr) == RowListState(
+        row=RowState(edit_mode=True, records=[["Bean", "Kenya"]])
+    )
+
+
+def test_partial_states_save_all_fields_of_new_states(state_addr):
+    serializer = CountingPickleStateSerializer()
+    state_manager = StateManager(
+        serializer=serializer, store=CountingMemoryStateStore(), partial_states=True
+    )
+    state_manager.set_component_state(state_addr, RowState())
+    serializer.calls.clear()
+
+    with state_manager.unit_of_work():
+        state = state_manager.get_component_state(state_addr)
+        state = state.model_copy(update={"records": [["Bean", "Kenya"]]})
+        state_manager.set_component_state(state_addr, state)
+    assert serializer.calls["serialize"] == 2
+
+    assert state_manager.get_component_state(state_addr) == RowState(
+        records=[["Bean", "Kenya"]]
+    )
+
+
+def test_partial_states_replace_states_stored_as_a_whole(state_addr):
+    state_manager = StateManager(
+        serializer=PickleStateSerializer(), store=CountingMemoryStateStore()
+    )
+    state_manager.set_component_state(state_addr, RowState(edit_mode=True))
+
+    state_manager.partial_states = True
+    with state_manager.unit_of_work():
+        state = state_manager.get_component_state(state_addr)
+        state_manager.set_component_state(state_addr, state)
+
+    field_addr = get_field_address(state_addr, "edit_mode")
+    assert is_state_header(state_manager.store.restore_state(state_addr))
+    assert state_manager.deserialize(state_manager.store.restore_state(field_addr))
+    assert state_manager.get_component_state(state_addr) == RowState(edit_mode=True)
@@ -0,0 +1,95 @@
+import datetime
+
+import pytest
+
+from livecomponents.manager.stores import MemoryStateStore
+from livecomponents.types import StateAddress
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def memory_state_store(clock, monkeypatch):
+    store = MemoryStateStore(
+        ttl=datetime.timedelta(seconds=100), ttl_gc=datetime.timedelta(seconds=10)
+    )
+    monkeypatch.setattr(store, "_now", clock)
+    return store
+
+
+def test_session_expires_after_ttl(memory_state_store, clock):
+    state_addr = StateAddress(session_id="session", component_id="|root:0")
+    memory_state_store.save_state(state_addr, b"state")
+
+    clock.now = 90
+    assert memory_state_store.restore_state(state_addr) == b"state"
+    clock.now = 180
+    assert memory_state_store.session_exists("session")
+    clock.now = 190
+    assert not memory_state_store.session_exists("session")
+    assert memory_state_store.restore_state(state_addr) is None
+    assert memory_state_store.size == 0
+
+
+def test_clear_session_sets_ttl_gc(memory_state_store, clock):
+    state_addr = StateAddress(session_id="session", component_id="|root:0")
+    memory_state_store.save_state(state_addr, b"state")
+    memory_state_store.save_component_template_hash(state_addr, "hash")
+
+    memory_state_store.clear_session("session")
+
+    clock.now = 9
+    assert memory_state_store.session_exists("session")
+    clock.now = 10
+    assert not memory_state_store.session_exists("session")
+    assert memory_state_store.restore_component_template_hash(state_addr) is None
+
+
+def test_least_recently_used_sessions_are_evicted(memory_state_store):
+    memory_state_store.max_bytes = 10
+    first = StateAddress(session_id="first", component_id="|root:0")
+    second = StateAddress(session_id="second", component_id="|root:0")
+    third = StateAddress(session_id="third", component_id="|root:0")
+    memory_state_store.save_state(first, b"1234")
+    memory_state_store.save_state(second, b"1234")
+    memory_state_store.restore_state(first)
+
+    memory_state_store.save_state(third, b"1234")
+
+    assert memory_state_store.session_exists("first")
+    assert not memory_state_store.session_exists("second")
+    assert memory_state_store.session_exists("third")
+    assert memory_state_store.size == 8
+
+
+def test_size_accounts_for_overwritten_values(memory_state_store):
+    state_addr = StateAddress(session_id="session", component_id="|root:0")
+    memory_state_store.save_states({state_addr: b"1234"})
+    memory_state_store.save_states({state_addr: b"12"})
+    memory_state_store.save_contexts({state_addr: b"123"})
+
+    assert memory_state_store.size == 5
+
+
+def test_blobs_expire_unless_saved_or_restored(memory_state_store, clock):
+    memory_state_store.save_blobs({"first": b"first", "second": b"second"})
+
+    clock.now = 90
+    memory_state_store.save_blobs({"first": None, "unknown": None})
+    assert memory_state_store.restore_blob("unknown") is None
+    clock.now = 150
+    assert memory_state_store.restore_blob("first") == b"first"
+    assert memory_state_store.restore_blob("second") is None
+    clock.now = 240
+    assert memory_state_store.restore_blob("first") == b"first"
@@ -0,0 +1,69 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse, HttpResponseServerError
+from django.template import RequestContext, Template
+from pydantic import BaseModel
+
+from livecomponents.middleware import UnitOfWorkMiddleware
+from livecomponents.types import StateAddress
+
+
+class MessageState(BaseModel):
+    message: str
+
+
+def test_unit_of_work_middleware_buffers_writes_until_response(rf, state_manager):
+    session_id = "session"
+    state_addr = StateAddress(session_id=session_id, component_id="|sample:0")
+    store = state_manager.store
+
+    def get_response(request):
+        template = Template(
+            '{% load livecomponents %}{% livecomponent "sample" message="hello" %}'
+        )
+        context = RequestContext(
+            request, {"request": request, "LIVECOMPONENTS_SESSION_ID": session_id}
+        )
+        html = template.render(context)
+        # Nothing is written yet, but the reads are served from the buffer.
+        assert not store.session_exists(session_id)
+        assert state_manager.session_exists(session_id)
+        assert state_manager.component_initialized(state_addr)
+        assert state_manager.restore_component_template(state_addr)
+        return HttpResponse(html)
+
+    response = UnitOfWorkMiddleware(get_response)(rf.get("/"))
+
+    assert "HELLO" in response.content.decode()
+    assert store.session_exists(session_id)
+    assert state_manager.get_component_state(state_addr).message == "hello"
+    assert state_manager.restore_component_template(state_addr)
+
+
+def test_unit_of_work_middleware_discards_writes_on_server_error(rf, state_manager):
+    state_addr = StateAddress(session_id="session", component_id="|sample:0")
+
+    def get_response(request):
+        state_manager.set_component_state(state_addr, MessageState(message="hello"))
+        return HttpResponseServerError()
+
+    response = UnitOfWorkMiddleware(get_response)(rf.get("/"))
+
+    assert response.status_code == 500
+    assert state_manager.get_component_state(state_addr) is None
+
+
+def test_async_unit_of_work_middleware_flushes_writes(rf, state_manager):
+    state_addr = StateAddress(session_id="session", component_id="|sample:0")
+
+    async def get_response(request):
+        await state_manager.aset_component_state(
+            state_addr, MessageState(message="hello")
+        )
+        assert state_manager.store.restore_state(state_addr) is None
+        return HttpResponse()
+
+    middleware = UnitOfWorkMiddleware(get_response)
+    assert iscoroutinefunction(middleware)
+    async_to_sync(middleware)(rf.get("/"))
+
+    assert state_manager.get_component_state(state_addr).message == "hello"
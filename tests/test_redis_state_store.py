@@ -1,3 +1,6 @@
+import datetime
+
+from livecomponents.manager.stores import get_state_version
 from livecomponents.types import StateAddress
 
 
@@ -45,7 +48,129 @@ def test_clear_session_and_then_save_state_recovers_ttl(redis_state_store):
     )
 
 
+def test_register_command_seq_keeps_greatest_number(redis_state_store):
+    state_addr = StateAddress(session_id="session_id", component_id="|root:0")
+
+    assert redis_state_store.register_command_seq(state_addr, 2)
+    assert redis_state_store.register_command_seq(state_addr, 2)
+    assert not redis_state_store.register_command_seq(state_addr, 1)
+    assert redis_state_store.restore_command_seq(state_addr) == 2
+    assert redis_state_store.register_command_seq(state_addr, 3)
+    assert redis_state_store.restore_command_seq(state_addr) == 3
+
+
 def get_state_key(redis_state_store, state_addr):
     return redis_state_store._get_key_name(
         redis_state_store.key_prefix, state_addr.session_id
     )
+
+
+def test_save_and_restore_states_in_bulk(redis_state_store):
+    first = StateAddress(session_id="first", component_id="|root:0")
+    second = StateAddress(session_id="second", component_id="|root:0|child:1")
+    missing = StateAddress(session_id="first", component_id="|missing:0")
+    redis_state_store.save_states({first: b"first", second: b"second"})
+
+    restored = redis_state_store.restore_states([first, second, missing])
+
+    assert restored == {first: b"first", second: b"second"}
+    assert (
+        redis_state_store.client.ttl(get_state_key(redis_state_store, second))
+        > redis_state_store.ttl.total_seconds() - 10
+    )
+
+
+def test_component_templates_are_stored_once_and_referenced_by_hash(
+    redis_state_store,
+):
+    first = StateAddress(session_id="first", component_id="|root:0")
+    second = StateAddress(session_id="second", component_id="|root:0")
+    redis_state_store.save_component_template(first, b"same")
+    redis_state_store.save_component_template(second, b"same")
+
+    template_hash = redis_state_store.restore_component_template_hash(first)
+    assert redis_state_store.restore_component_template_hashes([first, second]) == {
+        first: template_hash,
+        second: template_hash,
+    }
+    assert redis_state_store.restore_component_template(second) == b"same"
+    template_key = redis_state_store._get_key_name(
+        redis_state_store.template_cache_prefix, template_hash
+    )
+    template_ttl = redis_state_store.template_ttl.total_seconds()
+    assert 0 < redis_state_store.client.ttl(template_key) <= template_ttl
+
+
+def test_templates_never_expire_without_template_ttl(redis_state_store):
+    redis_state_store.template_ttl = None
+    redis_state_store.save_template("hash", b"template")
+    template_key = redis_state_store._get_key_name(
+        redis_state_store.template_cache_prefix, "hash"
+    )
+
+    assert redis_state_store.restore_template("hash") == b"template"
+    assert redis_state_store.client.ttl(template_key) == -1
+
+
+def test_restore_template_resets_template_ttl(redis_state_store):
+    redis_state_store.template_ttl = datetime.timedelta(minutes=1)
+    redis_state_store.save_template("hash", b"template")
+    template_key = redis_state_store._get_key_name(
+        redis_state_store.template_cache_prefix, "hash"
+    )
+    redis_state_store.client.expire(template_key, 10)
+
+    assert redis_state_store.restore_template("hash") == b"template"
+    assert redis_state_store.client.ttl(template_key) > 10
+
+
+def test_save_batch_saves_states_contexts_and_template_hashes(redis_state_store):
+    state_addr = StateAddress(session_id="session_id", component_id="|root:0")
+    redis_state_store.save_batch(
+        {state_addr: b"state"}, {state_addr: b"context"}, {state_addr: "hash"}
+    )
+
+    assert redis_state_store.restore_state(state_addr) == b"state"
+    assert redis_state_store.restore_context(state_addr) == b"context"
+    assert redis_state_store.restore_component_template_hash(state_addr) == "hash"
+
+
+def test_saved_states_have_version_stamps(redis_state_store):
+    state_addr = StateAddress(session_id="session_id", component_id="|root:0")
+    other_addr = state_addr.with_component_id("|root:1")
+    missing_addr = state_addr.with_component_id("|root:2")
+    redis_state_store.save_state(state_addr, b"state")
+    redis_state_store.save_batch({other_addr: b"other"}, {}, {})
+
+    versions = redis_state_store.restore_state_versions(
+        [state_addr, other_addr, missing_addr]
+    )
+
+    assert versions == {
+        state_addr: get_state_version(b"state"),
+        other_addr: get_state_version(b"other"),
+    }
+
+
+def test_touch_states_resets_ttl(redis_state_store):
+    state_addr = StateAddress(session_id="session_id", component_id="|root:0")
+    redis_state_store.save_state(state_addr, b"state")
+    state_key = get_state_key(redis_state_store, state_addr)
+    redis_state_store.client.expire(state_key, 10)
+
+    redis_state_store.touch_states([state_addr])
+
+    assert redis_state_store.client.ttl(state_key) > 10
+
+
+def test_blobs_are_shared_and_their_ttl_is_reset(redis_state_store):
+    redis_state_store.save_blobs({"blob_hash": b"blob"})
+    blob_key = f"{redis_state_store.blob_prefix}blob_hash"
+    redis_state_store.client.expire(blob_key, 10)
+
+    redis_state_store.save_blobs({"blob_hash": None})
+    assert redis_state_store.client.ttl(blob_key) > 10
+    redis_state_store.client.expire(blob_key, 10)
+    assert redis_state_store.restore_blob("blob_hash") == b"blob"
+    assert redis_state_store.client.ttl(blob_key) > 10
+    assert redis_state_store.restore_blob("unknown") is None
@@ -1,20 +1,41 @@
 import io
+import pickle
+import time
 from pickletools import dis, genops
+from unittest.mock import Mock
 
 import pytest
 from django import forms
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
 from django.forms import ModelForm
 from myapp.models import CoffeeBean
 from pydantic import BaseModel
 
-from livecomponents.manager.serializers import PickleStateSerializer
+from livecomponents.manager.serializers import (
+    CompositeStateSerializer,
+    JsonStateSerializer,
+    PickleStateSerializer,
+)
+from livecomponents.manager.unit_of_work import UnitOfWork, use_unit_of_work
+from livecomponents.utils import LiveComponentsModel
 
 
 class MyModel(BaseModel):
     foo: str
 
 
+class MyNestedModel(BaseModel):
+    items: list[MyModel] = []
+    counts: dict[str, int] = {}
+
+
+class MyStateWithBean(LiveComponentsModel):
+    bean: CoffeeBean
+    form: forms.Form | None = None
+    items: list[MyModel] = []
+
+
 class MyForm(forms.Form):
     name = forms.CharField(max_length=100)
 
@@ -105,6 +126,20 @@ def test_form_serialization_with_data_and_errors():
     assert deserialized.errors == {"name": ["Name cannot be BAD"]}
 
 
+def test_form_is_validated_lazily(monkeypatch):
+    form = MyForm(data={"name": "bar"})
+    deserialized = reserialize(form)
+    full_clean = Mock(wraps=deserialized.full_clean)
+    monkeypatch.setattr(deserialized, "full_clean", full_clean)
+
+    assert isinstance(deserialized, MyForm)
+    full_clean.assert_not_called()
+    assert "name" in deserialized.cleaned_data
+    assert deserialized.is_valid()
+    full_clean.assert_called_once()
+    assert type(reserialize(deserialized)) is type(deserialized)
+
+
 def test_form_serializarion_without_data():
     form = MyForm(initial={"name": "foo"})
     assert form.is_bound is False
@@ -134,5 +169,202 @@ def test_model_form_serialization_unsaved_instance():
     assert deserialized.instance.username == "foo"
 
 
-def reserialize(obj):
-    return PickleStateSerializer().deserialize(PickleStateSerializer().serialize(obj))
+def test_json_serializer_stores_pydantic_models_as_json():
+    model = MyNestedModel(items=[MyModel(foo="bar")], counts={"a": 1})
+    serialized = JsonStateSerializer().serialize(model)
+
+    assert serialized.startswith(b"{")
+    assert b"pickle" not in serialized
+    assert JsonStateSerializer().deserialize(serialized) == model
+
+
+@pytest.mark.django_db
+def test_json_serializer_falls_back_for_models_and_forms():
+    bean = CoffeeBean.objects.create(
+        name="Bean", origin="Origin", roast_level="Roast", flavor_notes="Notes"
+    )
+    state = MyStateWithBean(
+        bean=bean, form=MyForm(data={"name": "BAD"}), items=[MyModel(foo="bar")]
+    )
+
+    deserialized = reserialize(state, JsonStateSerializer())
+
+    assert deserialized.bean == bean
+    assert deserialized.form.errors == {"name": ["Name cannot be BAD"]}
+    assert deserialized.items == [MyModel(foo="bar")]
+
+
+def test_json_serializer_pickles_other_values():
+    context = {"title": "Title", "tags": ("a", "b")}
+    serialized = JsonStateSerializer().serialize(context)
+
+    assert serialized.startswith(b"\x80")
+    assert JsonStateSerializer().deserialize(serialized) == context
+
+
+def test_json_serializer_reads_pickled_states():
+    pickled = PickleStateSerializer().serialize(MyModel(foo="bar"))
+
+    assert JsonStateSerializer().deserialize(pickled) == MyModel(foo="bar")
+
+
+def test_composite_serializer_writes_preferred_format():
+    serializer = CompositeStateSerializer(write_format="json")
+    serialized = serializer.serialize(MyModel(foo="bar"))
+
+    assert serialized.startswith(b"\xfe\x01\x02{")
+    assert serializer.deserialize(serialized) == MyModel(foo="bar")
+
+
+def test_composite_serializer_reads_all_formats():
+    pickled = CompositeStateSerializer(write_format="pickle").serialize(
+        MyModel(foo="pickle")
+    )
+    legacy = PickleStateSerializer().serialize(MyModel(foo="legacy"))
+    serializer = CompositeStateSerializer(write_format="json")
+
+    assert serializer.deserialize(pickled) == MyModel(foo="pickle")
+    assert serializer.deserialize(legacy) == MyModel(foo="legacy")
+
+
+def test_composite_serializer_with_custom_format():
+    serializer = CompositeStateSerializer(
+        write_format="custom",
+        formats={
+            "custom": {
+                "id": 200,
+                "cls": "livecomponents.manager.serializers.PickleStateSerializer",
+            }
+        },
+    )
+
+    serialized = serializer.serialize(MyModel(foo="bar"))
+
+    assert serialized[2] == 200
+    assert serializer.deserialize(serialized) == MyModel(foo="bar")
+    with pytest.raises(ValueError, match="Unknown state format ID"):
+        CompositeStateSerializer().deserialize(serialized)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"write_format": "unknown"},
+        {"formats": {"custom": {"id": 1, "cls": "json"}}},
+        {
+            "formats": {
+                "first": {"id": 200, "cls": "pickle.Pickler"},
+                "second": {"id": 200, "cls": "pickle.Pickler"},
+            }
+        },
+    ],
+)
+def test_composite_serializer_configuration_errors(kwargs):
+    with pytest.raises(ImproperlyConfigured):
+        CompositeStateSerializer(**kwargs)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "serializer",
+    [PickleStateSerializer(), JsonStateSerializer(), CompositeStateSerializer()],
+)
+def test_serializers_load_django_models_in_bulk(serializer, django_assert_num_queries):
+    beans = [
+        CoffeeBean.objects.create(
+            name=f"Bean {i}", origin="Origin", roast_level="Roast", flavor_notes=""
+        )
+        for i in range(3)
+    ]
+    raw_states = {
+        "first": serializer.serialize(MyStateWithBean(bean=beans[0])),
+        "second": serializer.serialize(MyStateWithBean(bean=beans[1])),
+        "third": serializer.serialize(MyStateWithBean(bean=beans[1])),
+        "context": serializer.serialize({"beans": beans}),
+    }
+
+    with use_unit_of_work(UnitOfWork()):
+        with django_assert_num_queries(1):
+            states = serializer.deserialize_many(raw_states)
+        with django_assert_num_queries(0):
+            state = serializer.deserialize(raw_states["first"])
+
+    assert list(states) == list(raw_states)
+    assert states["context"] == {"beans": beans}
+    assert states["second"].bean is states["third"].bean
+    assert states["second"].bean is states["context"]["beans"][1]
+    assert state.bean is states["first"].bean
+
+
+@pytest.mark.django_db
+def test_pickle_serializer_fails_on_deleted_models():
+    bean = CoffeeBean.objects.create(
+        name="Bean", origin="Origin", roast_level="Roast", flavor_notes="Notes"
+    )
+    serialized = PickleStateSerializer().serialize(bean)
+    bean.delete()
+
+    with pytest.raises(pickle.UnpicklingError, match="does not exist"):
+        PickleStateSerializer().deserialize(serialized)
+
+
+@pytest.fixture
+def bean(db):
+    return CoffeeBean.objects.create(
+        name="Bean", origin="Origin", roast_level="Roast", flavor_notes="Notes"
+    )
+
+
+@pytest.mark.parametrize("serializer_cls", [PickleStateSerializer, JsonStateSerializer])
+def test_model_snapshots_of_allowed_models(
+    serializer_cls, bean, django_assert_num_queries
+):
+    serializer = serializer_cls(model_snapshots={"myapp.CoffeeBean": {}})
+    serialized = serializer.serialize(MyStateWithBean(bean=bean))
+    CoffeeBean.objects.filter(pk=bean.pk).update(name="Renamed")
+
+    with django_assert_num_queries(0):
+        deserialized = serializer.deserialize(serialized)
+
+    assert deserialized.bean == bean
+    assert deserialized.bean.name == "Bean"
+    assert serializer_cls().deserialize(serialized).bean.name == "Renamed"
+
+
+def test_model_snapshots_expire(bean, django_assert_num_queries, monkeypatch):
+    serializer = PickleStateSerializer(
+        model_snapshots={"myapp.coffeebean": {"max_age": 60}}
+    )
+    serialized = serializer.serialize(bean)
+    CoffeeBean.objects.filter(pk=bean.pk).update(name="Renamed")
+
+    with django_assert_num_queries(0):
+        deserialized = serializer.deserialize(serialized)
+    assert deserialized.name == "Bean"
+
+    # Saving a model, restored from the snapshot, doesn't refresh the snapshot.
+    serialized = serializer.serialize(deserialized)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    with django_assert_num_queries(1):
+        assert serializer.deserialize(serialized).name == "Renamed"
+
+
+def test_model_snapshots_with_version_field(bean, django_assert_num_queries):
+    serializer = PickleStateSerializer(
+        model_snapshots={"myapp.coffeebean": {"version_field": "stock_quantity"}}
+    )
+    serialized = serializer.serialize(bean)
+    CoffeeBean.objects.filter(pk=bean.pk).update(name="Renamed")
+
+    with django_assert_num_queries(1):
+        assert serializer.deserialize(serialized).name == "Bean"
+
+    CoffeeBean.objects.filter(pk=bean.pk).update(stock_quantity=10)
+    with django_assert_num_queries(2):
+        assert serializer.deserialize(serialized).name == "Renamed"
+
+
+def reserialize(obj, serializer=None):
+    serializer = serializer or PickleStateSerializer()
+    return serializer.deserialize(serializer.serialize(obj))
@@ -0,0 +1,36 @@
+from django.template import Context
+
+from livecomponents.template_cache import CompiledTemplateCache
+
+
+def test_compiled_template_cache_returns_cached_template():
+    cache = CompiledTemplateCache(max_size=2)
+
+    first = cache.get_or_compile("hash", lambda: "{{ value }}")
+    second = cache.get_or_compile("hash", lambda: "{{ value }}")
+
+    assert first is second
+    assert first.render(Context({"value": "foo"})) == "foo"
+    assert cache.cache_info() == (1, 1, 2, 1)
+
+
+def test_compiled_template_cache_evicts_least_recently_used():
+    cache = CompiledTemplateCache(max_size=2)
+    first = cache.get_or_compile("first", lambda: "first")
+    cache.get_or_compile("second", lambda: "second")
+    cache.get_or_compile("first", lambda: "first")
+    cache.get_or_compile("third", lambda: "third")
+
+    assert cache.get_or_compile("first", lambda: "first") is first
+    assert cache.cache_info().size == 2
+    assert cache.cache_info().misses == 3
+
+
+def test_compiled_template_cache_can_be_disabled():
+    cache = CompiledTemplateCache(max_size=0)
+
+    first = cache.get_or_compile("hash", lambda: "{{ value }}")
+    second = cache.get_or_compile("hash", lambda: "{{ value }}")
+
+    assert first is not second
+    assert cache.cache_info() == (0, 2, 0, 0)
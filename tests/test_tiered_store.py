@@ -0,0 +1,225 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from livecomponents.manager.manager import StateManager
+from livecomponents.manager.serializers import PickleStateSerializer
+from livecomponents.manager.stores import MemoryStateStore
+from livecomponents.manager.tiered_store import TieredStateStore
+from livecomponents.manager.unit_of_work import use_unit_of_work
+from livecomponents.types import StateAddress
+from livecomponents.utils import LiveComponentsModel
+
+
+class CounterState(BaseModel):
+    value: int = 0
+
+
+class CountingPickleStateSerializer(PickleStateSerializer):
+    def __init__(self):
+        self.deserialized = 0
+
+    def deserialize(self, serialized_state: bytes):
+        self.deserialized += 1
+        return super().deserialize(serialized_state)
+
+    def deserialize_many(self, serialized_states):
+        self.deserialized += len(serialized_states)
+        return super().deserialize_many(serialized_states)
+
+
+@pytest.fixture
+def tiered_store():
+    return TieredStateStore(MemoryStateStore())
+
+
+@pytest.fixture
+def serializer():
+    return CountingPickleStateSerializer()
+
+
+@pytest.fixture
+def state_manager(tiered_store, serializer):
+    return StateManager(serializer=serializer, store=tiered_store)
+
+
+@pytest.fixture
+def state_addr():
+    return StateAddress(session_id="session", component_id="|counter:0")
+
+
+def test_flushed_state_is_restored_without_deserializing(
+    state_manager, serializer, state_addr
+):
+    with state_manager.unit_of_work():
+        state = CounterState(value=1)
+        state_manager.set_component_state(state_addr, state)
+
+    assert state_manager.get_component_state(state_addr) is state
+    assert serializer.deserialized == 0
+    assert state_manager.store.hits == 1
+
+
+def test_state_saved_outside_unit_of_work_is_cached_serialized(
+    state_manager, serializer, state_addr
+):
+    state = CounterState(value=1)
+    state_manager.set_component_state(state_addr, state)
+    state.value = 2
+
+    restored = state_manager.get_component_state(state_addr)
+
+    assert restored is not state
+    assert restored.value == 1
+    assert serializer.deserialized == 1
+    assert state_manager.store.hits == 1
+
+
+def test_restored_state_is_not_shared(state_manager, serializer, state_addr):
+    with state_manager.unit_of_work():
+        state_manager.set_component_state(state_addr, CounterState(value=1))
+
+    first = state_manager.get_component_state(state_addr)
+    first.value = 2
+    second = state_manager.get_component_state(state_addr)
+
+    assert second is not first
+    assert second.value == 1
+    assert serializer.deserialized == 1
+
+
+def test_state_changed_by_another_process_is_deserialized(
+    state_manager, serializer, state_addr
+):
+    state_manager.set_component_state(state_addr, CounterState(value=1))
+    remote_state = CounterState(value=2)
+    state_manager.store.store.save_state(
+        state_addr, state_manager.serializer.serialize(remote_state)
+    )
+
+    assert state_manager.get_component_state(state_addr) == remote_state
+    assert serializer.deserialized == 1
+    assert state_manager.store.misses == 1
+
+
+def test_unit_of_work_puts_saved_states_back_on_flush(
+    state_manager, serializer, state_addr
+):
+    other_addr = state_addr.with_component_id("|counter:1")
+    state_manager.set_component_states(
+        {state_addr: CounterState(value=1), other_addr: CounterState(value=2)}
+    )
+
+    with state_manager.unit_of_work():
+        states = state_manager.get_component_states([state_addr, other_addr])
+        states[state_addr].value = 3
+        state_manager.set_component_state(state_addr, states[state_addr])
+        # Changed in place, but not saved.
+        states[other_addr].value = 4
+    serializer.deserialized = 0
+
+    assert state_manager.get_component_state(state_addr) is states[state_addr]
+    assert state_manager.get_component_state(other_addr).value == 2
+    assert serializer.deserialized == 1
+
+
+def test_flushed_unit_of_work_reloads_states(state_manager, state_addr):
+    with state_manager.unit_of_work() as unit_of_work:
+        state = CounterState(value=1)
+        state_manager.set_component_state(state_addr, state)
+
+    # Streamed responses re-activate the unit of work after it has been flushed.
+    with use_unit_of_work(unit_of_work):
+        restored = state_manager.get_component_state(state_addr)
+    concurrent = state_manager.get_component_state(state_addr)
+
+    assert restored is state
+    assert concurrent is not state
+
+
+def test_discarded_unit_of_work_puts_no_states_back(
+    state_manager, serializer, state_addr
+):
+    state_manager.set_component_state(state_addr, CounterState(value=1))
+
+    with state_manager.unit_of_work() as unit_of_work:
+        state = state_manager.get_component_state(state_addr)
+        state.value = 2
+        state_manager.set_component_state(state_addr, state)
+        unit_of_work.discard()
+
+    assert state_manager.get_component_state(state_addr).value == 1
+    assert state_manager.store.misses == 1
+
+
+def test_async_unit_of_work_puts_states_back_on_flush(
+    state_manager, serializer, state_addr
+):
+    state_manager.set_component_state(state_addr, CounterState(value=1))
+
+    async def increment():
+        async with state_manager.aunit_of_work():
+            state = await state_manager.aget_component_state(state_addr)
+            state.value += 1
+            await state_manager.aset_component_state(state_addr, state)
+
+    asyncio.run(increment())
+    asyncio.run(increment())
+
+    assert state_manager.get_component_state(state_addr).value == 3
+    # Only the state, saved outside a unit of work, is deserialized.
+    assert serializer.deserialized == 1
+    assert state_manager.store.hits == 3
+
+
+class FlagState(LiveComponentsModel):
+    flag: bool = False
+
+
+def test_states_restored_from_fields_are_not_put_back(state_manager, state_addr):
+    state_manager.partial_states = True
+    state_manager.set_component_state(state_addr, FlagState())
+    # States, stored by fields before, are still read by fields.
+    state_manager.partial_states = False
+
+    with state_manager.unit_of_work():
+        state_manager.get_component_state(state_addr)
+    state_manager.get_component_state(state_addr)
+
+    assert state_manager.store.hits == 0
+    assert state_manager.store.misses == 2
+
+
+def test_clear_session_drops_cached_states(state_manager, serializer, state_addr):
+    state = CounterState(value=1)
+    state_manager.set_component_state(state_addr, state)
+    state_manager.clear_session(state_addr.session_id)
+
+    assert state_manager.get_component_state(state_addr) is not state
+    assert serializer.deserialized == 1
+
+
+def test_cache_size_is_limited(serializer, state_addr):
+    store = TieredStateStore(MemoryStateStore(), max_size=1)
+    state_manager = StateManager(serializer=serializer, store=store)
+    other_addr = state_addr.with_component_id("|counter:1")
+    state_manager.set_component_state(state_addr, CounterState(value=1))
+    state_manager.set_component_state(other_addr, CounterState(value=2))
+
+    assert state_manager.get_component_state(state_addr).value == 1
+    assert state_manager.get_component_state(other_addr).value == 2
+    assert store.misses == 1
+    assert store.hits == 1
+
+
+def test_store_can_be_configured_with_dict():
+    store = TieredStateStore(
+        {
+            "cls": "livecomponents.manager.stores.MemoryStateStore",
+            "config": {"max_bytes": 1024},
+        }
+    )
+
+    assert isinstance(store.store, MemoryStateStore)
+    assert store.store.max_bytes == 1024
@@ -1,6 +1,10 @@
 import pytest
 
-from livecomponents.utils import LiveComponentsPath, get_ancestor_id
+from livecomponents.utils import (
+    LiveComponentsModel,
+    LiveComponentsPath,
+    get_ancestor_id,
+)
 
 
 def test_live_components_path():
@@ -21,3 +25,28 @@ def test_live_components_path():
 )
 def test_get_ancestor_id(ancestor_type, expected_ancestor_id):
     assert get_ancestor_id("|foo:1|bar:2|baz:3", ancestor_type) == expected_ancestor_id
+
+
+class ItemsModel(LiveComponentsModel):
+    title: str = ""
+    items: list[str] = []
+
+
+def test_live_components_model_tracks_changed_fields():
+    model = ItemsModel()
+    assert model.get_changed_fields() == {"title", "items"}
+    assert model.pop_changed_fields() == {"title", "items"}
+
+    model.title = "Beans"
+    model.items.append("Kenyan AA")
+    assert model.get_changed_fields() == {"title"}
+    model.mark_changed("items")
+    assert model.pop_changed_fields() == {"title", "items"}
+    assert model.get_changed_fields() == set()
+
+    # Copies have never been saved, and tracking doesn't affect equality.
+    assert model.model_copy().get_changed_fields() == {"title", "items"}
+    assert model == ItemsModel(title="Beans", items=["Kenyan AA"])
+
+    with pytest.raises(ValueError):
+        model.mark_changed("unknown")
@@ -1,9 +1,21 @@
 import json
+import threading
 from urllib.parse import urlencode
 
+from django.template import RequestContext, Template
 from django.urls import reverse
 
-from livecomponents.views import parse_body
+from livecomponents.const import COMMAND_SEQ_HEADER, SUPERSEDED_HEADER
+from livecomponents.manager.manager import CallContext
+from livecomponents.manager.unit_of_work import UnitOfWork, use_unit_of_work
+from livecomponents.template_cache import get_compiled_template_cache
+from livecomponents.types import StateAddress
+from livecomponents.views import (
+    RenderExecutor,
+    parse_body,
+    re_render_components,
+    stream_re_rendered_components,
+)
 
 
 def test_missing_session_returns_410_gone(client, state_manager):
@@ -18,6 +30,207 @@ def test_missing_session_returns_410_gone(client, state_manager):
     assert resp.status_code == 410
 
 
+def test_call_command_re_renders_component_and_saves_state(rf, client, state_manager):
+    session_id = "session"
+    component_id = "|simplecounter:0"
+    render_simplecounter(rf, session_id)
+
+    resp = client.post(
+        call_command_url(session_id, component_id, "increment"),
+        data={},
+        content_type="application/json",
+    )
+
+    assert resp.status_code == 200
+    assert "Count: 1" in resp.content.decode()
+    state_addr = StateAddress(session_id=session_id, component_id=component_id)
+    assert state_manager.get_component_state(state_addr).count == 1
+
+
+def test_call_command_streams_re_rendered_components(
+    rf, client, settings, state_manager
+):
+    settings.LIVECOMPONENTS = {"stream_command_responses": True}
+    session_id = "session"
+    component_id = "|simplecounter:0"
+    render_simplecounter(rf, session_id)
+
+    resp = client.post(
+        call_command_url(session_id, component_id, "increment"),
+        data={},
+        content_type="application/json",
+    )
+
+    assert resp.streaming
+    assert "Count: 1" in b"".join(resp.streaming_content).decode()
+    state_addr = StateAddress(session_id=session_id, component_id=component_id)
+    assert state_manager.get_component_state(state_addr).count == 1
+
+
+def test_streamed_render_writes_are_flushed_when_client_disconnects(rf, state_manager):
+    session_id = "session"
+    render_simplecounter(rf, session_id)
+    state_addr = StateAddress(session_id=session_id, component_id="|simplecounter:0")
+    other_addr = state_addr.with_component_id("|simplecounter:1")
+    unit_of_work = UnitOfWork()
+    with use_unit_of_work(unit_of_work):
+        state = state_manager.get_component_state(state_addr)
+        state.count = 5
+        state_manager.set_component_state(state_addr, state)
+        state_manager.set_component_state(other_addr, state.model_copy())
+    call_context = CallContext(
+        request=rf.post("/"),
+        state=state,
+        state_address=state_addr,
+        state_manager=state_manager,
+    )
+
+    fragments = stream_re_rendered_components(
+        [state_addr, other_addr], call_context, unit_of_work
+    )
+    assert "Count: 5" in next(fragments)
+    fragments.close()
+
+    assert state_manager.get_component_state(state_addr).count == 5
+    assert state_manager.get_component_state(other_addr).count == 5
+
+
+def test_call_command_reuses_compiled_templates(rf, client, state_manager):
+    session_id = "session"
+    component_id = "|simplecounter:0"
+    render_simplecounter(rf, session_id)
+    template_cache = get_compiled_template_cache()
+    template_cache.clear()
+
+    for _ in range(2):
+        resp = client.post(
+            call_command_url(session_id, component_id, "increment"),
+            data={},
+            content_type="application/json",
+        )
+
+    assert "Count: 2" in resp.content.decode()
+    assert template_cache.cache_info().hits == 1
+    assert template_cache.cache_info().misses == 1
+
+
+def test_re_render_components_in_parallel_keeps_order(rf, settings, state_manager):
+    settings.LIVECOMPONENTS = {"render_workers": 4}
+    session_id = "session"
+    request = rf.get("/")
+    template = Template(
+        "{% load livecomponents %}"
+        '{% livecomponent "simplecounter" own_id="0" %}'
+        '{% livecomponent "simplecounter" own_id="1" %}'
+        '{% livecomponent "simplecounter" own_id="2" %}'
+    )
+    template.render(
+        RequestContext(
+            request, {"request": request, "LIVECOMPONENTS_SESSION_ID": session_id}
+        )
+    )
+    addresses = {
+        StateAddress(session_id=session_id, component_id=f"|simplecounter:{i}")
+        for i in range(3)
+    }
+    state_address = min(addresses, key=lambda x: x.component_id)
+    call_context = CallContext(
+        request=request,
+        state=state_manager.get_component_state(state_address),
+        state_address=state_address,
+        state_manager=state_manager,
+    )
+
+    with state_manager.unit_of_work():
+        rendered = re_render_components(addresses, call_context)
+
+    assert len(rendered) == 3
+    for i, html in enumerate(rendered):
+        assert f"|simplecounter:{i}" in html
+
+
+def test_render_executor_closes_connections_of_every_thread(monkeypatch):
+    closing_threads = []
+    monkeypatch.setattr(
+        "livecomponents.views.connections.close_all",
+        lambda: closing_threads.append(threading.get_ident()),
+    )
+    executor = RenderExecutor(max_workers=3)
+    executor.submit(lambda: None).result()
+
+    executor.shutdown()
+
+    assert len(set(closing_threads)) == 3
+
+
+def test_call_command_skips_superseded_commands(rf, client, state_manager):
+    session_id = "session"
+    component_id = "|simplecounter:0"
+    render_simplecounter(rf, session_id)
+    url = call_command_url(session_id, component_id, "increment")
+
+    latest = client.post(
+        url, data={}, content_type="application/json", headers={COMMAND_SEQ_HEADER: "2"}
+    )
+    superseded = client.post(
+        url, data={}, content_type="application/json", headers={COMMAND_SEQ_HEADER: "1"}
+    )
+
+    assert "Count: 1" in latest.content.decode()
+    assert superseded.status_code == 204
+    assert superseded.headers[SUPERSEDED_HEADER] == "true"
+    state_addr = StateAddress(session_id=session_id, component_id=component_id)
+    assert state_manager.get_component_state(state_addr).count == 1
+
+
+def test_call_commands_executes_commands_in_order(rf, client, state_manager):
+    session_id = "session"
+    component_id = "|simplecounter:0"
+    render_simplecounter(rf, session_id)
+    commands = [
+        {"component_id": component_id, "command_name": "increment"},
+        {"component_id": component_id, "command_name": "increment"},
+        {"component_id": component_id, "command_name": "decrement", "kwargs": {}},
+        {"component_id": component_id, "command_name": "increment"},
+    ]
+
+    resp = client.post(
+        f"{reverse('livecomponents:call-commands')}?session_id={session_id}",
+        data={"commands": commands},
+        content_type="application/json",
+    )
+
+    assert resp.status_code == 200
+    assert resp.content.decode().count("Count:") == 1
+    assert "Count: 2" in resp.content.decode()
+    state_addr = StateAddress(session_id=session_id, component_id=component_id)
+    assert state_manager.get_component_state(state_addr).count == 2
+
+
+def test_call_commands_rejects_empty_batch(rf, client, state_manager):
+    render_simplecounter(rf, "session")
+
+    resp = client.post(
+        f"{reverse('livecomponents:call-commands')}?session_id=session",
+        data={"commands": []},
+        content_type="application/json",
+    )
+
+    assert resp.status_code == 400
+
+
+def test_call_commands_rejects_body_that_is_not_an_object(rf, client, state_manager):
+    render_simplecounter(rf, "session")
+
+    resp = client.post(
+        f"{reverse('livecomponents:call-commands')}?session_id=session",
+        data=[],
+        content_type="application/json",
+    )
+
+    assert resp.status_code == 400
+
+
 def test_parse_body_understands_json_encoded_content(rf):
     request = rf.post(
         "/",
@@ -43,3 +256,22 @@ def test_parse_body_understands_urlencoded_form_data(rf):
         content_type="application/x-www-form-urlencoded",
     )
     assert parse_body(request) == {"foo": "bar"}
+
+
+def render_simplecounter(rf, session_id: str) -> str:
+    request = rf.get("/")
+    template = Template('{% load livecomponents %}{% livecomponent "simplecounter" %}')
+    context = RequestContext(
+        request, {"request": request, "LIVECOMPONENTS_SESSION_ID": session_id}
+    )
+    return template.render(context)
+
+
+def call_command_url(session_id: str, component_id: str, command_name: str) -> str:
+    url = reverse("livecomponents:call-command")
+    kwargs = {
+        "session_id": session_id,
+        "component_id": component_id,
+        "command_name": command_name,
+    }
+    return f"{url}?{urlencode(kwargs)}"